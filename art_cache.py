@@ -0,0 +1,143 @@
+from __future__ import annotations
+import hashlib, os
+from collections import OrderedDict
+from PySide6.QtCore import QObject, QRunnable, QSize, QThreadPool, Qt, Signal
+from PySide6.QtGui import QImage, QImageReader, QPixmap
+from core import metrics
+from library import CACHE_DIR
+
+
+ART_CACHE_DIR = os.path.join(CACHE_DIR, 'thumbnails')
+ART_SIZE = 200
+
+
+class Art_Cache(QObject):
+    '''
+    # Art_Cache
+    #### Loads the thumbnails of songs off the GUI thread, keeping pre-scaled copies on disk and the most recent pixmaps in memory
+    ---
+    ## Parameters
+    - parent [QObject]: The QObject which owns the cache
+    - capacity [int]: How many ready pixmaps are kept in memory
+    - cache_dir [str]: The folder which holds the pre-scaled copies of the thumbnails
+    '''
+    ready = Signal(str, QPixmap)
+    loaded = Signal(str, QImage)
+
+    def __init__(self, parent: QObject = None, capacity: int = 32, cache_dir: str = ART_CACHE_DIR) -> None:
+        super().__init__(parent)
+        self.capacity = capacity
+        self.cache_dir = cache_dir
+        self.pixmaps: OrderedDict[str, QPixmap] = OrderedDict()
+        self.pending: set[str] = set()
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(2)
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.loaded.connect(self.on_loaded)
+
+    def get(self, img: str) -> QPixmap | None:
+        '''
+        ## get
+        ##### Returns the pixmap of a thumbnail if it is ready, else starts loading it and returns None. The ready signal is emitted once it is loaded.
+        ---
+        ## Parameters
+        - img [str]: the path of the thumbnail
+        '''
+        pixmap = self.pixmaps.get(img)
+        if pixmap is not None:
+            self.pixmaps.move_to_end(img)
+            return pixmap
+        self.prefetch(img)
+        return None
+
+    def prefetch(self, *imgs: str | None):
+        '''
+        ## prefetch
+        ##### Starts loading thumbnails which are not in memory yet
+        ---
+        ## Parameters
+        - imgs [str | None]: the paths of the thumbnails, songs without one pass None
+        '''
+        for img in imgs:
+            if img is None or img in self.pixmaps or img in self.pending: continue
+            self.pending.add(img)
+            self.pool.start(Art_Loader(self, img))
+
+    def forget(self, img: str):
+        '''
+        ## forget
+        ##### Drops a thumbnail from memory, e.g. because its file changed, the next get loads it again
+        ---
+        ## Parameters
+        - img [str]: the path of the thumbnail
+        '''
+        self.pixmaps.pop(img, None)
+
+    def on_loaded(self, img: str, image: QImage):
+        '''
+        ## on_loaded
+        ##### Turns a decoded image into a pixmap on the GUI thread and stores it in the memory cache
+        ---
+        ## Parameters
+        - img [str]: the path of the thumbnail
+        - image [QImage]: the scaled image, null if the thumbnail couldn't be read
+        '''
+        self.pending.discard(img)
+        if image.isNull(): return
+        start = metrics.start()
+        pixmap = self.pixmaps[img] = QPixmap.fromImage(image)
+        metrics.stop('art to pixmap', start)
+        if len(self.pixmaps) > self.capacity: self.pixmaps.popitem(last=False)
+        self.ready.emit(img, pixmap)
+
+    def cache_path(self, img: str) -> str | None:
+        '''
+        ## cache_path
+        ##### Returns the path of the pre-scaled copy of a thumbnail, named after its path and modification time
+        ---
+        ## Parameters
+        - img [str]: the path of the thumbnail
+        '''
+        try: mtime = os.stat(img).st_mtime_ns
+        except OSError: return None
+        key = hashlib.sha1(f'{os.path.abspath(img)}|{mtime}|{ART_SIZE}'.encode()).hexdigest()
+        return os.path.join(self.cache_dir, f'{key}.jpg')
+
+
+class Art_Loader(QRunnable):
+    '''
+    # Art_Loader
+    #### Reads one thumbnail on a worker thread, from the disk cache if possible, else decodes and scales the original
+    ---
+    ## Parameters
+    - cache [Art_Cache]: The Art_Cache which receives the image
+    - img [str]: The path of the thumbnail
+    '''
+    def __init__(self, cache: Art_Cache, img: str) -> None:
+        super().__init__()
+        self.cache = cache
+        self.img = img
+
+    def run(self):
+        '''
+        run
+        ---
+        Loads the image and hands it back to the GUI thread
+        '''
+        start = metrics.start()
+        cached = self.cache.cache_path(self.img)
+        image = QImage(cached) if cached and os.path.exists(cached) else QImage()
+        if image.isNull() and cached:
+            reader = QImageReader(self.img)
+            size = reader.size()
+            if size.isValid():
+                # decoding straight at the target size is much cheaper than decoding the full image and scaling it
+                reader.setScaledSize(size.scaled(QSize(ART_SIZE, ART_SIZE), Qt.AspectRatioMode.KeepAspectRatio))
+            image = reader.read()
+            if not image.isNull():
+                image = image.scaled(ART_SIZE, ART_SIZE, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+                image.save(cached, 'JPG', 90)
+        metrics.stop('art decode', start)
+        self.cache.loaded.emit(self.img, image)
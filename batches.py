@@ -0,0 +1,211 @@
+from __future__ import annotations
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+from PySide6.QtCore import QObject, Signal
+from library import Index_Rows, Library_Index
+
+
+# batches handed to the pool per worker at a time, the rest wait in the scanner, so a first start of a large library doesn't submit thousands of them at once
+IN_FLIGHT_PER_WORKER = 2
+
+
+class Batch_Scanner(QObject):
+    '''
+    # Batch_Scanner
+    #### Works through songs of the library index in batches on a thread pool, and hands the results of each batch to the GUI thread
+    Which songs to work on is picked on a worker thread as well, from a snapshot of the rows, so starting doesn't walk the whole index on the GUI thread.
+    Only a few batches per worker are in the pool at a time, the others wait in the scanner.
+    The files of the batches which are waiting or worked on are kept, so starting again doesn't submit them twice.
+    Subclasses pick the rows with select and wants, keep the results of a batch in keep and tell what they found in report.
+    ---
+    ## Parameters
+    - index [Library_Index]: The index of the library
+    - work [Callable]: Works on a batch on a worker thread, gets the file name, path, modification time, size and audio offset of each song
+    - batch [int]: How many songs go into one task, so the GUI thread hears back per batch instead of per file
+    - parent [QObject]: The QObject which owns the scanner
+
+    ## Signals
+    - planned [tuple]: the future of a plan and what plan returned, None if it failed
+    - batch_done [tuple]: the future of a batch, the batch and its results, None if it failed
+    '''
+    planned = Signal(object)
+    batch_done = Signal(object)
+
+    def __init__(self, index: Library_Index, work: Callable[[list[tuple]], list[tuple]], batch: int, parent: QObject = None) -> None:
+        super().__init__(parent)
+        self.index = index
+        self.work = work
+        self.batch = batch
+        self.pool: ThreadPoolExecutor = None
+        self.workers = min(32, (os.cpu_count() or 1) + 4)
+        self.futures: set[Future] = set()
+        # batches waiting for a worker
+        self.waiting: deque[list[tuple]] = deque()
+        # the files in the batches which are waiting or worked on, so starting again doesn't submit them twice
+        self.files: set[str] = set()
+        # whether the index changed since it was last saved
+        self.changed = False
+        self.planned.connect(self.on_planned)
+        self.batch_done.connect(self.on_batch)
+
+    def wants(self, row: tuple) -> bool:
+        '''
+        ## wants
+        ##### returns whether a song still has to be worked on
+        ---
+        ## Parameters
+        - row [tuple]: the row of the song in the index
+        '''
+        raise NotImplementedError
+
+    def select(self, rows: Index_Rows) -> list[tuple]:
+        '''
+        ## select
+        ##### returns the rows of the index which are looked at, runs on a worker thread. Only the ones which wants are worked on.
+        ---
+        ## Parameters
+        - rows [Index_Rows]: a snapshot of the rows of the index
+        '''
+        return [row for row in rows.values() if self.wants(row)]
+
+    def plan(self, rows: Index_Rows) -> tuple[list[str], list[tuple]]:
+        '''
+        ## plan
+        ##### picks the songs to work on, runs on a worker thread
+        ---
+        ## Parameters
+        - rows [Index_Rows]: a snapshot of the rows of the index
+
+        ## Returns
+        - the file names of the rows select picked, and the file name, path, modification time, size and audio offset of the ones to work on
+        '''
+        picked = self.select(rows)
+        return [row[0] for row in picked], [(row[0], os.path.join(self.index.songs_dir, row[0]), row[1], row[2], row[8]) for row in picked if self.wants(row)]
+
+    def start(self):
+        '''
+        start
+        ---
+        plans on a worker thread which songs to work on, then submits them, or reports right away if there are none and nothing is running.
+        Called again after the library changed, it only submits what isn't running yet.
+        '''
+        if self.pool is None: self.pool = ThreadPoolExecutor(self.workers)
+        future = self.pool.submit(self.plan, self.index.rows.snapshot())
+        self.futures.add(future)
+        future.add_done_callback(lambda future: self.planned.emit((future, None if future.cancelled() or future.exception() else future.result())))
+
+    def on_planned(self, result: tuple[Future, tuple[list[str], list[tuple]] | None]):
+        '''
+        ## on_planned
+        ##### hands what a plan found to selected on the GUI thread
+        ---
+        ## Parameters
+        - result [tuple]: the future of the plan and what it returned, None if it failed
+        '''
+        future, planned = result
+        if future not in self.futures: return
+        self.futures.discard(future)
+        self.selected(*(planned or ([], [])))
+
+    def selected(self, files: list[str], jobs: list[tuple]):
+        '''
+        ## selected
+        ##### submits the songs a plan picked, and reports right away if there is nothing to do
+        ---
+        ## Parameters
+        - files [list[str]]: the file names of the rows select picked
+        - jobs [list[tuple]]: the songs to work on
+        '''
+        self.submit(jobs)
+        if not self.futures: self.report()
+
+    def submit(self, jobs: list[tuple]):
+        '''
+        ## submit
+        ##### splits the songs which aren't waiting or running yet into batches and queues them for the pool
+        ---
+        ## Parameters
+        - jobs [list[tuple]]: the file name, path, modification time, size and audio offset of each song
+        '''
+        jobs = [job for job in jobs if job[0] not in self.files]
+        if not jobs: return
+        self.files.update(job[0] for job in jobs)
+        self.waiting.extend(jobs[start:start + self.batch] for start in range(0, len(jobs), self.batch))
+        self.fill()
+
+    def fill(self):
+        '''
+        fill
+        ---
+        hands waiting batches to the pool until every worker has IN_FLIGHT_PER_WORKER of them
+        '''
+        if self.pool is None: self.pool = ThreadPoolExecutor(self.workers)
+        while self.waiting and len(self.futures) < self.workers * IN_FLIGHT_PER_WORKER:
+            batch = self.waiting.popleft()
+            future = self.pool.submit(self.work, batch)
+            self.futures.add(future)
+            future.add_done_callback(lambda future, batch=batch: self.batch_done.emit((future, batch, None if future.cancelled() or future.exception() else future.result())))
+
+    def on_batch(self, result: tuple[Future, list[tuple], list[tuple] | None]):
+        '''
+        ## on_batch
+        ##### keeps the results of a batch on the GUI thread, once the last batch is in the index is saved and the results are reported
+        ---
+        ## Parameters
+        - result [tuple]: the future of the batch, the batch and its results, None if it failed
+        '''
+        future, batch, results = result
+        if future not in self.futures: return
+        self.futures.discard(future)
+        self.files.difference_update(file for file, *_ in batch)
+        if results: self.keep(results)
+        self.fill()
+        if self.futures:
+            self.progress()
+            return
+        if self.changed:
+            self.changed = False
+            self.index.save()
+        self.report()
+
+    def keep(self, results: list[tuple]):
+        '''
+        ## keep
+        ##### keeps the results of a batch in the index, and sets changed if it did
+        ---
+        ## Parameters
+        - results [list[tuple]]: what work returned for the batch
+        '''
+        raise NotImplementedError
+
+    def progress(self):
+        '''
+        progress
+        ---
+        called after a batch came in while others are still running
+        '''
+
+    def report(self):
+        '''
+        report
+        ---
+        called once every batch is in and the index is saved
+        '''
+
+    def stop(self):
+        '''
+        stop
+        ---
+        cancels the batches which didn't start yet, what came in so far is saved
+        '''
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+        self.futures.clear()
+        self.waiting.clear()
+        self.files.clear()
+        if self.changed:
+            self.changed = False
+            self.index.save()
@@ -0,0 +1,1023 @@
+from __future__ import annotations
+import argparse, os, random, shutil, string, sys, tempfile
+from time import perf_counter, process_time, sleep
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PySide6.QtCore import QCoreApplication, QTimer, Qt
+from PySide6.QtGui import QGradient, QPainter
+from PySide6.QtWidgets import QApplication, QFrame, QGraphicsDropShadowEffect, QLabel, QScrollArea, QSlider, QWidget
+from core import VISIBLE_HZ, Media_Backend, Play_Queue, Playback_Core, Position_Throttle, Rate_Counter, Volume_Backend, Volume_Control, format_time
+from library import Library_Index, Song
+from presets import PRESETS, Gradient_Background, Show_Presets
+from tests.helpers import LOAD_MS, POSITION_NOTIFY_MS, Fake_Backend, make_songs, mp3_frames
+
+# a slider drag: how many sliderMoved events, how far apart, and what one session scan + QueryInterface costs
+DRAG_MOVES = 300
+DRAG_MOVE_MS = 4
+SESSION_SCAN_MS = 2
+LIBRARY_SIZES = (1000, 10000, 100000)
+
+
+class Fake_Position:
+    '''
+    # Fake_Position
+    #### Stands in for a playing QMediaPlayer: the position follows the wall clock and is reported every POSITION_NOTIFY_MS
+    '''
+    def __init__(self) -> None:
+        self.start = perf_counter()
+        self.timer = QTimer()
+        self.timer.setInterval(POSITION_NOTIFY_MS)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+
+    def position(self) -> int:
+        return int((perf_counter() - self.start) * 1000)
+
+
+def make_controls() -> tuple[QWidget, QSlider, QLabel]:
+    '''
+    ## make_controls
+    ##### builds a window with the slider and label which the position updates land on
+    '''
+    win = QWidget()
+    win.resize(1200, 100)
+    slider = QSlider(Qt.Orientation.Horizontal, win)
+    slider.setGeometry(100, 0, 1000, 20)
+    slider.setRange(0, 10 * 60 * 1000)
+    label = QLabel('00:00', win)
+    label.setGeometry(50, 0, 45, 20)
+    win.show()
+    return win, slider, label
+
+
+def run_for(seconds: float) -> float:
+    '''
+    ## run_for
+    ##### runs the event loop for some seconds and returns the CPU seconds it used per minute
+    '''
+    app = QCoreApplication.instance()
+    QTimer.singleShot(int(seconds * 1000), app.quit)
+    cpu = process_time()
+    app.exec()
+    return (process_time() - cpu) / seconds * 60
+
+
+def bench_position_timer(seconds: float) -> dict[str, float]:
+    '''
+    ## bench_position_timer
+    ##### compares the CPU cost of the old 0 ms rep_timer with the throttled positionChanged updates, shown and hidden
+    ---
+    ## Returns
+    - the CPU seconds per minute of playback of each variant
+    '''
+    results = {}
+
+    # before: a 0 ms timer which rewrites the slider and label on every spin of the event loop
+    win, slider, label = make_controls()
+    source = Fake_Position()
+    def time_setter():
+        slider.setSliderPosition(source.position())
+        label.setText(format_time(source.position()))
+    rep_timer = QTimer()
+    rep_timer.setInterval(0)
+    rep_timer.timeout.connect(time_setter)
+    rep_timer.start()
+    results['rep_timer 0 ms'] = run_for(seconds)
+    rep_timer.stop()
+
+    # after: positionChanged goes through the throttle, the label only changes with the second
+    for name, hidden in (('throttled, visible', False), ('throttled, hidden', True)):
+        source = Fake_Position()
+        throttle = Position_Throttle(None, win)
+        shown = [-1]
+        def throttled_setter(position: int):
+            slider.setSliderPosition(position)
+            if round(position/1000) != shown[0]:
+                shown[0] = round(position/1000)
+                label.setText(format_time(position))
+        throttle.updated.connect(throttled_setter)
+        source.timer.timeout.connect(lambda: throttle.set_position(source.position()))
+        win.setVisible(not hidden)
+        throttle.start()
+        source.timer.start()
+        results[name] = run_for(seconds)
+        source.timer.stop()
+        throttle.stop()
+    return results
+
+
+class Fake_Volume(Volume_Backend):
+    '''
+    # Fake_Volume
+    #### A volume backend which blocks for as long as a pycaw session scan would, and counts its calls
+    ---
+    ## Parameters
+    - cost [float]: the seconds each call blocks for
+    '''
+    def __init__(self, cost: float) -> None:
+        self.cost = cost
+        self.calls = 0
+        self.blocked = 0.0
+
+    def set_volume(self, level: float) -> bool:
+        start = perf_counter()
+        self.calls += 1
+        while perf_counter() - start < self.cost: pass
+        self.blocked += perf_counter() - start
+        return True
+
+
+def drag(on_move) -> None:
+    '''
+    ## drag
+    ##### feeds a slider drag of DRAG_MOVES positions into on_move through the event loop, then lets pending timers finish
+    '''
+    app = QCoreApplication.instance()
+    positions = iter(range(DRAG_MOVES))
+    timer = QTimer()
+    timer.setInterval(DRAG_MOVE_MS)
+    def move():
+        position = next(positions, None)
+        if position is None:
+            timer.stop()
+            QTimer.singleShot(200, app.quit)
+        else: on_move(position % 101)
+    timer.timeout.connect(move)
+    timer.start()
+    app.exec()
+
+
+def bench_volume() -> dict[str, str]:
+    '''
+    ## bench_volume
+    ##### compares calling the volume backend on every slider move with coalescing the moves through Volume_Control
+    '''
+    results = {}
+    direct = Fake_Volume(SESSION_SCAN_MS / 1000)
+    drag(lambda position: direct.set_volume(position/100))
+    results['every move'] = direct
+
+    cached = Fake_Volume(SESSION_SCAN_MS / 1000)
+    control = Volume_Control(cached)
+    drag(control.set_level)
+    results['coalesced'] = cached
+    return {name: f'{backend.calls:5} calls, {backend.blocked * 1000:8.1f} ms blocked' for name, backend in results.items()}
+
+
+class Old_Preview(QFrame):
+    '''
+    # Old_Preview
+    #### The preset preview the gallery used to create for every preset: a frame with its own drop shadow which rebuilds its gradient on every paint
+    '''
+    def __init__(self, parent: QWidget, preset: QGradient.Preset, x: int, y: int) -> None:
+        super().__init__(parent)
+        shadow = QGraphicsDropShadowEffect(self)
+        shadow.setBlurRadius(20)
+        shadow.setOffset(0)
+        self.setGeometry(x, y, 200, 200)
+        self.setStyleSheet('background-color: white; border-radius: 5px; border: 1px solid black;')
+        self.setGraphicsEffect(shadow)
+        self.preset = preset
+        lbl = QLabel(f'{preset.name} {preset.value}', self)
+        lbl.setGeometry(1, 1, 198, 22)
+        lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        lbl.setStyleSheet('border: none; font-size: 20px; font-family: Space Grotesk;')
+
+    def paintEvent(self, event):
+        p = QPainter(self)
+        p.setBrush(QGradient(self.preset))
+        p.drawEllipse(self.width()/4, self.height()/4 + 10, self.width()/2, self.height()/2)
+        p.end()
+        return super().paintEvent(event)
+
+
+def make_old_gallery() -> QScrollArea:
+    '''
+    ## make_old_gallery
+    ##### builds the gallery the way it used to be built, one Old_Preview per preset inside a QScrollArea
+    '''
+    area = QScrollArea()
+    area.resize(1200, 600)
+    content = QWidget()
+    content.setGeometry(0, 0, 1180, len(PRESETS)//4*260 + 310)
+    x, y = 100, 50
+    for preset in PRESETS:
+        Old_Preview(content, preset, x, y)
+        x += 260
+        if x + 240 > content.width(): x, y = 100, y + 260
+    area.setWidget(content)
+    return area
+
+
+def bench_preset_gallery() -> dict[str, float]:
+    '''
+    ## bench_preset_gallery
+    ##### measures the time to the first frame of the preset gallery and the average cost of repainting it while scrolling, old and new
+    '''
+    app = QCoreApplication.instance()
+    results = {}
+    for name, make in (('old', make_old_gallery), ('virtualized', lambda: Show_Presets(None))):
+        start = perf_counter()
+        gallery = make()
+        gallery.resize(1200, 600)
+        gallery.show()
+        app.processEvents()
+        results[f'{name}: first frame'] = (perf_counter() - start) * 1000
+
+        bar = gallery.verticalScrollBar()
+        steps = range(0, bar.maximum(), 40)
+        start = perf_counter()
+        for value in steps:
+            bar.setValue(value)
+            gallery.viewport().repaint()
+        results[f'{name}: scroll frame'] = (perf_counter() - start) * 1000 / max(len(steps), 1)
+        gallery.close()
+    return results
+
+
+class Page(QWidget):
+    '''
+    # Page
+    #### A page with a preset background and a slider on it, painted either like Home_Page used to or from the cached background
+    '''
+    def __init__(self, cached: bool) -> None:
+        super().__init__()
+        self.resize(1200, 600)
+        self.cached = cached
+        self.background = Gradient_Background(QGradient.Preset.WarmFlame)
+        self.paint_rate = Rate_Counter()
+        if cached: self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
+        self.slider = QSlider(Qt.Orientation.Horizontal, self)
+        self.slider.setGeometry(100, 450, 1000, 20)
+        self.slider.setRange(0, 1000)
+
+    def paintEvent(self, event):
+        self.paint_rate.tick()
+        painter = QPainter(self)
+        if self.cached:
+            self.background.render(self.size(), self.size())
+            self.background.paint(painter, event.rect())
+        else:
+            painter.setBrush(QGradient(QGradient.Preset.WarmFlame))
+            painter.drawRect(0, 0, self.width(), self.height())
+        painter.end()
+
+
+def bench_background(frames: int = 300) -> dict[str, float]:
+    '''
+    ## bench_background
+    ##### measures what a slider tick costs when the page behind it rebuilds its gradient on every paint, and when it copies it from the cache
+    '''
+    app = QCoreApplication.instance()
+    results = {}
+    for name, cached in (('gradient every paint', False), ('cached background', True)):
+        page = Page(cached)
+        page.show()
+        app.processEvents()
+        start = perf_counter()
+        for frame in range(frames):
+            page.slider.setSliderPosition(frame)
+            page.slider.repaint()
+        results[f'{name}: slider tick'] = (perf_counter() - start) * 1000 / frames
+        start = perf_counter()
+        for frame in range(frames // 10): page.repaint()
+        results[f'{name}: full window'] = (perf_counter() - start) * 1000 / (frames // 10)
+        page.close()
+    return results
+
+
+def write_library(folder: str, count: int):
+    '''
+    ## write_library
+    ##### fills a folder with count tiny mp3 files, each holding an ID3v2.3 tag with a title and an artist and a few bytes of audio of its own
+    '''
+    def frame(name: bytes, text: str) -> bytes:
+        data = b'\x00' + text.encode('latin-1')
+        return name + len(data).to_bytes(4, 'big') + b'\x00\x00' + data
+    for i in range(count):
+        frames = frame(b'TIT2', f'Song {i:06}') + frame(b'TPE1', f'Band {i % 97}')
+        size = len(frames)
+        header = b'ID3\x03\x00\x00' + bytes((size >> 21 & 0x7f, size >> 14 & 0x7f, size >> 7 & 0x7f, size & 0x7f))
+        with open(os.path.join(folder, f'{i:06}.mp3'), 'wb') as f: f.write(header + frames + b'\xff\xfb\x90\x00' + i.to_bytes(4, 'big'))
+
+
+def bench_library(sizes: tuple[int]) -> dict[str, float]:
+    '''
+    ## bench_library
+    ##### measures the first scan of a songs folder, which reads every tag, and a later start: loading the index and making the play order, which the window waits for,
+    ##### the rescan which only stats the files on a worker, and building every Song, which the search index does later
+    '''
+    results = {}
+    for count in sizes:
+        folder = tempfile.mkdtemp(prefix='bench_library_')
+        try:
+            songs = os.path.join(folder, 'songs')
+            os.makedirs(songs)
+            write_library(songs, count)
+            index_file = os.path.join(folder, 'library.idx')
+
+            start = perf_counter()
+            index = Library_Index(songs, os.path.join(folder, 'thumbnails'), index_file)
+            index.scan()
+            index.sorted_songs()
+            results[f'{count:>6} files: cold scan'] = (perf_counter() - start) * 1000
+
+            start = perf_counter()
+            index = Library_Index(songs, os.path.join(folder, 'thumbnails'), index_file)
+            loaded = perf_counter()
+            Play_Queue(index.sorted_songs())
+            results[f'{count:>6} files: warm load'] = (loaded - start) * 1000
+            results[f'{count:>6} files: warm load + play order'] = (perf_counter() - start) * 1000
+
+            start = perf_counter()
+            index.scan()
+            results[f'{count:>6} files: rescan'] = (perf_counter() - start) * 1000
+            start = perf_counter()
+            list(index.songs.values())
+            results[f'{count:>6} files: build every song'] = (perf_counter() - start) * 1000
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+    return results
+
+
+def bench_shuffle(sizes: tuple[int], repeats: int = 20) -> dict[str, float]:
+    '''
+    ## bench_shuffle
+    ##### compares turning shuffle on the way Controls used to, copying, shuffling and re-indexing the whole list, with the lazy Play_Queue
+    '''
+    results = {}
+    for count in sizes:
+        songs = make_songs(count)
+        current = songs[count // 2]
+
+        start = perf_counter()
+        for _ in range(repeats):
+            shuffled = songs.copy()
+            random.shuffle(shuffled)
+            shuffled.remove(current)
+            shuffled.insert(0, current)
+            index = {song.name: i for i, song in enumerate(shuffled)}
+        results[f'{count:>6} songs: copy + shuffle'] = (perf_counter() - start) * 1000 / repeats
+
+        queue = Play_Queue(songs)
+        start = perf_counter()
+        for _ in range(repeats):
+            queue.set_shuffle(True)
+            queue.next()
+            queue.set_shuffle(False)
+        results[f'{count:>6} songs: Play_Queue'] = (perf_counter() - start) * 1000 / (repeats * 2)
+    return results
+
+
+def bench_track_change(changes: int = 20) -> dict[str, float]:
+    '''
+    ## bench_track_change
+    ##### measures the time from a skip until the new song is ready, when it has to load and when the core preloaded it
+    '''
+    app = QCoreApplication.instance()
+    results = {}
+    for name, preload in (('load on skip', False), ('preloaded', True)):
+        backend = Fake_Backend()
+        if not preload: backend.preload = lambda song: None
+        core = Playback_Core(backend, Play_Queue(make_songs(100)))
+        core.start()
+        latencies = []
+        clicked = [0.0]
+        def ready(duration: int):
+            latencies.append((perf_counter() - clicked[0]) * 1000)
+            if len(latencies) < changes: QTimer.singleShot(5, skip)
+            else: app.quit()
+        def skip():
+            clicked[0] = perf_counter()
+            core.next()
+        QTimer.singleShot(LOAD_MS * 2, lambda: (core.song_ready.connect(ready), skip()))
+        app.exec()
+        core.song_ready.disconnect(ready)
+        results[f'{name}: mean'] = sum(latencies) / len(latencies)
+        results[f'{name}: worst'] = max(latencies)
+    return results
+
+
+def bench_core_cpu(seconds: float) -> dict[str, float]:
+    '''
+    ## bench_core_cpu
+    ##### measures the CPU the playback core spends on a playing song, with the window shown and hidden
+    '''
+    results = {}
+    win, slider, label = make_controls()
+    for name, hidden in (('playing, visible', False), ('playing, hidden', True)):
+        backend = Fake_Backend()
+        core = Playback_Core(backend, Play_Queue(make_songs(10)), None, win)
+        core.position_changed.connect(slider.setSliderPosition)
+        core.time_text_changed.connect(label.setText)
+        win.setVisible(not hidden)
+        core.start()
+        core.play()
+        results[name] = run_for(seconds)
+        core.pause()
+    return results
+
+
+def bench_waveform(frames: int = 600) -> dict[str, float]:
+    '''
+    ## bench_waveform
+    ##### measures what a position update costs on the plain slider and on the waveform seek bar, at the visible update rate of a 3 minute song
+    '''
+    import numpy as np
+    from peaks import PEAK_COUNT
+    from waveform import Waveform_Slider
+    app = QCoreApplication.instance()
+    results = {}
+    peaks = (np.stack((-np.abs(np.sin(np.arange(PEAK_COUNT) / 30)), np.abs(np.sin(np.arange(PEAK_COUNT) / 30))), axis=1) * 127).astype(np.int8)
+    for name, make in (('slider', lambda: QSlider(Qt.Orientation.Horizontal)), ('waveform', lambda: Waveform_Slider(((255, 255, 255, 255), (40, 40, 40, 255))))):
+        slider = make()
+        slider.resize(1000, 20)
+        slider.setRange(0, 3 * 60 * 1000)
+        if name == 'waveform': slider.set_peaks(peaks)
+        slider.show()
+        app.processEvents()
+        start = perf_counter()
+        for frame in range(frames):
+            slider.setSliderPosition(frame * 1000 // VISIBLE_HZ)
+            app.processEvents()
+        results[f'{name}: position update'] = (perf_counter() - start) * 1000 / frames
+        slider.close()
+    return results
+
+
+def measure_synthetic(seconds: int, rate: int = 44100) -> tuple[float, float] | None:
+    '''
+    ## measure_synthetic
+    ##### runs the loudness meter over seconds of stereo noise, fed in mp3 sized buffers like the decoder does
+    '''
+    import numpy as np
+    from loudness import Loudness_Meter
+    frames = np.random.default_rng(seconds).normal(0, 0.1, (seconds * rate, 2)).astype(np.float32)
+    meter = Loudness_Meter()
+    for start in range(0, len(frames), 1152 * 4): meter.add(frames[start:start + 1152 * 4], rate)
+    return meter.result()
+
+
+def bench_loudness(songs: int = 16, seconds: int = 180) -> dict[str, float]:
+    '''
+    ## bench_loudness
+    ##### measures how fast 3 minute mp3s are analyzed by the real analyze, decoding included: in this process, and through the spawned pool of the Loudness_Analyzer
+    The songs are silent frames, which decode like any other song, so the meter alone is timed on noise as well.
+    '''
+    from loudness import Loudness_Analyzer, analyze
+    results = {}
+    start = perf_counter()
+    measure_synthetic(seconds)
+    results['meter alone, 1 process'] = 1 / (perf_counter() - start)
+    folder = tempfile.mkdtemp(prefix='bench_loudness_')
+    try:
+        data = mp3_frames(seconds * 44100 // 1152)
+        paths = [os.path.join(folder, f'{i:03}.mp3') for i in range(songs)]
+        for path in paths:
+            with open(path, 'wb') as f: f.write(data)
+        start = perf_counter()
+        analyze(paths[0])
+        results['decoded + metered, 1 process'] = 1 / (perf_counter() - start)
+
+        app = QCoreApplication.instance()
+        analyzer = Loudness_Analyzer(path=os.path.join(folder, 'loudness.idx'))
+        analyzer.measured.connect(lambda *_: len(analyzer.results) == songs and app.quit())
+        QTimer.singleShot(600000, app.quit)
+        start = perf_counter()
+        analyzer.start([Song(f'{i:03}', path, img=False) for i, path in enumerate(paths)])
+        app.exec()
+        results[f'decoded + metered, {analyzer.workers} spawned workers'] = len(analyzer.results) / (perf_counter() - start)
+        analyzer.stop()
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+    return results
+
+
+def bench_playlist(entries: int = 50000, files: int = 2000) -> dict[str, float]:
+    '''
+    ## bench_playlist
+    ##### measures how soon the first song of a large M3U playlist can play, how long the whole playlist takes, the longest stall of the event loop, and saving it back
+    '''
+    from playlists import CHUNK_MS, Playlist_Loader, write_playlist
+    app = QCoreApplication.instance()
+    results = {}
+    folder = tempfile.mkdtemp(prefix='bench_playlist_')
+    try:
+        for i in range(files): open(os.path.join(folder, f'{i:06}.mp3'), 'wb').close()
+        path = os.path.join(folder, 'big.m3u8')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('#EXTM3U\n')
+            # every 100th entry points at a file which doesn't exist
+            for i in range(entries): f.write(f'#EXTINF:180,Band - Song {i}\n{i % files:06}.mp3\n' if i % 100 else f'#EXTINF:180,Gone {i}\ngone{i}.mp3\n')
+
+        loader = Playlist_Loader(path)
+        songs, stalls = [], []
+        last = [perf_counter()]
+        start = perf_counter()
+        def on_songs(chunk: list):
+            now = perf_counter()
+            if not songs: results['first song ready'] = (now - start) * 1000
+            stalls.append(now - last[0])
+            last[0] = now
+            songs.extend(chunk)
+        def on_finished(missing: list):
+            results['whole playlist read'] = (perf_counter() - start) * 1000
+            results['missing, reported at once'] = f'{len(missing)} entries'
+            app.quit()
+        loader.songs_read.connect(on_songs)
+        loader.finished.connect(on_finished)
+        QTimer.singleShot(0, loader.start)
+        start = perf_counter()
+        app.exec()
+        results[f'longest chunk ({CHUNK_MS} ms budget)'] = max(stalls) * 1000
+
+        start = perf_counter()
+        write_playlist(os.path.join(folder, 'saved.m3u8'), songs)
+        results[f'save {len(songs)} songs'] = (perf_counter() - start) * 1000
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+    return results
+
+
+def bench_watcher(existing: int = 1000, copied: int = 5000, burst: int = 100) -> dict[str, float]:
+    '''
+    ## bench_watcher
+    ##### copies thousands of songs into a watched songs folder in bursts, and measures how many scans that causes and how long the GUI thread is blocked applying them
+    '''
+    from watcher import Library_Watcher
+    app = QCoreApplication.instance()
+    results = {}
+    folder = tempfile.mkdtemp(prefix='bench_watcher_')
+    try:
+        songs = os.path.join(folder, 'songs')
+        os.makedirs(songs)
+        os.makedirs(os.path.join(folder, 'thumbnails'))
+        write_library(songs, existing)
+        library = Library_Index(songs, os.path.join(folder, 'thumbnails'), os.path.join(folder, 'library.idx'))
+        library.scan()
+        watcher = Library_Watcher(library)
+
+        applied, blocked = [0], []
+        apply = library.apply
+        def timed_apply(scan):
+            start = perf_counter()
+            added, updated, removed = apply(scan)
+            blocked.append(perf_counter() - start)
+            applied[0] += len(added)
+            return added, updated, removed
+        library.apply = timed_apply
+
+        staging = tempfile.mkdtemp(prefix='bench_staging_', dir=folder)
+        write_library(staging, existing + copied)
+        files = sorted(os.listdir(staging))[existing:]
+        copying = QTimer()
+        copying.setInterval(10)
+        done = [0.0]
+        def copy_burst():
+            for file in files[:burst]: os.replace(os.path.join(staging, file), os.path.join(songs, file))
+            del files[:burst]
+            if not files:
+                copying.stop()
+                done[0] = perf_counter()
+        def check():
+            if applied[0] >= copied and not watcher.scanning:
+                results['settled after last copy'] = (perf_counter() - done[0]) * 1000
+                app.quit()
+        copying.timeout.connect(copy_burst)
+        watcher.changed.connect(lambda *_: check())
+        copying.start()
+        QTimer.singleShot(60000, app.quit)
+        app.exec()
+
+        results['change events'] = f'{watcher.events}'
+        results['scans'] = f'{watcher.scans}'
+        results['longest GUI block applying a scan'] = max(blocked) * 1000
+        results['total GUI time applying scans'] = sum(blocked) * 1000
+        watcher.stop()
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+    return results
+
+
+def bench_search(count: int = 100000, words: int = 5000) -> dict[str, float]:
+    '''
+    ## bench_search
+    ##### builds the search index over a large library of made up titles, then types queries one key at a time and measures the slowest keystroke
+    '''
+    from search import Search_Index
+    rng = random.Random(1)
+    vocabulary = [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9))) for _ in range(words)]
+    def phrase(length: int) -> str: return ' '.join(rng.choice(vocabulary) for _ in range(length))
+    songs = [Song(f'{i:06}', path=f'{i:06}.mp3', title=phrase(rng.randint(1, 4)), band=phrase(2), album=phrase(1), img=False) for i in range(count)]
+    results = {}
+    start = perf_counter()
+    index = Search_Index(songs)
+    results[f'build, {count} songs'] = (perf_counter() - start) * 1000
+
+    queries = [rng.choice(songs).title for _ in range(50)] + [f'{song.band} {song.title}' for song in rng.sample(songs, 50)]
+    keystrokes = []
+    for query in queries:
+        for end in range(1, len(query) + 1):
+            start = perf_counter()
+            index.search(query[:end])
+            keystrokes.append(perf_counter() - start)
+    keystrokes.sort()
+    results['median keystroke'] = keystrokes[len(keystrokes) // 2] * 1000
+    results['99th percentile keystroke'] = keystrokes[len(keystrokes) * 99 // 100] * 1000
+    results['slowest keystroke'] = keystrokes[-1] * 1000
+
+    changed = songs[:1000]
+    start = perf_counter()
+    for song in changed:
+        song.title = phrase(2)
+        index.update(song)
+    results['update a changed song'] = (perf_counter() - start) * 1000 / len(changed)
+    return results
+
+
+def bench_settings(seconds: float) -> dict[str, float]:
+    '''
+    ## bench_settings
+    ##### plays a song with the session position remembered on every update, and measures the files written and the time the GUI thread spends remembering it
+    '''
+    from settings import SAVE_MS, Settings
+    folder = tempfile.mkdtemp(prefix='bench_settings_')
+    try:
+        settings = Settings(path=os.path.join(folder, 'settings.json'))
+        writes, updates, spent = [0], [0], [0.0]
+        write = settings.write
+        def counted(data: str):
+            writes[0] += 1
+            write(data)
+        settings.write = counted
+        def remember(position: int):
+            start = perf_counter()
+            settings.set('position', position // 1000 * 1000)
+            spent[0] += perf_counter() - start
+            updates[0] += 1
+
+        win, slider, label = make_controls()
+        backend = Fake_Backend()
+        core = Playback_Core(backend, Play_Queue(make_songs(10)), None, win)
+        core.position_changed.connect(remember)
+        win.setVisible(True)
+        core.start()
+        core.play()
+        run_for(seconds)
+        core.pause()
+        settings.save(wait=True)
+        return {
+            'position updates': f'{updates[0]}',
+            f'files written ({SAVE_MS} ms throttle)': f'{writes[0]} in {seconds:g} s',
+            'GUI time per minute of playback': spent[0] / seconds * 60 * 1000,
+        }
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def bench_metrics(calls: int = 200000) -> dict[str, float]:
+    '''
+    ## bench_metrics
+    ##### measures what instrumenting a hot path costs per call, with the metrics disabled and enabled
+    '''
+    from core import Metrics
+    results = {}
+    for name, enabled in (('disabled', False), ('enabled', True)):
+        metrics = Metrics(enabled)
+        start = perf_counter()
+        for _ in range(calls):
+            t = metrics.start()
+            metrics.stop('paint', t)
+        results[f'start/stop, {name}'] = (perf_counter() - start) / calls * 1e6
+        start = perf_counter()
+        for _ in range(calls): metrics.tick('timer')
+        results[f'tick, {name}'] = (perf_counter() - start) / calls * 1e6
+    return results
+
+
+def bench_ipc(requests: int = 50) -> dict[str, float]:
+    '''
+    ## bench_ipc
+    ##### measures how long a command takes from a later launch handing it over until the running player has it, and a whole launch which forwards one
+    '''
+    import subprocess, threading
+    from ipc import Instance_Server, forward
+    app = QCoreApplication.instance()
+    name = f'PulsePlay-bench-{os.getpid()}'
+    server = Instance_Server(name=name)
+    server.listen()
+    times, sent = [], []
+    def on_received(request: dict):
+        times.append(perf_counter() - sent[-1])
+        if len(times) == requests + 1: app.quit()
+    server.received.connect(on_received)
+    def client():
+        for _ in range(requests):
+            sent.append(perf_counter())
+            forward({'commands': ['next'], 'files': []}, name)
+            while len(times) < len(sent): sleep(0.001)
+        # a launch of its own, with the interpreter and Qt to start like a launch of the player which forwards
+        sent.append(perf_counter())
+        subprocess.run([sys.executable, '-c', f'from ipc import forward; forward({{"commands": ["next"], "files": []}}, {name!r})'], check=True)
+    threading.Thread(target=client, daemon=True).start()
+    app.exec()
+    launch = times.pop()
+    times.sort()
+    return {'handed over, median': times[len(times) // 2] * 1000, 'handed over, slowest': times[-1] * 1000, 'whole forwarding launch': launch * 1000}
+
+
+def bench_spectrum(seconds: float, rate: int = 44100, chunk_ms: int = 20) -> dict[str, float]:
+    '''
+    ## bench_spectrum
+    ##### feeds the spectrum analyzer audio at playback speed and measures the CPU it uses with the window shown and hidden, and one batched FFT
+    '''
+    import numpy as np
+    from spectrum import MAX_WINDOWS, FFT_SIZE, Band_Reducer, Spectrum_Analyzer, Spectrum_View
+    results = {}
+    t = np.arange(rate * chunk_ms // 1000) / rate
+    chunk = np.stack((np.sin(2 * np.pi * 440 * t), np.sin(2 * np.pi * 3000 * t)), axis=1).astype(np.float32) * 0.5
+
+    reducer = Band_Reducer()
+    frames = np.tile(chunk, (MAX_WINDOWS * FFT_SIZE // len(chunk) + 1, 1))
+    reducer.levels(frames, rate)
+    start = perf_counter()
+    for _ in range(100): reducer.levels(frames, rate)
+    results[f'batched FFT, {MAX_WINDOWS} windows (ms)'] = (perf_counter() - start) * 10
+
+    win = QWidget()
+    win.resize(400, 200)
+    view = Spectrum_View(((255, 255, 255, 255), (40, 40, 40, 255)), win)
+    view.setGeometry(0, 0, 350, 130)
+    feed = QTimer()
+    feed.setInterval(chunk_ms)
+    feed.setTimerType(Qt.TimerType.PreciseTimer)
+    for name, hidden in (('shown', False), ('hidden to the tray', True)):
+        win.setVisible(not hidden)
+        analyzer = Spectrum_Analyzer(None, win)
+        analyzer.levels_ready.connect(view.set_levels)
+        feed.timeout.connect(lambda analyzer=analyzer: analyzer.add(chunk, rate))
+        feed.start()
+        results[f'{name} (s/min)'] = run_for(seconds)
+        feed.stop()
+        feed.timeout.disconnect()
+        analyzer.stop()
+    return results
+
+
+def bench_duplicates(count: int = 2000, copies: int = 100, audio_kb: int = 512) -> dict[str, float]:
+    '''
+    ## bench_duplicates
+    ##### fills a songs folder with songs of made up audio, some of them copied under another name with other tags, and measures finding the copies
+    the first time, when only the candidates are hashed, against hashing every song, and on a later start, when the digests come from the index
+    '''
+    from duplicates import Duplicate_Finder, audio_digest
+    def tag(title: str) -> bytes:
+        data = b'\x00' + title.encode('latin-1')
+        frame = b'TIT2' + len(data).to_bytes(4, 'big') + b'\x00\x00' + data
+        return b'ID3\x03\x00\x00' + len(frame).to_bytes(4, 'big') + frame
+    results = {}
+    folder = tempfile.mkdtemp(prefix='bench_duplicates_')
+    try:
+        songs = os.path.join(folder, 'songs')
+        os.makedirs(songs)
+        rng = random.Random(1)
+        audios = []
+        for i in range(count):
+            audio = audios[rng.randrange(len(audios))] if i >= count - copies else rng.randbytes(audio_kb * 1024 + rng.randrange(1 << 16))
+            audios.append(audio)
+            with open(os.path.join(songs, f'{i:06}.mp3'), 'wb') as f: f.write(tag(f'Song {i}') + audio)
+        index_file = os.path.join(folder, 'library.idx')
+        index = Library_Index(songs, os.path.join(folder, 'thumbnails'), index_file)
+        index.scan()
+
+        start = perf_counter()
+        for row in index.rows.values(): audio_digest(os.path.join(songs, row[0]), row[8])
+        results['hashing every song'] = (perf_counter() - start) * 1000
+
+        app = QCoreApplication.instance()
+        found = {}
+        for name in ('first start, candidates hashed', 'later start, digests cached'):
+            index = Library_Index(songs, os.path.join(folder, 'thumbnails'), index_file)
+            finder = Duplicate_Finder(index)
+            finder.found.connect(lambda duplicates: (found.update(duplicates=duplicates), app.quit()))
+            start = perf_counter()
+            QTimer.singleShot(0, finder.start)
+            app.exec()
+            results[name] = (perf_counter() - start) * 1000
+            finder.stop()
+        results['candidates hashed'] = str(len(finder.candidates))
+        results['duplicates found'] = str(len(found['duplicates']))
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+    return results
+
+
+def bench_durations(count: int = 2000, frames: int = 2000, songs: int = 100000) -> dict[str, float]:
+    '''
+    ## bench_durations
+    ##### measures the durations of a folder of made up songs from their frame headers, the first time and on a later start,
+    and how long finding the remaining time of a large play order takes on a song change
+    '''
+    from durations import Duration_Scanner, mp3_duration
+    results = {}
+    expected = frames * 1152 * 1000 // 44100
+    kinds = {'constant bitrate': mp3_frames(frames),
+             'Xing header': mp3_frames(frames, True, bytes(32) + b'Xing' + (1).to_bytes(4, 'big') + frames.to_bytes(4, 'big')),
+             'VBRI header': mp3_frames(frames, True, bytes(32) + b'VBRI' + bytes(10) + frames.to_bytes(4, 'big')),
+             'variable bitrate, no header': mp3_frames(frames, True)}
+    folder = tempfile.mkdtemp(prefix='bench_durations_')
+    try:
+        songs_dir = os.path.join(folder, 'songs')
+        os.makedirs(songs_dir)
+        for name, data in kinds.items():
+            path = os.path.join(folder, 'one.mp3')
+            with open(path, 'wb') as f: f.write(b'ID3\x03\x00\x00\x00\x00\x00\x00' + data)
+            start = perf_counter()
+            duration = mp3_duration(path, 10)
+            results[f'{name} (ms)'] = (perf_counter() - start) * 1000
+            results[f'{name}, error (ms)'] = float(duration - expected)
+        for i in range(count):
+            with open(os.path.join(songs_dir, f'{i:06}.mp3'), 'wb') as f: f.write(list(kinds.values())[i % len(kinds)])
+        index_file = os.path.join(folder, 'library.idx')
+        Library_Index(songs_dir, os.path.join(folder, 'thumbnails'), index_file).scan()
+
+        app = QCoreApplication.instance()
+        for name in (f'{count} songs, first start (ms)', f'{count} songs, later start (ms)'):
+            index = Library_Index(songs_dir, os.path.join(folder, 'thumbnails'), index_file)
+            scanner = Duration_Scanner(index)
+            # measured only reports songs which were built, none are here, so the scanner is done once no plan or batch is left
+            for signal in (scanner.planned, scanner.batch_done): signal.connect(lambda _: not scanner.futures and app.quit())
+            start = perf_counter()
+            scanner.start()
+            app.exec()
+            results[name] = (perf_counter() - start) * 1000
+            scanner.stop()
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    queue = Play_Queue([Song(f'{i:06}', duration=180000 + i % 60000, img=False) for i in range(songs)])
+    start = perf_counter()
+    queue.remaining_ms()
+    results[f'{songs} songs, queue time first (ms)'] = (perf_counter() - start) * 1000
+    start = perf_counter()
+    for _ in range(100):
+        queue.next()
+        queue.remaining_ms()
+    results[f'{songs} songs, queue time per song change (ms)'] = (perf_counter() - start) * 10
+    return results
+
+
+def write_tone(path: str, seconds: float, hz: float, rate: int = 44100):
+    '''
+    ## write_tone
+    ##### writes a 16 bit mono WAV file holding a sine
+    '''
+    import wave
+    import numpy as np
+    t = np.arange(int(seconds * rate)) / rate
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes((np.sin(2 * np.pi * hz * t) * 12000).astype('<i2').tobytes())
+
+
+def bench_crossfade(fade_ms: int = 3000, seconds: float = 6) -> dict[str, float]:
+    '''
+    ## bench_crossfade
+    ##### plays two songs through the real engine with a crossfade, and measures how close to its end the fade starts, how often the ramp wakes the GUI thread and the CPU of the fade
+    '''
+    from playback import Preload_Engine
+    folder = tempfile.mkdtemp()
+    try:
+        songs = []
+        for i, hz in enumerate((440, 660)):
+            path = os.path.join(folder, f'tone{i}.wav')
+            write_tone(path, seconds, hz)
+            songs.append(Song(f'tone{i}.wav', path=path, title=f'Tone {i}', img=False))
+        engine = Preload_Engine()
+        engine.set_crossfade(fade_ms)
+        core = Playback_Core(engine, Play_Queue(songs))
+        steps, marks = [0], {}
+        engine.fade_timer.timeout.connect(lambda: steps.__setitem__(0, steps[0] + 1))
+        engine.ending.connect(lambda: marks.setdefault('ending', (engine.duration() - engine.position(), perf_counter())))
+        core.start()
+        core.play()
+        cpu = run_for(seconds + 1)
+        results = {}
+        if 'ending' in marks:
+            results['remaining when the fade starts (ms)'] = float(marks['ending'][0])
+            results['ramp steps per second'] = steps[0] / (fade_ms / 1000)
+        results['whole run (CPU s/min)'] = cpu
+        engine.pause()
+        return results
+    finally: shutil.rmtree(folder, ignore_errors=True)
+
+
+def bench_deferred(count: int = 100000) -> dict[str, float]:
+    '''
+    ## bench_deferred
+    ##### runs what the home page starts after the first frame on a later start of a large library: the loudness check, the search index, the rescan,
+    ##### the duplicates and the durations. Measures how long the GUI thread spends starting them, the longest stall of the event loop until all of them are done, and how long that takes.
+    The peak cache and the spectrum are left out, they need QtMultimedia and only look at the current song.
+    '''
+    from concurrent.futures import ThreadPoolExecutor
+    from duplicates import Duplicate_Finder
+    from durations import Duration_Scanner
+    from loudness import Loudness_Analyzer
+    from search import Search_Index
+    from watcher import Library_Watcher
+    app = QCoreApplication.instance()
+    results = {}
+    folder = tempfile.mkdtemp(prefix='bench_deferred_')
+    try:
+        songs_dir, thumbs_dir = os.path.join(folder, 'songs'), os.path.join(folder, 'thumbnails')
+        for path in (songs_dir, thumbs_dir): os.makedirs(path)
+        write_library(songs_dir, count)
+        index_file = os.path.join(folder, 'library.idx')
+        Library_Index(songs_dir, thumbs_dir, index_file).scan()
+        # every song was analyzed in an earlier session
+        analyzer = Loudness_Analyzer(path=os.path.join(folder, 'loudness.idx'))
+        for file in os.listdir(songs_dir):
+            stat = os.stat(os.path.join(songs_dir, file))
+            analyzer.results[os.path.join(songs_dir, file)] = (stat.st_mtime_ns, stat.st_size, -20.0, 0.5)
+        analyzer.save()
+
+        for name in ('first start', 'later start'):
+            index = Library_Index(songs_dir, thumbs_dir, index_file)
+            queue = Play_Queue(index.sorted_songs())
+            analyzer = Loudness_Analyzer(path=os.path.join(folder, 'loudness.idx'))
+            checked = []
+            analyzer.checked.connect(lambda: checked.append(True))
+            pool = ThreadPoolExecutor(1)
+            watcher = Library_Watcher(index)
+            finder = Duplicate_Finder(index)
+            scanner = Duration_Scanner(index)
+
+            start = perf_counter()
+            analyzer.start(queue.songs)
+            files = list(index.rows)
+            search = pool.submit(lambda: Search_Index(index.build_songs(files)))
+            watcher.scan()
+            finder.start()
+            scanner.start()
+            results[f'{name}: GUI thread starting'] = (perf_counter() - start) * 1000
+
+            stalls, last = [], [perf_counter()]
+            def tick():
+                now = perf_counter()
+                stalls.append(now - last[0])
+                last[0] = now
+                if checked and search.done() and not (watcher.scanning or finder.futures or scanner.futures): app.quit()
+            timer = QTimer()
+            timer.timeout.connect(tick)
+            timer.start(1)
+            QTimer.singleShot(600000, app.quit)
+            app.exec()
+            timer.stop()
+            results[f'{name}: everything done'] = (perf_counter() - start) * 1000
+            results[f'{name}: longest event loop stall'] = max(stalls) * 1000
+            for stop in (analyzer.stop, watcher.stop, finder.stop, scanner.stop): stop()
+            pool.shutdown()
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+    return results
+
+
+def report(title: str, results: dict[str, float], unit: str):
+    print(title)
+    for name, value in results.items():
+        print(f'  {name:<38}{value:10.3f} {unit}' if isinstance(value, float) else f'  {name:<38}{value}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Headless benchmarks of the music player')
+    parser.add_argument('--seconds', type=float, default=10, help='how long each timed variant runs')
+    parser.add_argument('--sizes', type=int, nargs='+', default=LIBRARY_SIZES, help='the library sizes to load and shuffle')
+    parser.add_argument('--only', nargs='+', help='only run the benchmarks with these names')
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    benchmarks = {
+        'library': lambda: report('Library load (ms)', bench_library(args.sizes), 'ms'),
+        'shuffle': lambda: report('Shuffle toggle (ms)', bench_shuffle(args.sizes), 'ms'),
+        'track_change': lambda: report(f'Track change, skip to ready ({LOAD_MS} ms load)', bench_track_change(), 'ms'),
+        'core_cpu': lambda: report('Playback core (CPU seconds per minute of playback)', bench_core_cpu(args.seconds), 's/min'),
+        'position': lambda: report('Position updates (CPU seconds per minute of playback)', bench_position_timer(args.seconds), 's/min'),
+        'gallery': lambda: report('Preset gallery (ms)', bench_preset_gallery(), 'ms'),
+        'background': lambda: report('Home page repaint (ms per frame)', bench_background(), 'ms'),
+        'watcher': lambda: report('Library watcher, 5000 songs copied in bursts (ms)', bench_watcher(), 'ms'),
+        'playlist': lambda: report('Playlist, 50k entries (ms)', bench_playlist(), 'ms'),
+        'loudness': lambda: report('Loudness analysis (3 minute songs per second)', bench_loudness(), 'songs/s'),
+        'waveform': lambda: report('Seek bar position update (ms per frame)', bench_waveform(), 'ms'),
+        'settings': lambda: report('Session state writes', bench_settings(args.seconds), 'ms'),
+        'spectrum': lambda: report('Spectrum (CPU seconds per minute of playback, feeding included)', bench_spectrum(args.seconds), ''),
+        'crossfade': lambda: report('Crossfade through the real players', bench_crossfade(), ''),
+        'duplicates': lambda: report('Duplicate songs, 2000 songs of 0.5 MB (ms)', bench_duplicates(), 'ms'),
+        'durations': lambda: report('Song durations from the frame headers', bench_durations(), 'ms'),
+        'deferred': lambda: report('Deferred start of the home page, 100k songs (ms)', bench_deferred(), 'ms'),
+        'ipc': lambda: report('Single instance commands (ms)', bench_ipc(), 'ms'),
+        'metrics': lambda: report('Metrics overhead (microseconds per call)', bench_metrics(), 'us'),
+        'search': lambda: report('Library search (ms)', bench_search(), 'ms'),
+        'volume': lambda: report(f'Volume slider drag ({DRAG_MOVES} moves, {SESSION_SCAN_MS} ms per backend call)', bench_volume(), ''),
+    }
+    for name, run in benchmarks.items():
+        if not args.only or name in args.only: run()
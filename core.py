@@ -0,0 +1,1338 @@
+from __future__ import annotations
+import importlib.util, json, math, os, random, sys
+from collections import deque
+from time import perf_counter
+from typing import Iterator
+from PySide6.QtCore import QEvent, QObject, QTimer, Signal
+from library import Song, Song_List
+
+
+VISIBLE_HZ = 30
+HIDDEN_HZ = 1
+
+
+def atomic_write(path: str, data: bytes | str):
+    '''
+    ## atomic_write
+    ##### writes a file to a temporary file next to it, flushes it to the disk and renames it over the old one, so a crash leaves the old file or the new one, never half of one
+    ---
+    ## Parameters
+    - path [str]: the path of the file, its folder is made if needed
+    - data [bytes | str]: what the file holds, text is written as UTF-8 as it is, without translating newlines
+
+    An OSError is raised as it is, after the temporary file was removed, the old file is left as it was.
+    '''
+    if os.path.dirname(path): os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.tmp'
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(data.encode('utf-8') if isinstance(data, str) else data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except OSError:
+        try: os.remove(tmp)
+        except OSError: pass
+        raise
+
+
+def format_time(ms: int) -> str:
+    '''
+    ## format_time
+    ##### formats a playback position as mm:ss
+    ---
+    ## Parameters
+    - ms [int]: the position in milliseconds
+    '''
+    m, s = divmod(round(ms/1000), 60)
+    return f'{m:02}:{s:02}'
+
+
+def format_length(ms: int) -> str:
+    '''
+    ## format_length
+    ##### formats a length as h:mm:ss, or m:ss when it is shorter than an hour
+    ---
+    ## Parameters
+    - ms [int]: the length in milliseconds
+    '''
+    m, s = divmod(round(ms/1000), 60)
+    h, m = divmod(m, 60)
+    return f'{h}:{m:02}:{s:02}' if h else f'{m}:{s:02}'
+
+
+class Position_Throttle(QObject):
+    '''
+    # Position_Throttle
+    #### Coalesces the positionChanged signal of the player into at most one update per frame.
+    The rate drops to hidden_hz while the watched window is hidden or minimized, 0 turns the updates off.
+    ---
+    ## Parameters
+    - parent [QObject]: The QObject which owns the throttle
+    - window [QObject]: The window whose visibility decides the rate, None to always use visible_hz
+    - visible_hz [float]: The maximum updates per second while the window is shown
+    - hidden_hz [float]: The maximum updates per second while the window is hidden
+    '''
+    updated = Signal(int)
+
+    def __init__(self, parent: QObject = None, window: QObject = None, visible_hz: float = VISIBLE_HZ, hidden_hz: float = HIDDEN_HZ) -> None:
+        super().__init__(parent)
+        self.window = window
+        self.visible_hz = visible_hz
+        self.hidden_hz = hidden_hz
+        self.active = False
+
+        self.position = 0
+        self.last_emit = 0.0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+
+        if window is not None: window.installEventFilter(self)
+        self.interval = self.current_interval()
+
+    def current_interval(self) -> float | None:
+        '''
+        current_interval
+        ---
+        returns the minimum seconds between two updates for the window's current state, None if updates are off
+        '''
+        hz = self.visible_hz
+        if self.window is not None and (not self.window.isVisible() or self.window.isMinimized()): hz = self.hidden_hz
+        return 1/hz if hz > 0 else None
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        '''
+        eventFilter
+        ---
+        recomputes the rate whenever the window is shown, hidden, minimized or restored
+        '''
+        if event.type() in (QEvent.Type.Show, QEvent.Type.Hide, QEvent.Type.WindowStateChange):
+            self.interval = self.current_interval()
+            # a restored window should show the right position right away instead of after the slow interval
+            if self.active and self.interval is not None and event.type() != QEvent.Type.Hide: self.flush()
+        return False
+
+    def start(self):
+        '''
+        start
+        ---
+        starts passing positions through
+        '''
+        self.active = True
+
+    def stop(self):
+        '''
+        stop
+        ---
+        stops passing positions through, and drops the pending one
+        '''
+        self.active = False
+        self.timer.stop()
+
+    def set_position(self, position: int):
+        '''
+        ## set_position
+        ##### records the latest position and emits it now, or once the current frame is over
+        ---
+        ## Parameters
+        - position [int]: the playback position in milliseconds
+        '''
+        metrics.tick('position notify')
+        self.position = position
+        if not self.active or self.interval is None or self.timer.isActive(): return
+        wait = self.last_emit + self.interval - perf_counter()
+        if wait <= 0: self.flush()
+        else: self.timer.start(int(wait * 1000) + 1)
+
+    def flush(self):
+        '''
+        flush
+        ---
+        emits the latest position
+        '''
+        self.timer.stop()
+        self.last_emit = perf_counter()
+        start = metrics.start()
+        self.updated.emit(self.position)
+        metrics.stop('position update', start)
+
+
+HISTORY_SIZE = 500
+
+
+class Queue_Entry:
+    '''
+    # Queue_Entry
+    #### One song which was queued by hand, linked to its neighbours so that it can be removed or moved in O(1)
+    ---
+    ## Parameters
+    - song [Song]: The queued song
+    '''
+    __slots__ = ('song', 'prev', 'next')
+
+    def __init__(self, song: Song) -> None:
+        self.song = song
+        self.prev: Queue_Entry = None
+        self.next: Queue_Entry = None
+
+    def __repr__(self): return f'Queue_Entry({self.song!r})'
+
+
+class Play_Queue:
+    '''
+    # Play_Queue
+    #### Decides which song plays next. The library order is kept once; shuffle is a lazily drawn Fisher-Yates permutation of its indices,
+    #### so toggling it is O(1) whatever the size of the library. Songs queued by hand play before the library order, and a history makes previous go back to what actually played.
+    ---
+    ## Parameters
+    - songs [list[Song] | Song_List]: The songs of the library in their canonical order, a Song_List is kept as it is so its songs are only built when they are needed
+    - rng [random.Random]: The random generator used to shuffle
+    '''
+    def __init__(self, songs: list[Song] | Song_List, rng: random.Random = None) -> None:
+        self.songs: list[Song] | Song_List = songs if isinstance(songs, Song_List) else list(songs)
+        self.index_of: dict[Song, int] = self.index_songs()
+        self.rng = rng or random.Random()
+
+        self.shuffled = False
+        # position -> library index, only for the positions which were swapped while drawing the permutation
+        self.perm: dict[int, int] = {}
+        # library index -> position, the inverse of perm, so a song can be found in the shuffled order without walking it
+        self.inverse: dict[int, int] = {}
+        self.drawn = 0
+
+        # library indices which are not played, like songs removed from the queue
+        self.removed: set[int] = set()
+        # duplicate -> the song kept in its place, the play order passes over a duplicate while skip_duplicates is on and its song is in the order too
+        self.duplicates: dict[Song, Song] = {}
+        self.skip_duplicates = False
+        # the length of the songs of the play order, and of its positions up to prefix[0], cached for remaining_ms
+        self.total_ms: int = None
+        self.prefix: tuple[int, int] = (-1, 0)
+
+        self.pos = 0
+        self.from_order = True
+        self.current: Song | None = self.songs[0] if self.songs else None
+        self.history: deque[tuple[Song, int | None]] = deque(maxlen=HISTORY_SIZE)
+        # songs which were gone back from with previous, next walks forward through them again
+        self.future: list[tuple[Song, int | None]] = []
+
+        self.head: Queue_Entry = None
+        self.tail: Queue_Entry = None
+        self.queued = 0
+
+    def __len__(self): return len(self.songs) - len(self.removed) + self.queued
+
+    def set_songs(self, songs: list[Song]):
+        '''
+        ## set_songs
+        ##### replaces the songs of the play order, like when a playlist is opened. The first song becomes the current one, songs queued by hand are kept.
+        ---
+        ## Parameters
+        - songs [list[Song] | Song_List]: the new songs in their canonical order
+        '''
+        if self.current is not None: self.history.append((self.current, None))
+        self.songs = songs if isinstance(songs, Song_List) else list(songs)
+        self.index_of = self.index_songs()
+        self.perm, self.inverse, self.drawn, self.removed = {}, {}, 0, set()
+        self.lengths_changed()
+        self.history = deque(((song, None) for song, _ in self.history), maxlen=HISTORY_SIZE)
+        self.future.clear()
+        self.pos, self.from_order = 0, True
+        self.current = self.songs[0] if self.songs else None
+        if self.shuffled and self.songs: self.set_shuffle(True)
+
+    def index_songs(self) -> dict[Song, int]:
+        '''
+        index_songs
+        ---
+        maps the songs to their library index. A Song_List finds its songs by file name instead, so they aren't all built for it.
+        '''
+        if isinstance(self.songs, Song_List): return self.songs.positions
+        return {song: index for index, song in enumerate(self.songs)}
+
+    def extend(self, songs: list[Song]):
+        '''
+        ## extend
+        ##### adds songs to the end of the play order. A shuffled order keeps what it drew, the new songs join the ones not drawn yet.
+        ---
+        ## Parameters
+        - songs [list[Song]]: the songs to add
+        '''
+        start = len(self.songs)
+        self.songs.extend(songs)
+        for index, song in enumerate(songs, start): self.index_of.setdefault(song, index)
+        self.lengths_changed()
+        if self.current is None and self.songs:
+            self.pos, self.from_order = 0, True
+            self.current = self.songs[self.order_at(0)]
+
+    def order_at(self, pos: int) -> int:
+        '''
+        ## order_at
+        ##### returns the library index at a position of the play order, drawing the shuffled order up to that position if needed
+        ---
+        ## Parameters
+        - pos [int]: the position in the play order
+        '''
+        if not self.shuffled: return pos
+        n = len(self.songs)
+        while self.drawn <= pos:
+            k = self.drawn
+            self.swap(k, self.rng.randrange(k, n))
+            self.drawn += 1
+        return self.perm.get(pos, pos)
+
+    def swap(self, a: int, b: int):
+        '''
+        ## swap
+        ##### swaps two positions of the shuffled order
+        ---
+        ## Parameters
+        - a [int]: a position
+        - b [int]: another position
+        '''
+        index_a, index_b = self.perm.get(a, a), self.perm.get(b, b)
+        self.perm[a], self.perm[b] = index_b, index_a
+        self.inverse[index_b], self.inverse[index_a] = a, b
+
+    def set_shuffle(self, shuffled: bool):
+        '''
+        ## set_shuffle
+        ##### turns shuffle on or off without moving the current song. Shuffling starts a new permutation with the current song first.
+        ---
+        ## Parameters
+        - shuffled [bool]: whether the songs should be shuffled
+        '''
+        if not self.songs:
+            # an empty play order remembers the mode for the songs it gets later
+            self.shuffled = shuffled
+            return
+        index = self.index_of.get(self.current)
+        if index is None: index = self.order_at(self.pos)
+        self.shuffled = shuffled
+        self.perm, self.inverse = {}, {}
+        self.drawn = 0
+        self.prefix = (-1, 0)
+        # positions in the old order mean nothing in the new one
+        self.history = deque(((song, None) for song, _ in self.history), maxlen=HISTORY_SIZE)
+        self.future = [(song, None) for song, _ in self.future]
+        if shuffled:
+            self.swap(0, index)
+            self.drawn = 1
+            self.pos = 0
+        else:
+            self.pos = index
+
+    def step(self, pos: int, direction: int, commit: bool) -> int | None:
+        '''
+        ## step
+        ##### returns the next position in the play order in a direction, skipping removed songs
+        ---
+        ## Parameters
+        - pos [int]: the position to step from
+        - direction [int]: 1 to go forward, -1 to go back
+        - commit [bool]: whether a shuffled round which runs out may be redrawn, peeking never redraws
+
+        ## Returns
+        - the position, or None if there is none without redrawing the shuffle
+        '''
+        n = len(self.songs)
+        for _ in range(n):
+            pos += direction
+            if pos >= n:
+                if not self.shuffled: pos = 0
+                elif not commit: return None
+                else:
+                    self.perm, self.inverse, self.drawn, pos = {}, {}, 0, 0
+            elif pos < 0:
+                if self.shuffled: return None
+                pos = n - 1
+            index = self.order_at(pos)
+            if index not in self.removed and not self.skips(self.songs[index]): return pos
+        return None
+
+    def skips(self, song: Song) -> bool:
+        '''
+        ## skips
+        ##### returns whether the play order passes over a song as a duplicate
+        ---
+        ## Parameters
+        - song [Song]: the song
+        '''
+        return self.skip_duplicates and self.duplicates.get(song) in self.index_of
+
+    def set_duplicates(self, duplicates: dict[Song, Song], skip: bool = None):
+        '''
+        ## set_duplicates
+        ##### sets which songs are duplicates, and whether they are skipped. Songs played or queued by hand are never skipped.
+        ---
+        ## Parameters
+        - duplicates [dict[Song, Song]]: every duplicate and the song kept in its place
+        - skip [bool]: whether duplicates are skipped, None keeps the mode
+        '''
+        self.duplicates = duplicates
+        if skip is not None: self.skip_duplicates = skip
+        self.lengths_changed()
+
+    def lengths_changed(self):
+        '''
+        lengths_changed
+        ---
+        forgets the cached length of the play order, after songs were added, removed or skipped or their durations became known
+        '''
+        self.total_ms = None
+        self.prefix = (-1, 0)
+
+    def length_at(self, index: int) -> int:
+        '''
+        ## length_at
+        ##### returns the duration of a song of the library, 0 if the play order doesn't play it
+        ---
+        ## Parameters
+        - index [int]: the library index of the song
+        '''
+        song = self.songs[index]
+        return 0 if index in self.removed or self.skips(song) else song.duration
+
+    def remaining_ms(self) -> int:
+        '''
+        remaining_ms
+        ---
+        returns how long the songs after the current one play: the songs queued by hand and the rest of the play order, up to the end of the list or of the shuffled round.
+        The length of the whole order is cached and so is what was played of it, so playing on only adds the songs since the last call.
+        '''
+        queued = sum(entry.song.duration for entry in self.up_next())
+        n = len(self.songs)
+        if not n: return queued
+        if self.total_ms is None: self.total_ms = sum(map(self.length_at, range(n)))
+        pos = min(self.pos, n - 1)
+        done, played = self.prefix
+        if pos < done: done, played = -1, 0
+        for p in range(done + 1, pos + 1): played += self.length_at(self.order_at(p))
+        self.prefix = (pos, played)
+        return max(self.total_ms - played, 0) + queued
+
+    def next(self) -> Song | None:
+        '''
+        ## next
+        ##### moves to the song which plays next, a song queued by hand if there is one, else the next song of the play order
+        '''
+        if self.current is not None: self.history.append((self.current, self.pos if self.from_order else None))
+        if self.future:
+            self.restore(*self.future.pop())
+            return self.current
+        if self.head is not None:
+            entry = self.head
+            self.remove(entry)
+            self.current, self.from_order = entry.song, False
+            return self.current
+
+        pos = self.step(self.pos, 1, True)
+        if pos is None: self.current = None
+        else: self.pos, self.current, self.from_order = pos, self.songs[self.order_at(pos)], True
+        return self.current
+
+    def previous(self) -> Song | None:
+        '''
+        ## previous
+        ##### moves back to the song which played before the current one, or to the previous song of the play order if there is no history
+        '''
+        if self.history:
+            if self.current is not None: self.future.append((self.current, self.pos if self.from_order else None))
+            self.restore(*self.history.pop())
+            return self.current
+
+        pos = self.step(self.pos, -1, True)
+        if pos is not None: self.pos, self.current, self.from_order = pos, self.songs[self.order_at(pos)], True
+        return self.current
+
+    def jump_to(self, song: Song) -> Song:
+        '''
+        ## jump_to
+        ##### makes a song the current one, like when it is picked from the search. The play order goes on from it.
+        A shuffled song which didn't play yet this round is swapped in right after the current position, one which already played plays like a song queued by hand.
+        ---
+        ## Parameters
+        - song [Song]: the song
+        '''
+        if self.current is not None: self.history.append((self.current, self.pos if self.from_order else None))
+        self.future.clear()
+        index = self.index_of.get(song)
+        if index is None:
+            self.current, self.from_order = song, False
+            return song
+        if index in self.removed:
+            self.removed.discard(index)
+            self.lengths_changed()
+        if not self.shuffled: pos = index
+        else:
+            pos = self.inverse.get(index, index)
+            if pos <= self.pos:
+                self.current, self.from_order = song, False
+                return song
+            if pos != self.pos + 1: self.swap(self.pos + 1, pos)
+            pos = self.pos + 1
+            self.drawn = max(self.drawn, pos + 1)
+        self.pos, self.current, self.from_order = pos, song, True
+        return song
+
+    def restore(self, song: Song, pos: int | None):
+        '''
+        ## restore
+        ##### makes a song from the history the current song again
+        ---
+        ## Parameters
+        - song [Song]: the song
+        - pos [int | None]: its position in the play order, None if it was queued by hand
+        '''
+        self.current, self.from_order = song, pos is not None
+        if pos is not None: self.pos = pos
+
+    def peek_next(self) -> Song | None:
+        '''
+        peek_next
+        ---
+        returns the song which next() would move to, without moving
+        '''
+        if self.future: return self.future[-1][0]
+        if self.head is not None: return self.head.song
+        pos = self.step(self.pos, 1, False)
+        return None if pos is None else self.songs[self.order_at(pos)]
+
+    def peek_previous(self) -> Song | None:
+        '''
+        peek_previous
+        ---
+        returns the song which previous() would move to, without moving
+        '''
+        if self.history: return self.history[-1][0]
+        pos = self.step(self.pos, -1, False)
+        return None if pos is None else self.songs[self.order_at(pos)]
+
+    def link(self, entry: Queue_Entry, after: Queue_Entry | None) -> Queue_Entry:
+        '''
+        ## link
+        ##### inserts an entry into the songs queued by hand
+        ---
+        ## Parameters
+        - entry [Queue_Entry]: the entry to insert
+        - after [Queue_Entry | None]: the entry it goes after, None to put it first
+        '''
+        entry.prev = after
+        entry.next = self.head if after is None else after.next
+        if entry.next is None: self.tail = entry
+        else: entry.next.prev = entry
+        if after is None: self.head = entry
+        else: after.next = entry
+        self.queued += 1
+        return entry
+
+    def play_next(self, song: Song) -> Queue_Entry:
+        '''
+        ## play_next
+        ##### queues a song so that it plays right after the current one
+        ---
+        ## Parameters
+        - song [Song]: the song to queue
+        '''
+        self.future.clear()
+        return self.link(Queue_Entry(song), None)
+
+    def enqueue(self, song: Song) -> Queue_Entry:
+        '''
+        ## enqueue
+        ##### queues a song after every other song queued by hand
+        ---
+        ## Parameters
+        - song [Song]: the song to queue
+        '''
+        return self.link(Queue_Entry(song), self.tail)
+
+    def remove(self, entry: Queue_Entry):
+        '''
+        ## remove
+        ##### removes a song queued by hand
+        ---
+        ## Parameters
+        - entry [Queue_Entry]: the entry returned when the song was queued
+        '''
+        if entry.prev is None: self.head = entry.next
+        else: entry.prev.next = entry.next
+        if entry.next is None: self.tail = entry.prev
+        else: entry.next.prev = entry.prev
+        entry.prev = entry.next = None
+        self.queued -= 1
+
+    def move(self, entry: Queue_Entry, after: Queue_Entry | None):
+        '''
+        ## move
+        ##### moves a song queued by hand to another place among them
+        ---
+        ## Parameters
+        - entry [Queue_Entry]: the entry to move
+        - after [Queue_Entry | None]: the entry it goes after, None to put it first
+        '''
+        if entry is after: return
+        self.remove(entry)
+        self.link(entry, after)
+
+    def up_next(self) -> Iterator[Queue_Entry]:
+        '''
+        up_next
+        ---
+        iterates over the songs queued by hand, in the order they will play
+        '''
+        entry = self.head
+        while entry is not None:
+            yield entry
+            entry = entry.next
+
+    def remove_song(self, song: Song):
+        '''
+        ## remove_song
+        ##### stops a song of the library from being played by the play order
+        ---
+        ## Parameters
+        - song [Song]: the song to remove
+        '''
+        index = self.index_of.get(song)
+        if index is not None:
+            self.removed.add(index)
+            self.lengths_changed()
+
+    def restore_song(self, song: Song):
+        '''
+        ## restore_song
+        ##### lets a removed song of the library be played by the play order again
+        ---
+        ## Parameters
+        - song [Song]: the song to restore
+        '''
+        index = self.index_of.get(song)
+        if index is not None:
+            self.removed.discard(index)
+            self.lengths_changed()
+
+
+VOLUME_INTERVAL_MS = 30
+# a level the backend couldn't take is tried again this many times after playback starts, waiting twice as long each time from VOLUME_RETRY_MS
+VOLUME_RETRIES = 4
+VOLUME_RETRY_MS = 250
+
+
+class Volume_Backend:
+    '''
+    # Volume_Backend
+    #### What the volume slider talks to. Subclasses set the volume of the app in their own way, fakes can be passed in to benchmark the slider headlessly.
+    '''
+    def set_volume(self, level: float) -> bool:
+        '''
+        ## set_volume
+        ##### sets the volume of the app
+        ---
+        ## Parameters
+        - level [float]: the volume between 0 and 1
+
+        ## Returns
+        - whether the volume was set, False if there is nothing to set it on yet
+        '''
+        raise NotImplementedError
+
+
+class Pycaw_Volume(Volume_Backend):
+    '''
+    # Pycaw_Volume
+    #### Sets the volume of this process' audio session in the Windows mixer. The session is looked up once and its ISimpleAudioVolume is kept.
+    '''
+    def __init__(self) -> None:
+        self.interface = None
+
+    def resolve(self):
+        '''
+        resolve
+        ---
+        finds the audio session of this process, None if it doesn't exist yet because nothing has played
+        '''
+        from pycaw.pycaw import AudioUtilities, ISimpleAudioVolume
+        for session in AudioUtilities.GetAllSessions():
+            if session.ProcessId == os.getpid(): return session._ctl.QueryInterface(ISimpleAudioVolume)
+        return None
+
+    def set_volume(self, level: float) -> bool:
+        '''
+        ## set_volume
+        ##### sets the volume of the session, looking it up again if the cached one stopped working
+        ---
+        ## Parameters
+        - level [float]: the volume between 0 and 1
+
+        ## Returns
+        - whether the volume was set, False until something has played and the session exists
+        '''
+        from comtypes import COMError
+        for _ in range(2):
+            if self.interface is None: self.interface = self.resolve()
+            if self.interface is None: return False
+            try:
+                self.interface.SetMasterVolume(level, None)
+                return True
+            # the session went away, e.g. the output device changed, so look it up again
+            except COMError: self.interface = None
+        return False
+
+
+class Qt_Volume(Volume_Backend):
+    '''
+    # Qt_Volume
+    #### Sets the volume on the QAudioOutputs of the engine, used where pycaw doesn't exist
+    ---
+    ## Parameters
+    - engine [Preload_Engine]: The engine which owns the audio outputs
+    '''
+    def __init__(self, engine) -> None:
+        self.engine = engine
+
+    def set_volume(self, level: float) -> bool:
+        '''
+        ## set_volume
+        ##### sets the volume of both audio outputs of the engine
+        ---
+        ## Parameters
+        - level [float]: the volume between 0 and 1
+        '''
+        self.engine.set_volume(level)
+        return True
+
+
+def make_volume_backend(engine) -> Volume_Backend:
+    '''
+    ## make_volume_backend
+    ##### picks the volume backend of the platform, pycaw on Windows if it is installed, else the Qt audio outputs
+    ---
+    ## Parameters
+    - engine [Preload_Engine]: The engine which owns the audio outputs
+    '''
+    # only checks that pycaw is installed, it is imported once the volume is first changed
+    if sys.platform == 'win32' and importlib.util.find_spec('pycaw') is not None: return Pycaw_Volume()
+    return Qt_Volume(engine)
+
+
+class Volume_Control(QObject):
+    '''
+    # Volume_Control
+    #### Coalesces the moves of the volume slider, so that the backend is called at most once per interval while dragging, and always with the last position
+    A level the backend can't set yet, like the one of the last session before pycaw has an audio session, is kept and tried again once playback starts,
+    up to VOLUME_RETRIES times with a growing wait, so a missing session is never polled for.
+    ---
+    ## Parameters
+    - backend [Volume_Backend]: The backend which sets the volume
+    - parent [QObject]: The QObject which owns the control
+    - interval [int]: The minimum milliseconds between two calls to the backend
+    '''
+    def __init__(self, backend: Volume_Backend, parent: QObject = None, interval: int = VOLUME_INTERVAL_MS) -> None:
+        super().__init__(parent)
+        self.backend = backend
+        self.level: float = None
+        # whether the level changed since the backend was last called
+        self.dirty = False
+        # whether the backend couldn't take the last level, and how often it was tried again since playback started
+        self.pending = False
+        self.retries = 0
+        self.playing = False
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.flush)
+        self.retry_timer = QTimer(self)
+        self.retry_timer.setSingleShot(True)
+        self.retry_timer.timeout.connect(lambda: self.pending and self.apply())
+
+    def set_level(self, position: int):
+        '''
+        ## set_level
+        ##### applies a slider position right away if the backend is idle, else once the interval is over
+        ---
+        ## Parameters
+        - position [int]: the slider position between 0 and 100
+        '''
+        self.level = position/100
+        self.dirty = True
+        if not self.timer.isActive(): self.flush()
+
+    def flush(self):
+        '''
+        flush
+        ---
+        passes the last level to the backend if it changed, and waits for the interval before the next call
+        '''
+        if not self.dirty: return
+        self.dirty = False
+        self.apply()
+        self.timer.start()
+
+    def apply(self):
+        '''
+        apply
+        ---
+        calls the backend with the last level. If it can't take it yet, it is tried again later while playing, until VOLUME_RETRIES are used up.
+        '''
+        self.pending = not self.backend.set_volume(self.level)
+        if not self.pending: self.retry_timer.stop()
+        elif self.playing and self.retries < VOLUME_RETRIES:
+            self.retry_timer.start(VOLUME_RETRY_MS << self.retries)
+            self.retries += 1
+
+    def set_playing(self, playing: bool):
+        '''
+        ## set_playing
+        ##### tries a level the backend couldn't take yet again once playback starts, pycaw's audio session only exists from then on
+        ---
+        ## Parameters
+        - playing [bool]: whether a song plays
+        '''
+        self.playing = playing
+        if playing and self.pending:
+            self.retries = 0
+            self.apply()
+
+
+class Rate_Counter:
+    '''
+    # Rate_Counter
+    #### Counts how often something happens per second, e.g. paint events. Ticking is O(1), the rate is recomputed once a second.
+    '''
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0
+        self.window_start = perf_counter()
+        self.rate = 0.0
+
+    def tick(self):
+        '''
+        tick
+        ---
+        records one event
+        '''
+        self.count += 1
+        self.total += 1
+        now = perf_counter()
+        if now - self.window_start >= 1:
+            self.rate = self.count / (now - self.window_start)
+            self.count, self.window_start = 0, now
+
+    def per_second(self) -> float:
+        '''
+        per_second
+        ---
+        returns the events per second over the last full second, 0 once nothing happened for a while
+        '''
+        return self.rate if perf_counter() - self.window_start < 2 else 0.0
+
+
+# latencies are bucketed by powers of 2**(1/4) from HISTOGRAM_MIN_MS up, so a percentile is off by at most 19%
+HISTOGRAM_MIN_MS = 0.01
+HISTOGRAM_BUCKETS = 100
+
+
+class Latency_Histogram:
+    '''
+    # Latency_Histogram
+    #### Keeps the distribution of a latency in logarithmic buckets, adding one is O(1) and its memory never grows
+    '''
+    def __init__(self) -> None:
+        self.counts = [0] * HISTOGRAM_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.low = math.inf
+        self.high = 0.0
+
+    def add(self, ms: float):
+        '''
+        ## add
+        ##### records one latency
+        ---
+        ## Parameters
+        - ms [float]: the latency in milliseconds
+        '''
+        bucket = 0 if ms <= HISTOGRAM_MIN_MS else min(int(4 * math.log2(ms / HISTOGRAM_MIN_MS)) + 1, HISTOGRAM_BUCKETS - 1)
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += ms
+        if ms < self.low: self.low = ms
+        if ms > self.high: self.high = ms
+
+    def percentile(self, q: float) -> float:
+        '''
+        ## percentile
+        ##### returns the latency which q percent of the recorded ones stay under, as the upper edge of its bucket
+        ---
+        ## Parameters
+        - q [float]: the percentile between 0 and 100
+        '''
+        if not self.count: return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count: return min(HISTOGRAM_MIN_MS * 2 ** (bucket / 4), self.high)
+        return self.high
+
+    def summary(self) -> dict[str, float]:
+        return {'count': self.count, 'mean': self.total / self.count if self.count else 0.0, 'min': self.low if self.count else 0.0,
+                'p50': self.percentile(50), 'p90': self.percentile(90), 'p99': self.percentile(99), 'max': self.high}
+
+
+class Metrics:
+    '''
+    # Metrics
+    #### Latency histograms and event rates of the hot paths: song changes, position updates, paints and thumbnail decoding
+    While disabled every call returns right away, so the instrumented code pays a function call and nothing else.
+    ---
+    ## Parameters
+    - enabled [bool]: whether anything is recorded
+    '''
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self.histograms: dict[str, Latency_Histogram] = {}
+        self.rates: dict[str, Rate_Counter] = {}
+        # the names of rates which are counted by their owner, see watch
+        self.watched: set[str] = set()
+        # spans which began in one event and end in another, like a click and the song it loads
+        self.spans: dict[str, float] = {}
+
+    def start(self) -> float | None:
+        '''
+        start
+        ---
+        returns the time a measured piece of code starts at, None while disabled
+        '''
+        return perf_counter() if self.enabled else None
+
+    def stop(self, name: str, start: float | None):
+        '''
+        ## stop
+        ##### records the time since start
+        ---
+        ## Parameters
+        - name [str]: the name of the measured code
+        - start [float | None]: what start returned
+        '''
+        if start is not None: self.record(name, (perf_counter() - start) * 1000)
+
+    def begin(self, name: str):
+        '''
+        ## begin
+        ##### starts a span which end records, a span which begins again before it ended starts over
+        ---
+        ## Parameters
+        - name [str]: the name of the span
+        '''
+        if self.enabled: self.spans[name] = perf_counter()
+
+    def end(self, name: str):
+        '''
+        ## end
+        ##### records the time since the span began, if it did
+        ---
+        ## Parameters
+        - name [str]: the name of the span
+        '''
+        if not self.enabled: return
+        start = self.spans.pop(name, None)
+        if start is not None: self.record(name, (perf_counter() - start) * 1000)
+
+    def record(self, name: str, ms: float):
+        '''
+        ## record
+        ##### records a latency, which also counts towards the rate of the name unless its owner counts that
+        ---
+        ## Parameters
+        - name [str]: the name of the measured code
+        - ms [float]: the latency in milliseconds
+        '''
+        if not self.enabled: return
+        histogram = self.histograms.get(name)
+        if histogram is None: histogram = self.histograms[name] = Latency_Histogram()
+        histogram.add(ms)
+        if name not in self.watched: self.tick(name)
+
+    def watch(self, name: str, rate: Rate_Counter):
+        '''
+        ## watch
+        ##### reports a rate which is counted elsewhere, like the paints of the home page, instead of counting the same events a second time
+        ---
+        ## Parameters
+        - name [str]: the name of the rate, latencies recorded under it don't tick it
+        - rate [Rate_Counter]: the counter its owner ticks
+        '''
+        self.rates[name] = rate
+        self.watched.add(name)
+
+    def tick(self, name: str):
+        '''
+        ## tick
+        ##### counts one event of a rate
+        ---
+        ## Parameters
+        - name [str]: the name of the event
+        '''
+        if not self.enabled: return
+        rate = self.rates.get(name)
+        if rate is None: rate = self.rates[name] = Rate_Counter()
+        rate.tick()
+
+    def snapshot(self) -> dict[str, dict]:
+        '''
+        snapshot
+        ---
+        returns the summary of every histogram and the rate and total of every event
+        '''
+        return {'latency_ms': {name: histogram.summary() for name, histogram in sorted(self.histograms.items())},
+                'rates': {name: {'per_second': rate.per_second(), 'total': rate.total} for name, rate in sorted(self.rates.items())}}
+
+    def report(self) -> str:
+        '''
+        report
+        ---
+        returns the snapshot as text, one line per histogram or rate
+        '''
+        snapshot = self.snapshot()
+        lines = ['latency (ms)              n     p50     p90     p99     max']
+        for name, s in snapshot['latency_ms'].items():
+            lines.append(f"{name:<22}{s['count']:>6}{s['p50']:8.2f}{s['p90']:8.2f}{s['p99']:8.2f}{s['max']:8.2f}")
+        lines.append('rate (per second)')
+        for name, r in snapshot['rates'].items(): lines.append(f"{name:<22}{r['per_second']:8.1f}")
+        return '\n'.join(lines)
+
+    def dump(self, path: str):
+        '''
+        ## dump
+        ##### writes the snapshot to a JSON file, to compare runs
+        ---
+        ## Parameters
+        - path [str]: the path of the file
+        '''
+        atomic_write(path, json.dumps(self.snapshot(), indent=1))
+
+
+# the metrics of this process, the player enables them with --metrics
+metrics = Metrics()
+
+
+SKIP_MS = 10000
+
+
+class Media_Backend(QObject):
+    '''
+    # Media_Backend
+    #### What Playback_Core plays songs through. Preload_Engine plays them with QMediaPlayer, fakes can stand in for it where there is no audio device.
+    ---
+    ## Signals
+    - loaded: the song given to set_song finished loading, when set_song returned False
+    - ended: the current song played until its end
+    - ending: the current song is as far from its end as the crossfade is long, backends without one never emit it
+    - positionChanged [int]: the playback position in milliseconds
+    - latency_measured [float]: milliseconds from the last song change until its position started moving
+    '''
+    loaded = Signal()
+    ended = Signal()
+    ending = Signal()
+    positionChanged = Signal(int)
+    latency_measured = Signal(float)
+
+    def set_song(self, song: Song, play: bool = True) -> bool:
+        '''
+        ## set_song
+        ##### changes the current song
+        ---
+        ## Parameters
+        - song [Song]: the song
+        - play [bool]: whether a preloaded song starts playing right away
+
+        ## Returns
+        - True if the song was preloaded and is ready, False if loaded will be emitted once it is
+        '''
+        raise NotImplementedError
+
+    def preload(self, song: Song | None):
+        '''
+        ## preload
+        ##### gets a song ready so that set_song can switch to it instantly, None does nothing
+        '''
+        raise NotImplementedError
+
+    def play(self): raise NotImplementedError
+    def pause(self): raise NotImplementedError
+    def is_playing(self) -> bool: raise NotImplementedError
+    def position(self) -> int: raise NotImplementedError
+    def duration(self) -> int: raise NotImplementedError
+    def set_position(self, position: int): raise NotImplementedError
+    def set_volume(self, level: float): raise NotImplementedError
+
+
+class Playback_Core(QObject):
+    '''
+    # Playback_Core
+    #### The playback state machine without any widgets: which song plays, what happens when it loads or ends, skipping, shuffle and the shown position.
+    #### The Controls only forward clicks to it and show what its signals say.
+    ---
+    ## Parameters
+    - backend [Media_Backend]: The backend which plays the songs
+    - queue [Play_Queue]: The queue which decides the order of the songs
+    - parent [QObject]: The QObject which owns the core
+    - window [QObject]: The window whose visibility decides how often the position is shown, None to always use the visible rate
+    '''
+    song_changed = Signal(object)
+    song_ready = Signal(int)
+    position_changed = Signal(int)
+    time_text_changed = Signal(str)
+    playing_changed = Signal(bool)
+    shuffle_changed = Signal(bool)
+
+    def __init__(self, backend: Media_Backend, queue: Play_Queue, parent: QObject = None, window: QObject = None) -> None:
+        super().__init__(parent)
+        self.backend = backend
+        self.queue = queue
+        self.current: Song = queue.current
+
+        self.autoplay = True
+        self.first = True
+        self.play_on_load = False
+        self.shown_second = 0
+
+        self.throttle = Position_Throttle(self, window)
+        self.throttle.updated.connect(self.on_position)
+        backend.positionChanged.connect(self.throttle.set_position)
+        backend.loaded.connect(self.on_loaded)
+        backend.ended.connect(self.on_ended)
+        backend.ending.connect(self.on_ending)
+
+    def start(self):
+        '''
+        start
+        ---
+        loads the current song of the queue without playing it
+        '''
+        if self.current is not None: self.change_song(False)
+
+    def play(self):
+        '''
+        play
+        ---
+        plays the current song
+        '''
+        self.backend.play()
+        self.throttle.start()
+        self.playing_changed.emit(True)
+
+    def pause(self):
+        '''
+        pause
+        ---
+        pauses the current song
+        '''
+        self.backend.pause()
+        self.playing_changed.emit(False)
+
+    def play_pause(self):
+        '''
+        play_pause
+        ---
+        plays the song if it is paused and pauses it if it is playing
+        '''
+        self.pause() if self.backend.is_playing() else self.play()
+
+    def stop(self):
+        '''
+        stop
+        ---
+        pauses the song and goes back to its start
+        '''
+        self.backend.pause()
+        self.backend.set_position(0)
+        self.on_position(0)
+        self.playing_changed.emit(False)
+
+    def set_position(self, position: int):
+        '''
+        ## set_position
+        ##### moves the playback position of the current song
+        ---
+        ## Parameters
+        - position [int]: the position in milliseconds
+        '''
+        self.backend.set_position(max(0, position))
+
+    def rewind(self): self.set_position(self.backend.position() - SKIP_MS)
+    def seek(self): self.set_position(self.backend.position() + SKIP_MS)
+
+    def next(self):
+        '''
+        next
+        ---
+        changes the current song to the next song of the queue and plays it
+        '''
+        if self.queue.next() is not None: self.change_song(True)
+
+    def previous(self):
+        '''
+        previous
+        ---
+        changes the current song to the previous song of the queue and plays it
+        '''
+        if self.queue.previous() is not None: self.change_song(True)
+
+    def jump_to(self, song: Song):
+        '''
+        ## jump_to
+        ##### plays a song right away, the queue goes on from it
+        ---
+        ## Parameters
+        - song [Song]: the song
+        '''
+        self.queue.jump_to(song)
+        self.change_song(True)
+
+    def toggle_shuffle(self):
+        '''
+        toggle_shuffle
+        ---
+        turns shuffle on or off, the current song keeps playing and only the songs after it change
+        '''
+        self.queue.set_shuffle(not self.queue.shuffled)
+        self.shuffle_changed.emit(self.queue.shuffled)
+        self.backend.preload(self.queue.peek_next())
+
+    def change_song(self, play: bool):
+        '''
+        ## change_song
+        ##### switches the backend to the current song of the queue. If it was preloaded it is ready right away, else the rest happens in on_loaded.
+        ---
+        ## Parameters
+        - play [bool]: whether the song should start playing once it is ready
+        '''
+        metrics.begin('song change to loaded')
+        self.throttle.stop()
+        self.current = self.queue.current
+        self.play_on_load = play
+        self.on_position(0)
+        self.song_changed.emit(self.current)
+
+        if self.backend.set_song(self.current, play):
+            metrics.end('song change to loaded')
+            if play:
+                self.throttle.start()
+                self.playing_changed.emit(True)
+            self.on_ready()
+
+    def on_loaded(self):
+        '''
+        on_loaded
+        ---
+        plays the song which just loaded if it should, and reports it as ready
+        '''
+        metrics.end('song change to loaded')
+        if self.play_on_load: self.play()
+        else: self.playing_changed.emit(False)
+        self.on_ready()
+
+    def on_ready(self):
+        '''
+        on_ready
+        ---
+        reports the duration of the new song and preloads the song after it
+        '''
+        self.song_ready.emit(self.backend.duration())
+        self.backend.preload(self.queue.peek_next())
+
+    def on_ended(self):
+        '''
+        on_ended
+        ---
+        moves on to the next song when the current one ends, playing it if autoplay is on
+        '''
+        if self.queue.next() is not None: self.change_song(self.autoplay)
+
+    def on_ending(self):
+        '''
+        on_ending
+        ---
+        starts the next song while the current one fades out, if autoplay is on. Without autoplay the song plays to its end and on_ended moves on.
+        '''
+        if self.autoplay and self.queue.next() is not None: self.change_song(True)
+
+    def on_position(self, position: int):
+        '''
+        ## on_position
+        ##### reports the playback position, at most once per frame, and the time text only when the shown second changes
+        ---
+        ## Parameters
+        - position [int]: the playback position in milliseconds
+        '''
+        self.position_changed.emit(position)
+        if self.first and 0 < position < 1000:
+            self.first = False
+            self.seek()
+            self.rewind()
+        if round(position/1000) != self.shown_second or position == 0:
+            self.shown_second = round(position/1000)
+            self.time_text_changed.emit(format_time(position))
+
+
+STARTUP_BUDGET_MS = 400
+
+
+class Startup_Profiler:
+    '''
+    # Startup_Profiler
+    #### Times the phases of startup, from the first import until the deferred work after the first frame is done
+    ---
+    ## Parameters
+    - start [float]: the perf_counter time startup began at, defaults to now
+    - enabled [bool]: whether the breakdown is printed once startup is done
+    - budget [float]: the milliseconds the first frame should be shown within
+    '''
+    def __init__(self, start: float = None, enabled: bool = False, budget: float = STARTUP_BUDGET_MS) -> None:
+        self.start = self.last = start if start is not None else perf_counter()
+        self.enabled = enabled
+        self.budget = budget
+        self.phases: list[tuple[str, float]] = []
+        self.first_frame: float = None
+
+    def mark(self, phase: str):
+        '''
+        ## mark
+        ##### ends a phase, its time is the time since the previous mark
+        ---
+        ## Parameters
+        - phase [str]: the name of the phase which just ended
+        '''
+        now = perf_counter()
+        self.phases.append((phase, (now - self.last) * 1000))
+        self.last = now
+
+    def mark_first_frame(self):
+        '''
+        mark_first_frame
+        ---
+        ends the phase which painted the first frame and remembers when it was shown
+        '''
+        if self.first_frame is not None: return
+        self.mark('first frame')
+        self.first_frame = (self.last - self.start) * 1000
+
+    def report(self) -> str:
+        '''
+        report
+        ---
+        returns the breakdown of the phases, and whether the first frame was shown within the budget
+        '''
+        lines = [f'  {phase:<28}{ms:9.1f} ms' for phase, ms in self.phases]
+        lines.append(f"  {'total':<28}{(self.last - self.start) * 1000:9.1f} ms")
+        if self.first_frame is not None:
+            verdict = 'within' if self.first_frame <= self.budget else 'OVER'
+            lines.append(f'  first frame at {self.first_frame:.1f} ms, {verdict} the {self.budget:.0f} ms budget')
+        return '\n'.join(['Startup'] + lines)
@@ -0,0 +1,64 @@
+from __future__ import annotations
+import os
+from typing import Callable
+import numpy as np
+from PySide6.QtCore import QCoreApplication, QEventLoop, QUrl
+from PySide6.QtMultimedia import QAudioBuffer, QAudioDecoder, QAudioFormat
+
+
+# sample format -> numpy type, the value of silence and the full scale
+SAMPLE_TYPES = {QAudioFormat.SampleFormat.UInt8: (np.uint8, 128, 128), QAudioFormat.SampleFormat.Int16: (np.int16, 0, 32768),
+                QAudioFormat.SampleFormat.Int32: (np.int32, 0, 2**31), QAudioFormat.SampleFormat.Float: (np.float32, 0, 1)}
+
+
+def buffer_frames(buffer: QAudioBuffer) -> np.ndarray:
+    '''
+    ## buffer_frames
+    ##### turns a decoded buffer into an array of frames, one column per channel, scaled to -1..1
+    ---
+    ## Parameters
+    - buffer [QAudioBuffer]: the decoded audio
+    '''
+    fmt = buffer.format()
+    channels = max(fmt.channelCount(), 1)
+    dtype, offset, scale = SAMPLE_TYPES.get(fmt.sampleFormat(), (None, 0, 1))
+    if dtype is None: return np.empty((0, channels), np.float32)
+    samples = np.frombuffer(buffer.constData(), dtype, buffer.sampleCount())
+    frames = (samples.astype(np.float32) - offset) / scale
+    return frames[:len(frames) // channels * channels].reshape(-1, channels)
+
+
+def decode_file(path: str, on_frames: Callable[[np.ndarray, int], None]) -> bool:
+    '''
+    ## decode_file
+    ##### decodes a song with QAudioDecoder in a local event loop, handing every buffer to on_frames as it arrives, so the whole song is never held in memory
+    Blocks until the song is decoded, so it is meant for worker threads and processes.
+    ---
+    ## Parameters
+    - path [str]: the path of the mp3 file
+    - on_frames [Callable[[np.ndarray, int], None]]: receives the frames of every buffer and their sample rate
+
+    ## Returns
+    - False if the song couldn't be decoded
+    '''
+    if QCoreApplication.instance() is None: QCoreApplication([])
+    failed = False
+    loop = QEventLoop()
+    decoder = QAudioDecoder()
+
+    def on_buffer():
+        buffer = decoder.read()
+        on_frames(buffer_frames(buffer), buffer.format().sampleRate())
+    def on_error(*_):
+        nonlocal failed
+        failed = True
+        loop.quit()
+
+    decoder.bufferReady.connect(on_buffer)
+    decoder.finished.connect(loop.quit)
+    decoder.error.connect(on_error)
+    decoder.setSource(QUrl.fromLocalFile(os.path.abspath(path)))
+    decoder.start()
+    loop.exec()
+    decoder.stop()
+    return not failed
@@ -0,0 +1,174 @@
+from __future__ import annotations
+import hashlib, mmap, os
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from PySide6.QtCore import QObject, Signal
+from batches import Batch_Scanner
+from library import ID3V1_SIZE, Index_Rows, Library_Index, Song, audio_end
+
+
+DIGEST_SIZE = 16
+# songs are hashed this many per task
+BATCH = 32
+# a digest of a file which couldn't be read, so it isn't tried again until it changes
+UNREADABLE = b''
+
+
+def audio_digest(path: str, offset: int) -> bytes:
+    '''
+    ## audio_digest
+    ##### hashes the audio of an mp3 without its ID3v2 and ID3v1 tags, so copies with different tags hash the same
+    The file is mapped instead of read, hashing a memoryview of it copies nothing and releases the GIL.
+    ---
+    ## Parameters
+    - path [str]: the path of the mp3 file
+    - offset [int]: where the audio starts, after the ID3v2 tag
+
+    ## Returns
+    - the digest, UNREADABLE if there is no audio or the file can't be read
+    '''
+    try:
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size <= offset: return UNREADABLE
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                with memoryview(data) as view, view[offset:audio_end(data, size, offset)] as audio:
+                    return hashlib.blake2b(audio, digest_size=DIGEST_SIZE).digest()
+    except (OSError, ValueError): return UNREADABLE
+
+
+def hash_batch(batch: list[tuple[str, str, int, int, int]]) -> list[tuple[str, int, int, bytes]]:
+    '''
+    ## hash_batch
+    ##### hashes a batch of songs, runs on a worker thread
+    ---
+    ## Parameters
+    - batch [list[tuple]]: the file name, path, modification time, size and audio offset of each song
+
+    ## Returns
+    - the file name, modification time, size and digest of each song
+    '''
+    return [(file, mtime, size, audio_digest(path, offset)) for file, path, mtime, size, offset in batch]
+
+
+def candidate_groups(rows: Index_Rows) -> list[list[tuple]]:
+    '''
+    ## candidate_groups
+    ##### groups the rows of the index by the size of their audio without the tags and their length, the groups of one song are left out
+    ---
+    ## Parameters
+    - rows [Index_Rows]: the rows of the index
+    '''
+    groups: dict[tuple[int, int], list[tuple]] = defaultdict(list)
+    for row in rows.values(): groups[row[2] - row[8] - (ID3V1_SIZE if row[11] else 0), row[3]].append(row)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def group_duplicates(index: Library_Index, rows: Index_Rows, files: list[str]) -> dict[Song, Song]:
+    '''
+    ## group_duplicates
+    ##### groups candidates by their digest and returns the duplicates, runs on a worker thread
+    ---
+    ## Parameters
+    - index [Library_Index]: the index the songs are built from, only the ones of the duplicates are built
+    - rows [Index_Rows]: a snapshot of the rows of the index
+    - files [list[str]]: the file names of the candidates
+
+    ## Returns
+    - every duplicate and the song which is kept in its place, the first by name of its group
+    '''
+    groups: dict[bytes, list[str]] = defaultdict(list)
+    for file in files:
+        row = rows.get(file)
+        if row is not None and row[9]: groups[row[9]].append(file)
+    duplicates = {}
+    for files in groups.values():
+        # a song which left the index meanwhile is left out
+        songs = index.build_songs(files) if len(files) > 1 else []
+        if len(songs) < 2: continue
+        kept = min(songs, key=lambda song: song.name)
+        duplicates.update((song, kept) for song in songs if song is not kept)
+    return duplicates
+
+
+class Duplicate_Finder(Batch_Scanner):
+    '''
+    # Duplicate_Finder
+    #### Finds the songs of the library which hold the same audio under another file name
+    Only songs whose audio is as long in bytes as another song's and whose length is the same are candidates, so most songs are never read.
+    The candidates are hashed in a thread pool and their digests are kept in the library index, so a later start only hashes new or changed files.
+    ---
+    ## Parameters
+    - index [Library_Index]: The index of the library
+    - parent [QObject]: The QObject which owns the finder
+
+    ## Signals
+    - found [dict[Song, Song]]: every duplicate and the song which is kept in its place, the first by name of its group
+    - grouped [tuple]: the future of a grouping and the duplicates it found, None if it failed
+    '''
+    found = Signal(object)
+    grouped = Signal(object)
+
+    def __init__(self, index: Library_Index, parent: QObject = None) -> None:
+        super().__init__(index, hash_batch, BATCH, parent)
+        # the file names of the candidates of the last plan
+        self.candidates: list[str] = []
+        self.grouped.connect(self.on_grouped)
+
+    def wants(self, row: tuple) -> bool: return row[9] is None
+
+    def select(self, rows: Index_Rows) -> list[tuple]:
+        '''
+        ## select
+        ##### returns every candidate, runs on a worker thread. The ones without a digest yet are hashed.
+        ---
+        ## Parameters
+        - rows [Index_Rows]: a snapshot of the rows of the index
+        '''
+        return [row for group in candidate_groups(rows) for row in group]
+
+    def selected(self, files: list[str], jobs: list[tuple]):
+        '''
+        ## selected
+        ##### keeps the candidates and hashes the ones without a digest, or reports the duplicates right away if all of them have one
+        ---
+        ## Parameters
+        - files [list[str]]: the file names of the candidates
+        - jobs [list[tuple]]: the candidates to hash
+        '''
+        self.candidates = files
+        super().selected(files, jobs)
+
+    def keep(self, digests: list[tuple[str, int, int, bytes]]):
+        '''
+        ## keep
+        ##### keeps the digests of a batch in the index
+        ---
+        ## Parameters
+        - digests [list[tuple]]: the file name, modification time, size and digest of each song
+        '''
+        if self.index.set_digests(digests): self.changed = True
+
+    def report(self):
+        '''
+        report
+        ---
+        groups the candidates by digest on a worker thread, the duplicates are emitted once they come back
+        '''
+        if self.pool is None: self.pool = ThreadPoolExecutor(self.workers)
+        future = self.pool.submit(group_duplicates, self.index, self.index.rows.snapshot(), self.candidates)
+        self.futures.add(future)
+        future.add_done_callback(lambda future: self.grouped.emit((future, None if future.cancelled() or future.exception() else future.result())))
+
+    def on_grouped(self, result: tuple[Future, dict[Song, Song] | None]):
+        '''
+        ## on_grouped
+        ##### emits the duplicates a worker found on the GUI thread
+        ---
+        ## Parameters
+        - result [tuple]: the future of the grouping and the duplicates, None if it failed
+        '''
+        future, duplicates = result
+        if future not in self.futures: return
+        self.futures.discard(future)
+        if duplicates is not None: self.found.emit(duplicates)
@@ -0,0 +1,194 @@
+from __future__ import annotations
+import mmap, os
+from PySide6.QtCore import QObject, QTimer, Signal
+from batches import Batch_Scanner
+from library import Library_Index, Song, audio_end
+
+
+# bitrates in kbit/s by MPEG version (1, or 2 for MPEG 2 and 2.5), layer and the index in the frame header
+BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# sample rates by the version bits of the frame header: 3 is MPEG 1, 2 is MPEG 2, 0 is MPEG 2.5
+SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+# how far past the tags the first frame is looked for
+SYNC_SEARCH = 64 * 1024
+# a song without a Xing or VBRI header whose first CBR_PROBE frames have one bitrate is taken to be constant bitrate, else every frame is counted
+CBR_PROBE = 32
+# songs are measured this many per task
+BATCH = 64
+# measured durations are handed to the GUI thread at most once per REPORT_MS, however many batches finish
+REPORT_MS = 500
+
+
+def frame_header(data: bytes, pos: int) -> tuple[int, int, int, int, int] | None:
+    '''
+    ## frame_header
+    ##### decodes the MPEG audio frame header at a position
+    ---
+    ## Parameters
+    - data [bytes]: the file
+    - pos [int]: where the header starts
+
+    ## Returns
+    - the length of the frame in bytes, its samples, the sample rate, the bitrate and the length of its side info, None if there is no valid header
+    '''
+    if pos + 4 > len(data) or data[pos] != 0xFF or data[pos + 1] & 0xE0 != 0xE0: return None
+    version, layer = data[pos + 1] >> 3 & 3, 4 - (data[pos + 1] >> 1 & 3)
+    index, rate_index, padding = data[pos + 2] >> 4, data[pos + 2] >> 2 & 3, data[pos + 2] >> 1 & 1
+    if version == 1 or layer == 4 or index in (0, 15) or rate_index == 3: return None
+    mpeg1 = version == 3
+    bitrate = BITRATES[1 if mpeg1 else 2, layer][index] * 1000
+    rate = SAMPLE_RATES[version][rate_index]
+    if layer == 1: samples, length = 384, (12 * bitrate // rate + padding) * 4
+    else:
+        samples = 1152 if mpeg1 or layer == 2 else 576
+        length = samples // 8 * bitrate // rate + padding
+    mono = data[pos + 3] >> 6 == 3
+    side = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+    return length, samples, rate, bitrate, side
+
+
+def first_frame(data: bytes, start: int, end: int) -> int | None:
+    '''
+    ## first_frame
+    ##### finds the first frame at or after a position, a header only counts if the frame after it starts with one as well
+    ---
+    ## Parameters
+    - data [bytes]: the file
+    - start [int]: where the audio should start, after the ID3v2 tag
+    - end [int]: where the audio ends
+    '''
+    pos, limit = start, min(start + SYNC_SEARCH, end)
+    while 0 <= pos < limit:
+        header = frame_header(data, pos)
+        if header is not None and (pos + header[0] >= end or frame_header(data, pos + header[0]) is not None): return pos
+        pos = data.find(b'\xff', pos + 1, limit)
+    return None
+
+
+def mp3_duration(path: str, offset: int) -> int:
+    '''
+    ## mp3_duration
+    ##### computes the duration of an mp3 from its frame headers, without decoding it
+    The frame count of a Xing, Info or VBRI header gives it right away. Without one a constant bitrate song is measured by its size,
+    only a variable bitrate song without a header has all of its frame headers read.
+    ---
+    ## Parameters
+    - path [str]: the path of the mp3 file
+    - offset [int]: where the audio starts, after the ID3v2 tag
+
+    ## Returns
+    - the duration in milliseconds, 0 if the file holds no MPEG audio
+    '''
+    try:
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size <= offset: return 0
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                end = audio_end(data, size, offset)
+                start = first_frame(data, offset, end)
+                if start is None: return 0
+                _, samples, rate, bitrate, side = frame_header(data, start)
+
+                xing = start + 4 + side
+                if data[xing:xing + 4] in (b'Xing', b'Info') and data[xing + 7] & 1:
+                    frames = int.from_bytes(data[xing + 8:xing + 12], 'big')
+                    if frames: return frames * samples * 1000 // rate
+                if data[start + 36:start + 40] == b'VBRI':
+                    frames = int.from_bytes(data[start + 50:start + 54], 'big')
+                    if frames: return frames * samples * 1000 // rate
+
+                pos, frames, bitrates = start, 0, set()
+                while (header := frame_header(data, pos)) is not None and pos + header[0] <= end:
+                    frames += 1
+                    bitrates.add(header[3])
+                    if frames == CBR_PROBE and len(bitrates) == 1: return (end - start) * 8000 // bitrate
+                    pos += header[0]
+                return frames * samples * 1000 // rate
+    except (OSError, ValueError, IndexError): return 0
+
+
+def measure_batch(batch: list[tuple[str, str, int, int, int]]) -> list[tuple[str, int, int, int]]:
+    '''
+    ## measure_batch
+    ##### measures a batch of songs, runs on a worker thread
+    ---
+    ## Parameters
+    - batch [list[tuple]]: the file name, path, modification time, size and audio offset of each song
+
+    ## Returns
+    - the file name, modification time, size and duration of each song
+    '''
+    return [(file, mtime, size, mp3_duration(path, offset)) for file, path, mtime, size, offset in batch]
+
+
+class Duration_Scanner(Batch_Scanner):
+    '''
+    # Duration_Scanner
+    #### Measures the duration of every song of the library from its frame headers in a thread pool, no player is created for it
+    The durations are kept in the library index with the modification time of the file, so only new or changed files are measured on a later start.
+    ---
+    ## Parameters
+    - index [Library_Index]: The index of the library
+    - parent [QObject]: The QObject which owns the scanner
+
+    ## Signals
+    - measured [list[Song]]: the songs whose duration changed since the last time, at most once per REPORT_MS
+    '''
+    measured = Signal(object)
+
+    def __init__(self, index: Library_Index, parent: QObject = None) -> None:
+        super().__init__(index, measure_batch, BATCH, parent)
+        self.songs: list[Song] = []
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(REPORT_MS)
+        self.timer.timeout.connect(self.report)
+
+    def wants(self, row: tuple) -> bool: return not row[10]
+
+    def keep(self, durations: list[tuple[str, int, int, int]]):
+        '''
+        ## keep
+        ##### keeps the durations of a batch in the index and gathers the songs which changed until the next report
+        ---
+        ## Parameters
+        - durations [list[tuple]]: the file name, modification time, size and duration of each song
+        '''
+        self.songs += self.index.set_durations(durations)
+        self.changed = True
+
+    def progress(self):
+        '''
+        progress
+        ---
+        reports what was measured once REPORT_MS is over
+        '''
+        if not self.timer.isActive(): self.timer.start()
+
+    def report(self):
+        '''
+        report
+        ---
+        emits the songs whose duration changed
+        '''
+        self.timer.stop()
+        if self.songs:
+            songs, self.songs = self.songs, []
+            self.measured.emit(songs)
+
+    def stop(self):
+        '''
+        stop
+        ---
+        cancels the batches which weren't measured yet, the durations so far are saved
+        '''
+        super().stop()
+        self.timer.stop()
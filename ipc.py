@@ -0,0 +1,111 @@
+from __future__ import annotations
+import getpass, json, os
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtNetwork import QLocalServer, QLocalSocket
+
+
+# one player per user, the name keeps the players of different users apart
+SERVER_NAME = f'PulsePlay-{getpass.getuser()}'
+# how long a launch waits for a running player to answer before it starts one itself
+CONNECT_MS = 200
+COMMANDS = ('play', 'pause', 'play-pause', 'stop', 'next', 'previous', 'show')
+# a request is a few paths, anything longer is not from a launch of the player
+MAX_REQUEST = 1 << 20
+
+
+def parse_args(args: list[str]) -> dict[str, list[str]]:
+    '''
+    ## parse_args
+    ##### splits the arguments of a launch into commands like --next and files to play, the files made absolute while the working directory is still the caller's
+    ---
+    ## Parameters
+    - args [list[str]]: the arguments without the script, flags which aren't commands are left out
+    '''
+    return {'commands': [arg[2:] for arg in args if arg.startswith('--') and arg[2:] in COMMANDS],
+            'files': [os.path.abspath(arg) for arg in args if not arg.startswith('--')]}
+
+
+def forward(request: dict[str, list[str]], name: str = SERVER_NAME, timeout: int = CONNECT_MS) -> bool:
+    '''
+    ## forward
+    ##### hands a request to the running player
+    ---
+    ## Parameters
+    - request [dict[str, list[str]]]: what parse_args returned
+    - name [str]: the name of the server
+    - timeout [int]: how long to wait for the player in milliseconds
+
+    ## Returns
+    - True if a running player took the request, False if none is running
+    '''
+    socket = QLocalSocket()
+    socket.connectToServer(name)
+    if not socket.waitForConnected(timeout): return False
+    socket.write(json.dumps(request).encode() + b'\n')
+    sent = socket.waitForBytesWritten(timeout)
+    socket.disconnectFromServer()
+    return sent
+
+
+class Instance_Server(QObject):
+    '''
+    # Instance_Server
+    #### Makes the first player the only one: later launches connect to it, send their arguments and exit, so a command costs a connection instead of a cold start
+    ---
+    ## Parameters
+    - parent [QObject]: The QObject which owns the server
+    - name [str]: The name of the server
+    '''
+    received = Signal(dict)
+
+    def __init__(self, parent: QObject = None, name: str = SERVER_NAME) -> None:
+        super().__init__(parent)
+        self.name = name
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.SocketOption.UserAccessOption)
+        self.server.newConnection.connect(self.on_connection)
+
+    def listen(self) -> bool:
+        '''
+        listen
+        ---
+        starts taking requests, unless a running player answers on the name: listening with socket options renames the new socket over an existing one on Unix,
+        so it is asked first. A player which crashed leaves its socket behind on Unix, which is removed since nobody answered on it.
+        '''
+        probe = QLocalSocket()
+        probe.connectToServer(self.name)
+        if probe.waitForConnected(CONNECT_MS):
+            probe.disconnectFromServer()
+            return False
+        if self.server.listen(self.name): return True
+        QLocalServer.removeServer(self.name)
+        return self.server.listen(self.name)
+
+    def on_connection(self):
+        '''
+        on_connection
+        ---
+        reads the request of every new launch once its line is complete
+        '''
+        while (socket := self.server.nextPendingConnection()) is not None:
+            socket.readyRead.connect(lambda socket=socket: self.read(socket))
+            socket.disconnected.connect(socket.deleteLater)
+            self.read(socket)
+
+    def read(self, socket: QLocalSocket):
+        '''
+        ## read
+        ##### emits the request of a launch and closes its connection
+        ---
+        ## Parameters
+        - socket [QLocalSocket]: the connection of the launch
+        '''
+        if not socket.canReadLine():
+            if socket.bytesAvailable() > MAX_REQUEST: socket.abort()
+            return
+        try: request = json.loads(socket.readLine().data())
+        except ValueError: request = None
+        socket.disconnectFromServer()
+        if not isinstance(request, dict): return
+        lists = {key: request.get(key) if isinstance(request.get(key), list) else [] for key in ('commands', 'files')}
+        self.received.emit({key: [value for value in values if isinstance(value, str)] for key, values in lists.items()})
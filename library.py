@@ -0,0 +1,653 @@
+from __future__ import annotations
+import marshal, os, struct
+from collections.abc import Iterator, Mapping, MutableMapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from PySide6.QtCore import QUrl
+
+
+SONGS_DIR = 'songs'
+THUMBNAILS_DIR = 'thumbnails'
+CACHE_DIR = 'cache'
+INDEX_FILE = os.path.join(CACHE_DIR, 'library.idx')
+
+INDEX_VERSION = 4
+# digest is the hash of the audio without its tags, None until the song was compared with a possible duplicate.
+# measured is 1 once the duration was taken from the frames instead of the TLEN tag.
+# has_id3v1 is 1 if the file ends in an ID3v1 tag, None in a row of an older index until its tags are read again.
+INDEX_FIELDS = ('file', 'mtime', 'size', 'duration', 'title', 'artist', 'album', 'has_thumb', 'audio_offset', 'digest', 'measured', 'has_id3v1')
+# the values of the fields an older version of the index lacks
+INDEX_UPGRADES = {1: (None, 0, None), 2: (0, None), 3: (None,)}
+# an ID3v1 tag is the last 128 bytes of the file, starting with TAG
+ID3V1_SIZE = 128
+
+# ID3v2.3/2.4 frame ids and their ID3v2.2 equivalents for the fields the index keeps
+ID3_FIELDS = {'TIT2': 'title', 'TPE1': 'artist', 'TALB': 'album', 'TLEN': 'length',
+              'TT2': 'title', 'TP1': 'artist', 'TAL': 'album', 'TLE': 'length'}
+ID3_ENCODINGS = {0: 'latin-1', 1: 'utf-16', 2: 'utf-16-be', 3: 'utf-8'}
+
+
+class Song:
+    '''
+    # Song
+    #### Holds all the information: files' paths, tags, and QUrl for the song
+    ---
+    ## Parameters
+    - name [str]: The name of the song; is used to access all the various files, paths, & QUrl
+    - path [str]: The path of the mp3 file, defaults to songs\\{name}.mp3
+    - title [str]: The title from the song's tags, defaults to the name
+    - band [str]: The artist from the song's tags, defaults to the name
+    - album [str]: The album from the song's tags
+    - img [str | bool | None]: The path of the thumbnail, False if it is known to have none, None to check the disk
+    - duration [int]: The length of the song in milliseconds, 0 if unknown
+
+    The gain in dB which brings the song to the reference loudness is set once its loudness is known, until then it is 0.
+    '''
+    __slots__ = ('name', 'title', 'band', 'album', 'path', 'img', 'duration', 'gain', '_url')
+
+    def __init__(self, name: str, path: str = None, title: str = None, band: str = None, album: str = '',
+                 img: str | bool | None = None, duration: int = 0) -> None:
+        self.name: str = name
+        self.title: str = title or name
+        self.band: str = band or name
+        self.album: str = album
+        self.path: str = path or os.path.join(SONGS_DIR, f'{name}.mp3')
+        self.duration: int = duration
+        self.gain: float = 0.0
+        self._url: QUrl = None
+
+        if isinstance(img, str): self.img: str = img
+        elif img is False: self.img = None
+        else:
+            self.img = os.path.join(THUMBNAILS_DIR, f'{name}.jpg')
+            if not os.path.exists(self.img): self.img = None
+
+    @property
+    def url(self) -> QUrl:
+        '''
+        url
+        ---
+        The QUrl of the song, built on first use so that loading a large library stays cheap
+        '''
+        if self._url is None:
+            self._url = QUrl.fromLocalFile(os.path.abspath(self.path))
+        return self._url
+
+    def __repr__(self): return str(self)
+    def __str__(self): return f'{self.band}'
+
+
+def read_tags(path: str) -> dict[str, str | int]:
+    '''
+    ## read_tags
+    ##### Reads the title, artist, album and length of an mp3 from its ID3v2 tag, falling back to ID3v1.
+    Only the header and the wanted text frames are read, so embedded cover art is skipped over.
+    ---
+    ## Parameters
+    - path [str]: the path of the mp3 file
+
+    ## Returns
+    - a dict with the keys 'title', 'artist', 'album', 'length' (in ms) and 'audio_offset' for the ones that were found, and 'id3v1' if the file ends in an ID3v1 tag
+    '''
+    tags: dict[str, str | int] = {'audio_offset': 0}
+    with open(path, 'rb') as f:
+        header = f.read(10)
+        if len(header) == 10 and header[:3] == b'ID3':
+            major, flags = header[3], header[5]
+            tag_size = _syncsafe(header[6:10])
+            tags['audio_offset'] = 10 + tag_size + (10 if flags & 0x10 else 0)
+            end = 10 + tag_size
+            if flags & 0x40 and major >= 3:
+                ext = f.read(4)
+                f.seek(_syncsafe(ext) - 4 if major == 4 else struct.unpack('>I', ext)[0], 1)
+            while f.tell() < end:
+                if major == 2:
+                    frame = f.read(6)
+                    if len(frame) < 6 or frame[0] == 0: break
+                    frame_id, size = frame[:3].decode('latin-1'), int.from_bytes(frame[3:6], 'big')
+                else:
+                    frame = f.read(10)
+                    if len(frame) < 10 or frame[0] == 0: break
+                    frame_id = frame[:4].decode('latin-1')
+                    size = _syncsafe(frame[4:8]) if major == 4 else struct.unpack('>I', frame[4:8])[0]
+                if size <= 0 or f.tell() + size > end: break
+                field = ID3_FIELDS.get(frame_id)
+                if field is None:
+                    f.seek(size, 1)
+                    continue
+                text = _decode_text(f.read(size))
+                if field == 'length':
+                    if text.isdigit(): tags['length'] = int(text)
+                elif text:
+                    tags[field] = text
+
+        f.seek(0, os.SEEK_END)
+        if f.tell() - tags['audio_offset'] >= ID3V1_SIZE:
+            f.seek(-ID3V1_SIZE, os.SEEK_END)
+            v1 = f.read(ID3V1_SIZE)
+            if v1[:3] == b'TAG':
+                tags['id3v1'] = 1
+                if 'title' not in tags:
+                    for field, start in (('title', 3), ('artist', 33), ('album', 63)):
+                        text = v1[start:start+30].split(b'\x00')[0].decode('latin-1').strip()
+                        if text: tags.setdefault(field, text)
+    return tags
+
+
+def audio_end(data: bytes, size: int, offset: int) -> int:
+    '''
+    ## audio_end
+    ##### Returns where the audio of an mp3 ends, before its ID3v1 tag if it has one
+    ---
+    ## Parameters
+    - data [bytes | mmap]: the file
+    - size [int]: the size of the file
+    - offset [int]: where the audio starts, after the ID3v2 tag
+    '''
+    return size - ID3V1_SIZE if size - offset >= ID3V1_SIZE and data[size - ID3V1_SIZE:size - ID3V1_SIZE + 3] == b'TAG' else size
+
+
+def _syncsafe(data: bytes) -> int:
+    '''
+    ## _syncsafe
+    ##### Decodes a 4 byte ID3 syncsafe integer (7 bits per byte)
+    '''
+    return (data[0] & 0x7f) << 21 | (data[1] & 0x7f) << 14 | (data[2] & 0x7f) << 7 | (data[3] & 0x7f)
+
+
+def _decode_text(data: bytes) -> str:
+    '''
+    ## _decode_text
+    ##### Decodes the body of an ID3 text frame according to its encoding byte
+    '''
+    if not data: return ''
+    try: text = data[1:].decode(ID3_ENCODINGS.get(data[0], 'latin-1'))
+    except UnicodeDecodeError: text = data[1:].decode('latin-1')
+    return text.split('\x00')[0].strip()
+
+
+class Index_Rows(MutableMapping):
+    '''
+    # Index_Rows
+    #### The rows of a Library_Index by file name, read from the columns of the index file. A row is only made from the columns when it is looked up,
+    #### rows set since the index was loaded are kept apart, so loading the index only maps each file name to its place in the columns.
+    ---
+    ## Parameters
+    - columns [tuple[list]]: The columns of the index file, in the order of INDEX_FIELDS
+    '''
+    def __init__(self, columns: tuple[list, ...] = None) -> None:
+        self.columns = columns or tuple([] for _ in INDEX_FIELDS)
+        # file name -> its place in the columns
+        self.places: dict[str, int] = dict(zip(self.columns[0], range(len(self.columns[0]))))
+        # the rows set since loading, they take the place of the ones in the columns
+        self.changed: dict[str, tuple] = {}
+
+    def __getitem__(self, file: str) -> tuple:
+        row = self.changed.get(file)
+        if row is not None: return row
+        place = self.places[file]
+        return tuple(column[place] for column in self.columns)
+
+    def __setitem__(self, file: str, row: tuple): self.changed[file] = row
+
+    def __delitem__(self, file: str):
+        if file not in self: raise KeyError(file)
+        self.changed.pop(file, None)
+        self.places.pop(file, None)
+
+    def __contains__(self, file: object) -> bool: return file in self.changed or file in self.places
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.places
+        yield from (file for file in self.changed if file not in self.places)
+
+    def __len__(self) -> int: return len(self.places) + sum(file not in self.places for file in self.changed)
+
+    def snapshot(self) -> Index_Rows:
+        '''
+        snapshot
+        ---
+        returns a copy a worker thread can read while this one changes. Only the mappings are copied, the columns are never changed after loading.
+        '''
+        rows = Index_Rows.__new__(Index_Rows)
+        rows.columns, rows.places, rows.changed = self.columns, self.places.copy(), self.changed.copy()
+        return rows
+
+
+class Song_Map(Mapping):
+    '''
+    # Song_Map
+    #### The songs of a Library_Index by file name. A Song is only built from its row the first time it is looked up, so loading the index builds none.
+    The files are the ones of the rows, so a song whose row changed and which wasn't looked up yet is simply built from the new row.
+    ---
+    ## Parameters
+    - index [Library_Index]: The index whose rows the songs are built from
+    '''
+    def __init__(self, index: Library_Index) -> None:
+        self.index = index
+        self.built: dict[str, Song] = {}
+
+    def __getitem__(self, file: str) -> Song:
+        song = self.built.get(file)
+        # setdefault keeps the first song if a worker thread builds the same one at once
+        if song is None: song = self.built.setdefault(file, self.index.make_song(self.index.rows[file]))
+        return song
+
+    def __contains__(self, file: object) -> bool: return file in self.index.rows
+    def __iter__(self) -> Iterator[str]: return iter(self.index.rows)
+    def __len__(self) -> int: return len(self.index.rows)
+
+    def peek(self, file: str) -> Song | None:
+        '''
+        ## peek
+        ##### returns the song of a file if it was built already, without building it
+        ---
+        ## Parameters
+        - file [str]: the file name of the mp3 inside the songs folder
+        '''
+        return self.built.get(file)
+
+    def pop(self, file: str) -> Song:
+        '''
+        ## pop
+        ##### forgets the song of a file whose row is about to be removed, and returns it
+        ---
+        ## Parameters
+        - file [str]: the file name of the mp3 inside the songs folder
+        '''
+        song = self[file]
+        del self.built[file]
+        return song
+
+    def clear(self):
+        '''
+        clear
+        ---
+        forgets the songs which were built, the rows are left alone
+        '''
+        self.built.clear()
+
+
+class Song_List(Sequence):
+    '''
+    # Song_List
+    #### The songs of the library in the order of their file names, for the play order. A song is taken from the Song_Map the first time it is looked at,
+    #### so a play order of the whole library starts without building a Song for every file.
+    ---
+    ## Parameters
+    - index [Library_Index]: The index the songs come from
+    - files [list[str]]: The file names of the songs, in order
+    '''
+    def __init__(self, index: Library_Index, files: list[str]) -> None:
+        self.index = index
+        self.files = files
+        self.built: list[Song | None] = [None] * len(files)
+        self.positions = Song_Positions(self)
+
+    def __len__(self) -> int: return len(self.files)
+
+    def __getitem__(self, index: int | slice) -> Song | list[Song]:
+        if isinstance(index, slice): return [self[i] for i in range(*index.indices(len(self.files)))]
+        song = self.built[index]
+        if song is None: song = self.built[index] = self.index.songs[self.files[index]]
+        return song
+
+    def __contains__(self, song: object) -> bool: return song in self.positions
+
+    def extend(self, songs: list[Song]):
+        '''
+        ## extend
+        ##### adds songs to the end of the list, they are kept as they are and given their position
+        ---
+        ## Parameters
+        - songs [list[Song]]: the songs to add
+        '''
+        for song in songs:
+            self.files.append(self.index.file_of(song))
+            self.built.append(song)
+            self.positions.add(song, len(self.files) - 1)
+
+
+class Song_Positions:
+    '''
+    # Song_Positions
+    #### Finds the position of a song in a Song_List by its file name instead of by the song, so the songs don't have to be built to be found.
+    #### Stands in for the dict of a plain list of songs in Play_Queue.index_of.
+    A file can be in the list twice, when it was removed and added again: the file then maps to its last position, and the song at the earlier one,
+    which is another Song, is kept by the song. Both are updated as songs are added, so a lookup never walks the list.
+    ---
+    ## Parameters
+    - songs [Song_List]: The list whose songs are found
+    '''
+    def __init__(self, songs: Song_List) -> None:
+        self.songs = songs
+        # file name -> its last position, made on the first lookup
+        self.by_file: dict[str, int] = None
+        # song -> position, for the songs whose file was added again after them
+        self.displaced: dict[Song, int] = {}
+
+    def map_files(self):
+        '''
+        map_files
+        ---
+        maps every file name to its last position, and keeps the songs at the earlier positions of a file which is in the list twice
+        '''
+        files, built = self.songs.files, self.songs.built
+        self.by_file = dict(zip(files, range(len(files))))
+        if len(self.by_file) == len(files): return
+        last: dict[str, int] = {}
+        for index, file in enumerate(files):
+            earlier = last.get(file)
+            if earlier is not None and built[earlier] is not None: self.displaced[built[earlier]] = earlier
+            last[file] = index
+
+    def add(self, song: Song, index: int):
+        '''
+        ## add
+        ##### gives a song which was added to the list its position, the song of an earlier position of the same file keeps its own
+        ---
+        ## Parameters
+        - song [Song]: the song
+        - index [int]: its position in the list
+        '''
+        if self.by_file is None: return
+        file = self.songs.index.file_of(song)
+        earlier = self.by_file.get(file)
+        if earlier is not None:
+            built = self.songs.built[earlier]
+            # a song which is in the list already keeps its first position, like dict.setdefault
+            if built is song: return
+            if built is not None: self.displaced[built] = earlier
+        self.by_file[file] = index
+
+    def get(self, song: Song, default: int = None) -> int | None:
+        '''
+        ## get
+        ##### returns the position of a song, or default if it isn't in the list
+        A position which wasn't looked at yet takes the song, as long as it is the library's song of that file or the file left the library.
+        ---
+        ## Parameters
+        - song [Song]: the song
+        - default [int]: what is returned for a song which isn't in the list
+        '''
+        if song is None: return default
+        songs = self.songs
+        if self.by_file is None: self.map_files()
+        file = songs.index.file_of(song)
+        index = self.by_file.get(file)
+        if index is not None:
+            built = songs.built[index]
+            if built is song: return index
+            if built is None and (file not in songs.index.songs or songs.index.songs.peek(file) is song):
+                songs.built[index] = song
+                return index
+        # a song kept from before its file was removed and added again
+        return self.displaced.get(song, default)
+
+    def __contains__(self, song: object) -> bool: return self.get(song) is not None
+
+    def setdefault(self, song: Song, index: int) -> int:
+        '''
+        ## setdefault
+        ##### gives a song a position unless it has one, like dict.setdefault
+        ---
+        ## Parameters
+        - song [Song]: the song
+        - index [int]: its position in the list
+        '''
+        known = self.get(song)
+        if known is not None: return known
+        self.add(song, index)
+        return index
+
+
+class Library_Index:
+    '''
+    # Library_Index
+    #### Keeps a compact on-disk index of the songs folder, so that startup only reads the tags of files which changed
+    The index is stored column by column with marshal, which decodes 100k songs in about 50 ms. Neither rows nor songs are made on load,
+    a row is made from the columns and a Song from its row the first time they are looked up: making all 100k rows takes about 150 ms, and their songs another 500 ms.
+    The rows are saved in the order of the names, so the play order of the next start is sorted in a few milliseconds.
+    ---
+    ## Parameters
+    - songs_dir [str]: The folder which holds the mp3 files
+    - thumbs_dir [str]: The folder which holds the thumbnails
+    - path [str]: The path of the index file
+    '''
+    def __init__(self, songs_dir: str = SONGS_DIR, thumbs_dir: str = THUMBNAILS_DIR, path: str = INDEX_FILE) -> None:
+        self.songs_dir = songs_dir
+        self.thumbs_dir = thumbs_dir
+        self.path = path
+        self.songs_prefix = os.path.join(songs_dir, '')
+        self.thumbs_prefix = os.path.join(thumbs_dir, '')
+
+        # file name -> row, in the order of INDEX_FIELDS
+        self.rows = Index_Rows()
+        self.songs = Song_Map(self)
+
+        self.load()
+
+    def load(self):
+        '''
+        load
+        ---
+        Loads the rows of the index file without touching the songs themselves, their Song instances are built when they are looked up
+        '''
+        self.rows = Index_Rows()
+        self.songs.clear()
+        try:
+            with open(self.path, 'rb') as f: version, columns = marshal.loads(f.read())
+        except (OSError, EOFError, ValueError, TypeError): return
+        # an older index only lacks the fields added since, they are filled in later
+        if version in INDEX_UPGRADES: columns = (*columns, *([value] * len(columns[0]) for value in INDEX_UPGRADES[version]))
+        elif version != INDEX_VERSION: return
+
+        self.rows = Index_Rows(columns)
+
+    def save(self):
+        '''
+        save
+        ---
+        Writes the index with atomic_write, so a crash never leaves a half written index
+        '''
+        # core imports this module, so its helper is imported when the index is first saved
+        from core import atomic_write
+        rows = [self.rows[file] for file in sorted(self.rows, key=lambda file: file[:-4])]
+        columns = tuple(map(list, zip(*rows))) if rows else tuple([] for _ in INDEX_FIELDS)
+        atomic_write(self.path, marshal.dumps((INDEX_VERSION, columns)))
+
+    def make_song(self, row: tuple) -> Song:
+        '''
+        ## make_song
+        ##### Builds the Song instance of a row of the index
+        ---
+        ## Parameters
+        - row [tuple]: the row, in the order of INDEX_FIELDS
+        '''
+        file, _, _, duration, title, artist, album, has_thumb, *_ = row
+        name = file[:-4]
+        return Song(name, self.songs_prefix + file, title, artist, album, self.thumb_path(name, has_thumb), duration)
+
+    def file_of(self, song: Song) -> str:
+        '''
+        ## file_of
+        ##### Returns the file name of a song of the songs folder, or the whole path of a song from elsewhere
+        ---
+        ## Parameters
+        - song [Song]: the song
+        '''
+        return song.path[len(self.songs_prefix):] if song.path.startswith(self.songs_prefix) else song.path
+
+    def scan(self) -> tuple[list[Song], list[Song], list[Song]]:
+        '''
+        ## scan
+        ##### Compares the songs folder with the index and only reads the tags of new or modified files
+        ---
+        ## Returns
+        - the added, updated and removed songs. Updated songs keep their Song instance.
+        '''
+        return self.apply(self.collect())
+
+    def collect(self) -> tuple[list[tuple], list[tuple], set[str]]:
+        '''
+        ## collect
+        ##### The reading half of scan: lists the folders and reads the tags of new or modified files without changing the index, so it can run on a worker thread
+        ---
+        ## Returns
+        - the new rows of new or modified files, the rows whose thumbnail appeared or disappeared, and the file names which exist
+        '''
+        try: thumbs = {entry.name[:-4] for entry in os.scandir(self.thumbs_dir) if entry.name.endswith('.jpg')}
+        except FileNotFoundError: thumbs = set()
+
+        seen: set[str] = set()
+        stale: list[tuple[str, int, int]] = []
+        thumb_rows: list[tuple] = []
+        for entry in os.scandir(self.songs_dir):
+            if not entry.name.lower().endswith('.mp3') or not entry.is_file(): continue
+            seen.add(entry.name)
+            stat = entry.stat()
+            row = self.rows.get(entry.name)
+            # a row of an older index doesn't know about an ID3v1 tag yet, so its file is read again
+            if row is None or row[1] != stat.st_mtime_ns or row[2] != stat.st_size or row[11] is None:
+                stale.append((entry.name, stat.st_mtime_ns, stat.st_size))
+            elif bool(row[7]) != (entry.name[:-4] in thumbs):
+                thumb_rows.append(row[:7] + (int(not row[7]),) + row[8:])
+
+        # reading tags is I/O bound, so a first pass over a large folder is spread across threads
+        with ThreadPoolExecutor() as pool:
+            rows = list(pool.map(lambda args: self.read_row(*args, has_thumb=args[0][:-4] in thumbs), stale))
+        return rows, thumb_rows, seen
+
+    def apply(self, scan: tuple[list[tuple], list[tuple], set[str]]) -> tuple[list[Song], list[Song], list[Song]]:
+        '''
+        ## apply
+        ##### The writing half of scan: applies what collect found to the index and its songs, and saves the index if anything changed
+        ---
+        ## Parameters
+        - scan [tuple]: what collect returned
+
+        ## Returns
+        - the added, updated and removed songs. Updated songs keep their Song instance.
+        '''
+        rows, thumb_rows, seen = scan
+        thumb_changes: list[Song] = []
+        for row in thumb_rows:
+            if row[0] not in self.rows: continue
+            self.rows[row[0]] = row
+            # a song which was built before, here or on a worker thread, gets the new thumbnail too
+            song = self.songs[row[0]]
+            song.img = self.thumb_path(row[0][:-4], row[7]) or None
+            thumb_changes.append(song)
+
+        added, updated = [], []
+        for row in rows:
+            old = self.rows.get(row[0])
+            # a row of an older index which was only read again for has_id3v1 keeps the rest, its song didn't change
+            if old is not None and old[1:3] == row[1:3]:
+                self.rows[row[0]] = old[:11] + row[11:]
+                continue
+            self.rows[row[0]] = row
+            # peeked after the row is set, so a song a worker thread built from the old row meanwhile is updated as well
+            known, song = old is not None, self.songs.peek(row[0])
+            if song is not None:
+                new = self.make_song(row)
+                song.title, song.band, song.album, song.img, song.duration = new.title, new.band, new.album, new.img, new.duration
+                updated.append(song)
+            elif known: updated.append(self.songs[row[0]])
+            else: added.append(self.songs[row[0]])
+
+        removed = [self.songs.pop(file) for file in self.songs.keys() - seen]
+        for file in self.rows.keys() - seen: del self.rows[file]
+
+        if rows or removed or thumb_changes: self.save()
+        return added, updated + thumb_changes, removed
+
+    def read_row(self, file: str, mtime: int, size: int, has_thumb: bool) -> tuple:
+        '''
+        ## read_row
+        ##### Reads the tags of one song and builds its row in the index
+        ---
+        ## Parameters
+        - file [str]: the file name of the mp3 inside the songs folder
+        - mtime [int]: the modification time of the file in nanoseconds
+        - size [int]: the size of the file in bytes
+        - has_thumb [bool]: whether the song has a thumbnail
+        '''
+        try: tags = read_tags(os.path.join(self.songs_dir, file))
+        except OSError: tags = {'audio_offset': 0}
+        return (file, mtime, size, tags.get('length', 0), tags.get('title'), tags.get('artist'),
+                tags.get('album', ''), int(has_thumb), tags['audio_offset'], None, 0, tags.get('id3v1', 0))
+
+    def set_digests(self, digests: list[tuple[str, int, int, bytes]]) -> bool:
+        '''
+        ## set_digests
+        ##### Keeps the audio digests of songs in their rows, unless the file changed since it was hashed
+        ---
+        ## Parameters
+        - digests [list[tuple[str, int, int, bytes]]]: the file name, modification time, size and digest of each song
+
+        ## Returns
+        - whether any row changed, the index is not saved here
+        '''
+        changed = False
+        for file, mtime, size, digest in digests:
+            row = self.rows.get(file)
+            if row is None or row[1] != mtime or row[2] != size or row[9] == digest: continue
+            self.rows[file] = row[:9] + (digest,) + row[10:]
+            changed = True
+        return changed
+
+    def set_durations(self, durations: list[tuple[str, int, int, int]]) -> list[Song]:
+        '''
+        ## set_durations
+        ##### Keeps the measured durations of songs in their rows and gives them to the songs, unless the file changed since it was measured
+        ---
+        ## Parameters
+        - durations [list[tuple[str, int, int, int]]]: the file name, modification time, size and duration in milliseconds of each song, 0 keeps the one of the tags
+
+        ## Returns
+        - the songs whose duration changed, the index is not saved here
+        '''
+        changed = []
+        for file, mtime, size, duration in durations:
+            row = self.rows.get(file)
+            if row is None or row[1] != mtime or row[2] != size: continue
+            self.rows[file] = row[:3] + (duration or row[3],) + row[4:10] + (1,) + row[11:]
+            # a song which wasn't built yet gets the duration from its row
+            song = self.songs.peek(file)
+            if song is not None and duration and song.duration != duration:
+                song.duration = duration
+                changed.append(song)
+        return changed
+
+    def thumb_path(self, name: str, has_thumb: int) -> str | bool:
+        '''
+        ## thumb_path
+        ##### Returns the path of a song's thumbnail, or False if it has none
+        ---
+        ## Parameters
+        - name [str]: the name of the song
+        - has_thumb [bool]: whether the song has a thumbnail
+        '''
+        return f'{self.thumbs_prefix}{name}.jpg' if has_thumb else False
+
+    def build_songs(self, files: list[str]) -> list[Song]:
+        '''
+        ## build_songs
+        ##### Builds the songs of some files, so a worker thread can do it: a file which left the index meanwhile is left out
+        ---
+        ## Parameters
+        - files [list[str]]: the file names of the mp3s inside the songs folder
+        '''
+        songs = []
+        for file in files:
+            try: songs.append(self.songs[file])
+            except KeyError: continue
+        return songs
+
+    def sorted_songs(self) -> Song_List:
+        '''
+        sorted_songs
+        ---
+        Returns the songs of the library sorted by name, they are built as the list is read
+        '''
+        return Song_List(self, sorted(self.rows, key=lambda file: file[:-4]))
@@ -0,0 +1,313 @@
+from __future__ import annotations
+import marshal, math, multiprocessing, os, sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Sequence
+import numpy as np
+from PySide6.QtCore import QObject, QTimer, Signal
+from core import atomic_write
+from library import CACHE_DIR, Song
+
+
+LOUDNESS_INDEX = os.path.join(CACHE_DIR, 'loudness.idx')
+LOUDNESS_VERSION = 1
+# ReplayGain 2.0 plays every song as loud as a song of -18 LUFS
+REFERENCE_LUFS = -18.0
+# loudness is measured over 400 ms blocks which overlap by 75%, built from 100 ms sub-blocks
+SUB_BLOCK_S = 0.1
+ABSOLUTE_GATE = -70.0
+RELATIVE_GATE = -10.0
+# the results are written every SAVE_MS while the analysis runs, so a restart only analyzes what is left
+SAVE_MS = 2000
+# songs handed to the pool per worker at a time, the rest wait in the analyzer, so stopping only drops a list
+IN_FLIGHT_PER_WORKER = 2
+
+
+def k_weighting(rate: int, size: int) -> np.ndarray:
+    '''
+    ## k_weighting
+    ##### returns the power response of the BS.1770 K-weighting filter (a high shelf and a high pass) at the bins of a real FFT
+    ---
+    ## Parameters
+    - rate [int]: the sample rate
+    - size [int]: the length of the FFT
+    '''
+    w = 2 * np.pi * np.fft.rfftfreq(size, 1 / rate) / rate
+    z = np.exp(-1j * w)
+
+    def biquad(b: tuple[float], a: tuple[float]) -> np.ndarray:
+        return np.abs((b[0] + b[1]*z + b[2]*z**2) / (a[0] + a[1]*z + a[2]*z**2)) ** 2
+
+    # high shelf: +4 dB above 1500 Hz
+    gain, q = 10 ** (4 / 40), 1 / math.sqrt(2)
+    w0 = 2 * math.pi * 1500 / rate
+    alpha, cos = math.sin(w0) / (2*q), math.cos(w0)
+    root = 2 * math.sqrt(gain) * alpha
+    shelf = biquad((gain*((gain+1) + (gain-1)*cos + root), -2*gain*((gain-1) + (gain+1)*cos), gain*((gain+1) + (gain-1)*cos - root)),
+                   ((gain+1) - (gain-1)*cos + root, 2*((gain-1) - (gain+1)*cos), (gain+1) - (gain-1)*cos - root))
+    # high pass: cuts below 38 Hz
+    w0, q = 2 * math.pi * 38 / rate, 0.5
+    alpha, cos = math.sin(w0) / (2*q), math.cos(w0)
+    high_pass = biquad(((1+cos)/2, -(1+cos), (1+cos)/2), (1 + alpha, -2*cos, 1 - alpha))
+    return shelf * high_pass
+
+
+class Loudness_Meter:
+    '''
+    # Loudness_Meter
+    #### Measures the integrated loudness and the sample peak of a song from its decoded buffers, as they arrive
+    Every 100 ms sub-block is K-weighted in the frequency domain, all sub-blocks of a buffer with one FFT, so the song is never held in memory.
+    '''
+    def __init__(self) -> None:
+        self.rate = 0
+        self.size = 0
+        self.weights: np.ndarray = None
+        self.carry: np.ndarray = None
+        self.powers: list[np.ndarray] = []
+        self.peak = 0.0
+
+    def add(self, frames: np.ndarray, rate: int):
+        '''
+        ## add
+        ##### measures the next frames of the song
+        ---
+        ## Parameters
+        - frames [np.ndarray]: the decoded audio, one column per channel, scaled to -1..1
+        - rate [int]: the sample rate
+        '''
+        if not len(frames) or rate <= 0: return
+        if rate != self.rate:
+            self.rate, self.size = rate, round(rate * SUB_BLOCK_S)
+            self.weights = k_weighting(rate, self.size)
+            # the real FFT only holds one half of the spectrum, every bin but DC and Nyquist counts twice
+            self.weights[1:(self.size + 1) // 2] *= 2
+            self.carry = None
+        self.peak = max(self.peak, float(np.abs(frames).max()))
+
+        if self.carry is not None and self.carry.shape[1] == frames.shape[1]: frames = np.concatenate((self.carry, frames))
+        whole = len(frames) // self.size * self.size
+        self.carry = frames[whole:]
+        if not whole: return
+        blocks = frames[:whole].reshape(-1, self.size, frames.shape[1])
+        spectrum = np.fft.rfft(blocks, axis=1)
+        # Parseval: the mean square of a K-weighted sub-block, summed over the channels
+        self.powers.append((np.abs(spectrum) ** 2 * self.weights[None, :, None]).sum(axis=(1, 2)) / self.size ** 2)
+
+    def result(self) -> tuple[float, float] | None:
+        '''
+        ## result
+        ##### returns the gated integrated loudness in LUFS and the sample peak, or None for a song without sound
+        '''
+        if not self.powers: return None
+        powers = np.concatenate(self.powers)
+        if len(powers) < 4: blocks = powers[None].mean(axis=1)
+        else: blocks = np.lib.stride_tricks.sliding_window_view(powers, 4).mean(axis=1)
+        with np.errstate(divide='ignore'): levels = -0.691 + 10 * np.log10(blocks)
+        gated = blocks[levels > ABSOLUTE_GATE]
+        if not len(gated): return None
+        relative = -0.691 + 10 * math.log10(gated.mean()) + RELATIVE_GATE
+        gated = blocks[levels > max(ABSOLUTE_GATE, relative)]
+        return -0.691 + 10 * math.log10(gated.mean()), self.peak
+
+
+def gain_of(loudness: float, peak: float) -> float:
+    '''
+    ## gain_of
+    ##### returns the gain in dB which brings a song to the reference loudness, lowered if it would make its peak clip
+    ---
+    ## Parameters
+    - loudness [float]: the integrated loudness in LUFS
+    - peak [float]: the sample peak, 1 being full scale
+    '''
+    gain = REFERENCE_LUFS - loudness
+    if peak > 0: gain = min(gain, -20 * math.log10(peak))
+    return gain
+
+
+def lower_priority():
+    '''
+    ## lower_priority
+    ##### makes the process an idle priority one, so the analysis never competes with playback or the UI
+    '''
+    if sys.platform == 'win32':
+        import ctypes
+        # BELOW_NORMAL_PRIORITY_CLASS
+        ctypes.windll.kernel32.SetPriorityClass(ctypes.windll.kernel32.GetCurrentProcess(), 0x4000)
+    else:
+        try: os.nice(10)
+        except OSError: pass
+
+
+def analyze(path: str) -> tuple[float, float] | None:
+    '''
+    ## analyze
+    ##### decodes a song and measures it, runs in a worker process
+    ---
+    ## Parameters
+    - path [str]: the path of the mp3 file
+    '''
+    from decoder import decode_file
+    meter = Loudness_Meter()
+    if not decode_file(path, meter.add): return None
+    return meter.result()
+
+
+class Loudness_Analyzer(QObject):
+    '''
+    # Loudness_Analyzer
+    #### Measures the loudness of every song of the library in a pool of low priority processes, one per core, and keeps the results per file
+    The results are keyed by the modification time and size of the file, and written while the analysis runs, so it resumes where it stopped.
+    The workers are spawned instead of forked, a fork of the running QApplication would inherit its threads and display connection.
+    ---
+    ## Parameters
+    - parent [QObject]: The QObject which owns the analyzer
+    - path [str]: The path of the file which keeps the results
+    - workers [int]: How many processes analyze at once, defaults to the number of cores
+
+    ## Signals
+    - analyzed [Song]: a song got its gain from a new result
+    - checked: the songs of a start got their known gain
+    '''
+    analyzed = Signal(object)
+    checked = Signal()
+    measured = Signal(str, object, object)
+    stale_found = Signal(object)
+
+    def __init__(self, parent: QObject = None, path: str = LOUDNESS_INDEX, workers: int = None) -> None:
+        super().__init__(parent)
+        self.path = path
+        self.workers = workers or os.cpu_count() or 1
+        # song path -> (mtime, size, loudness, peak), loudness None if the song couldn't be measured
+        self.results: dict[str, tuple] = {}
+        self.songs: dict[str, Song] = {}
+        self.pool: ProcessPoolExecutor = None
+        # stats the songs of a start, so a library of 100k songs isn't walked on the GUI thread
+        self.checker: ThreadPoolExecutor = None
+        self.futures: dict[str, Future] = {}
+        # songs waiting for a worker, with the key of their file
+        self.waiting: deque[tuple[Song, tuple[int, int]]] = deque()
+
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(SAVE_MS)
+        self.save_timer.timeout.connect(self.save)
+        self.measured.connect(self.on_measured)
+        self.stale_found.connect(self.on_stale)
+
+        try:
+            with open(path, 'rb') as f: version, results = marshal.loads(f.read())
+            if version == LOUDNESS_VERSION: self.results = results
+        except (OSError, ValueError, EOFError, TypeError): pass
+
+    def save(self):
+        '''
+        save
+        ---
+        writes the results with atomic_write
+        '''
+        self.save_timer.stop()
+        atomic_write(self.path, marshal.dumps((LOUDNESS_VERSION, self.results)))
+
+    def start(self, songs: Sequence[Song]):
+        '''
+        ## start
+        ##### gives every song its known gain and starts analyzing the ones which are new or changed, the files are looked at on a worker thread
+        ---
+        ## Parameters
+        - songs [Sequence[Song]]: the songs of the library, a lazy Song_List is built on the worker
+        '''
+        if self.checker is None: self.checker = ThreadPoolExecutor(1)
+        future = self.checker.submit(self.check, songs)
+        future.add_done_callback(lambda future: self.stale_found.emit(None if future.cancelled() or future.exception() else future.result()))
+
+    def check(self, songs: Sequence[Song]) -> list[tuple[Song, tuple[int, int]]]:
+        '''
+        ## check
+        ##### gives the songs whose file didn't change their known gain and returns the others with the key of their file, runs on a worker thread
+        ---
+        ## Parameters
+        - songs [Sequence[Song]]: the songs to look at, a song whose row left the index meanwhile is skipped
+        '''
+        stale = []
+        i = 0
+        while True:
+            try: song = songs[i]
+            except IndexError: break
+            except KeyError:
+                i += 1
+                continue
+            i += 1
+            try: stat = os.stat(song.path)
+            except OSError: continue
+            key = (stat.st_mtime_ns, stat.st_size)
+            result = self.results.get(song.path)
+            if result is None or result[:2] != key: stale.append((song, key))
+            elif result[2] is not None: song.gain = gain_of(*result[2:])
+        return stale
+
+    def on_stale(self, stale: list[tuple[Song, tuple[int, int]]] | None):
+        '''
+        ## on_stale
+        ##### queues the songs a check found new or changed on the GUI thread, and tells that the others got their gain
+        ---
+        ## Parameters
+        - stale [list[tuple[Song, tuple[int, int]]] | None]: the songs with the key of their file, None if the check failed
+        '''
+        # a check which was still running when the analyzer stopped is dropped
+        if self.checker is None: return
+        for song, key in stale or ():
+            if song.path in self.songs: continue
+            self.songs[song.path] = song
+            self.waiting.append((song, key))
+        self.checked.emit()
+        if self.waiting: self.submit()
+
+    def submit(self):
+        '''
+        submit
+        ---
+        hands waiting songs to the pool until every worker has IN_FLIGHT_PER_WORKER of them
+        '''
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'), initializer=lower_priority)
+        while self.waiting and len(self.futures) < self.workers * IN_FLIGHT_PER_WORKER:
+            song, key = self.waiting.popleft()
+            future = self.futures[song.path] = self.pool.submit(analyze, song.path)
+            future.add_done_callback(lambda future, path=song.path, key=key: self.measured.emit(path, key, None if future.cancelled() or future.exception() else future.result()))
+
+    def on_measured(self, path: str, key: tuple[int, int], result: tuple[float, float] | None):
+        '''
+        ## on_measured
+        ##### stores the result of a worker on the GUI thread and gives the song its gain
+        ---
+        ## Parameters
+        - path [str]: the path of the mp3 file
+        - key [tuple[int, int]]: the modification time and size the file had when it was analyzed
+        - result [tuple[float, float] | None]: the loudness and peak, None if it couldn't be measured
+        '''
+        future = self.futures.pop(path, None)
+        if future is None or future.cancelled(): return
+        song = self.songs.pop(path, None)
+        self.submit()
+        self.results[path] = (*key, *(result or (None, None)))
+        if song is not None and result is not None:
+            song.gain = gain_of(*result)
+            self.analyzed.emit(song)
+        if not self.save_timer.isActive(): self.save_timer.start()
+
+    def stop(self):
+        '''
+        stop
+        ---
+        cancels the songs which weren't analyzed yet and keeps the results so far, the next start picks up from there
+        '''
+        self.waiting.clear()
+        if self.checker is not None:
+            self.checker.shutdown(wait=False, cancel_futures=True)
+            self.checker = None
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+        self.futures.clear()
+        self.songs.clear()
+        self.save()
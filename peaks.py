@@ -0,0 +1,156 @@
+from __future__ import annotations
+import hashlib, io, marshal, os
+import numpy as np
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from core import atomic_write
+from decoder import decode_file
+from library import CACHE_DIR
+
+
+PEAKS_DIR = os.path.join(CACHE_DIR, 'peaks')
+PEAKS_INDEX = os.path.join(PEAKS_DIR, 'peaks.idx')
+PEAKS_VERSION = 1
+# a peak file holds PEAK_COUNT (min, max) pairs as int8, 2 KB per song
+PEAK_COUNT = 1000
+# the decoded audio is first reduced to the min/max of every BLOCK frames, then those blocks are binned into PEAK_COUNT peaks
+BLOCK = 1024
+
+
+class Peak_Cache(QObject):
+    '''
+    # Peak_Cache
+    #### Decodes every song once on a worker thread into a small file of min/max peaks, which later plays memory-map instead of decoding again
+    The index maps the path of a song to the modification time and size it had when its peaks were made, so an edited song is decoded again.
+    ---
+    ## Parameters
+    - parent [QObject]: The QObject which owns the cache
+    - cache_dir [str]: The folder which holds the peak files and their index
+    '''
+    ready = Signal(str, object)
+    decoded = Signal(str, object, object)
+
+    def __init__(self, parent: QObject = None, cache_dir: str = PEAKS_DIR) -> None:
+        super().__init__(parent)
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, os.path.basename(PEAKS_INDEX))
+        # song path -> (mtime, size, peak file name)
+        self.index: dict[str, tuple[int, int, str]] = {}
+        self.pending: set[str] = set()
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+
+        os.makedirs(cache_dir, exist_ok=True)
+        try:
+            with open(self.index_path, 'rb') as f: version, index = marshal.loads(f.read())
+            if version == PEAKS_VERSION: self.index = index
+        except (OSError, ValueError, EOFError, TypeError): pass
+        self.decoded.connect(self.on_decoded)
+
+    def get(self, path: str) -> np.ndarray | None:
+        '''
+        ## get
+        ##### Returns the memory-mapped peaks of a song if they are cached and still match the file, else starts decoding it and returns None. The ready signal is emitted once it is decoded.
+        ---
+        ## Parameters
+        - path [str]: the path of the mp3 file
+        '''
+        try: stat = os.stat(path)
+        except OSError: return None
+        entry = self.index.get(path)
+        if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+            try: return np.load(os.path.join(self.cache_dir, entry[2]), mmap_mode='r')
+            except (OSError, ValueError): pass
+        if path not in self.pending:
+            self.pending.add(path)
+            self.pool.start(Peak_Decoder(self, path, (stat.st_mtime_ns, stat.st_size)))
+        return None
+
+    def on_decoded(self, path: str, stat: tuple[int, int], peaks: np.ndarray | None):
+        '''
+        ## on_decoded
+        ##### Stores the peaks a worker made and records them in the index
+        ---
+        ## Parameters
+        - path [str]: the path of the mp3 file
+        - stat [tuple[int, int]]: the modification time and size the file had when it was decoded
+        - peaks [np.ndarray | None]: the peaks, None if the song couldn't be decoded
+        '''
+        self.pending.discard(path)
+        if peaks is None: return
+        name = f'{hashlib.sha1(os.path.abspath(path).encode()).hexdigest()}.npy'
+        buffer = io.BytesIO()
+        np.save(buffer, peaks)
+        # the peaks are shown even if they couldn't be kept, the song is decoded again next time
+        try:
+            atomic_write(os.path.join(self.cache_dir, name), buffer.getvalue())
+            self.index[path] = (*stat, name)
+            atomic_write(self.index_path, marshal.dumps((PEAKS_VERSION, self.index)))
+        except OSError: pass
+        self.ready.emit(path, peaks)
+
+
+def reduce_frames(frames: np.ndarray, carry: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    '''
+    ## reduce_frames
+    ##### reduces decoded frames to the min and max of every BLOCK frames, mixed down to mono
+    ---
+    ## Parameters
+    - frames [np.ndarray]: the decoded audio, one column per channel
+    - carry [np.ndarray]: the frames of the previous buffer which didn't fill a whole block
+
+    ## Returns
+    - the mins, the maxs and the frames left over for the next buffer
+    '''
+    lows, highs = frames.min(axis=1), frames.max(axis=1)
+    if carry.shape[1]:
+        lows, highs = np.concatenate((carry[0], lows)), np.concatenate((carry[1], highs))
+    whole = len(lows) // BLOCK * BLOCK
+    carry = np.stack((lows[whole:], highs[whole:]))
+    return lows[:whole].reshape(-1, BLOCK).min(axis=1), highs[:whole].reshape(-1, BLOCK).max(axis=1), carry
+
+
+def bin_peaks(lows: np.ndarray, highs: np.ndarray, count: int = PEAK_COUNT) -> np.ndarray:
+    '''
+    ## bin_peaks
+    ##### bins the block peaks of a whole song into count (min, max) pairs of int8
+    '''
+    if not len(lows): return np.zeros((count, 2), np.int8)
+    starts = np.linspace(0, len(lows), count, endpoint=False).astype(np.intp)
+    peaks = np.stack((np.minimum.reduceat(lows, starts), np.maximum.reduceat(highs, starts)), axis=1)
+    return np.clip(np.round(peaks * 127), -127, 127).astype(np.int8)
+
+
+class Peak_Decoder(QRunnable):
+    '''
+    # Peak_Decoder
+    #### Decodes one song on a worker thread and reduces it to peaks as the buffers arrive, so the whole song is never held in memory
+    ---
+    ## Parameters
+    - cache [Peak_Cache]: The Peak_Cache which receives the peaks
+    - path [str]: The path of the mp3 file
+    - stat [tuple[int, int]]: The modification time and size of the file
+    '''
+    def __init__(self, cache: Peak_Cache, path: str, stat: tuple[int, int]) -> None:
+        super().__init__()
+        self.cache = cache
+        self.path = path
+        self.stat = stat
+
+    def run(self):
+        '''
+        run
+        ---
+        Decodes the song and hands the peaks back to the GUI thread
+        '''
+        lows, highs = [], []
+        carry = np.empty((2, 0), np.float32)
+
+        def on_frames(frames: np.ndarray, rate: int):
+            nonlocal carry
+            low, high, carry = reduce_frames(frames, carry)
+            lows.append(low)
+            highs.append(high)
+
+        peaks = None if not decode_file(self.path, on_frames) else bin_peaks(np.concatenate(lows or [np.empty(0, np.float32)]), np.concatenate(highs or [np.empty(0, np.float32)]))
+        self.cache.decoded.emit(self.path, self.stat, peaks)
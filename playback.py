@@ -0,0 +1,275 @@
+from __future__ import annotations
+from functools import partial
+from math import cos, pi, sin
+from time import perf_counter
+from PySide6.QtCore import QObject, QTimer
+from PySide6.QtMultimedia import QAudioBufferOutput, QAudioDevice, QAudioOutput, QMediaPlayer
+from core import Media_Backend, metrics
+from library import Song
+
+
+MAX_CROSSFADE_MS = 12000
+# the gains of a crossfade are stepped at this interval, a step sets two volumes, so a fade costs the UI thread 20 calls a second at most
+FADE_STEP_MS = 50
+
+
+class Preload_Engine(Media_Backend):
+    '''
+    # Preload_Engine
+    #### Owns two QMediaPlayer/QAudioOutput pairs. The active pair plays the current song while the standby pair keeps the upcoming song loaded, so that a song change is a swap instead of a load.
+    With a crossfade the outgoing pair keeps playing after a swap while the gains of both ramp over crossfade_ms. The ramp is a function of the time since the swap, stepped every FADE_STEP_MS.
+    The end of a song is not polled for: when the active player starts, resumes or seeks, one timer is set to when the remaining time reaches crossfade_ms and then ending is emitted.
+    ---
+    ## Parameters
+    - parent [QObject]: The QObject which owns the players
+    '''
+    def __init__(self, parent: QObject = None) -> None:
+        super().__init__(parent)
+        pairs = []
+        for _ in range(2):
+            audio_output = QAudioOutput(self)
+            player = QMediaPlayer(self)
+            player.setAudioOutput(audio_output)
+            audio_output.setVolume(100)
+            player.mediaStatusChanged.connect(partial(self.on_status, player))
+            player.positionChanged.connect(partial(self.on_position, player))
+            player.playbackStateChanged.connect(partial(self.on_state, player))
+            player.durationChanged.connect(partial(self.on_state, player))
+            pairs.append((player, audio_output))
+
+        (self.player, self.audio_output), (self.standby, self.standby_output) = pairs
+        self.song: Song = None
+        self.standby_song: Song = None
+        # the volume picked by the user, each output plays at it times the gain of its song
+        self.level = 1.0
+
+        # time of the last song change, until the new song's position starts moving
+        self.switch_time: float = None
+        self.last_latency: float = None
+        # taps the audio of the active player, e.g. for the spectrum, created the first time it is asked for
+        self.tap_output: QAudioBufferOutput = None
+        self.tapping = False
+
+        self.crossfade_ms = 0
+        # set to when the active song is crossfade_ms from its end
+        self.end_timer = QTimer(self)
+        self.end_timer.setSingleShot(True)
+        self.end_timer.timeout.connect(self.on_end_timer)
+        self.fade_timer = QTimer(self)
+        self.fade_timer.setInterval(FADE_STEP_MS)
+        self.fade_timer.timeout.connect(self.step_fade)
+        # the outgoing player while a crossfade runs, the time it started and the song to preload once it is over
+        self.fading: QMediaPlayer = None
+        self.fade_start = 0.0
+        self.pending_preload: Song = None
+
+    def on_status(self, player: QMediaPlayer, status: QMediaPlayer.MediaStatus):
+        '''
+        ## on_status
+        ##### reports when the active player loaded or ended its song, the standby player loads silently
+        '''
+        if player is not self.player: return
+        if status == QMediaPlayer.MediaStatus.LoadedMedia: self.loaded.emit()
+        elif status == QMediaPlayer.MediaStatus.EndOfMedia: self.ended.emit()
+
+    def on_position(self, player: QMediaPlayer, position: int):
+        '''
+        ## on_position
+        ##### forwards the position of the active player and measures the click-to-audio latency of the last song change
+        '''
+        if player is not self.player: return
+        if self.switch_time is not None and position > 0:
+            self.last_latency = (perf_counter() - self.switch_time) * 1000
+            self.switch_time = None
+            metrics.record('song change to audible', self.last_latency)
+            self.latency_measured.emit(self.last_latency)
+        self.positionChanged.emit(position)
+
+    def on_state(self, player: QMediaPlayer, *_):
+        '''
+        ## on_state
+        ##### sets the end timer again when the active player starts, pauses or learns its duration
+        '''
+        if player is self.player: self.schedule_end()
+
+    def schedule_end(self, position: int = None):
+        '''
+        ## schedule_end
+        ##### sets the end timer to when the active song is crossfade_ms from its end, songs shorter than that or paused ones get no timer
+        ---
+        ## Parameters
+        - position [int]: the position the song is at, by default the player's. A seek passes its target, which the player only reports later.
+        '''
+        self.end_timer.stop()
+        if not self.crossfade_ms or not self.player.isPlaying(): return
+        if position is None: position = self.player.position()
+        remaining = self.player.duration() - position
+        if remaining > self.crossfade_ms: self.end_timer.start(remaining - self.crossfade_ms)
+
+    def on_end_timer(self):
+        if self.player.isPlaying(): self.ending.emit()
+
+    def set_crossfade(self, ms: int):
+        '''
+        ## set_crossfade
+        ##### sets how long the outgoing and the incoming song overlap, 0 cuts between them
+        ---
+        ## Parameters
+        - ms [int]: the length of the crossfade in milliseconds, up to MAX_CROSSFADE_MS
+        '''
+        self.crossfade_ms = min(max(ms, 0), MAX_CROSSFADE_MS)
+        if not self.crossfade_ms: self.finish_fade()
+        self.schedule_end()
+
+    def step_fade(self):
+        '''
+        step_fade
+        ---
+        sets both gains for the time since the crossfade started, equal power so the overlap is not louder or quieter than either song
+        '''
+        progress = min((perf_counter() - self.fade_start) * 1000 / self.crossfade_ms, 1.0) if self.crossfade_ms else 1.0
+        if progress >= 1.0: return self.finish_fade()
+        self.audio_output.setVolume(self.volume_for(self.song) * sin(progress * pi / 2))
+        self.standby_output.setVolume(self.volume_for(self.standby_song) * cos(progress * pi / 2))
+
+    def finish_fade(self, preload: bool = True):
+        '''
+        ## finish_fade
+        ##### ends a running crossfade: stops the outgoing player and gives both outputs their full volume back
+        ---
+        ## Parameters
+        - preload [bool]: whether the song which waited for the outgoing player is loaded into it now
+        '''
+        if self.fading is None: return
+        self.fade_timer.stop()
+        self.fading = None
+        self.standby.stop()
+        self.audio_output.setVolume(self.volume_for(self.song))
+        self.standby_output.setVolume(self.volume_for(self.standby_song))
+        song, self.pending_preload = self.pending_preload, None
+        if preload: self.preload(song)
+
+    def preload(self, song: Song):
+        '''
+        ## preload
+        ##### loads a song into the standby player so that it can be swapped in instantly
+        ---
+        ## Parameters
+        - song [Song]: the song which will most likely be played next
+        '''
+        if self.fading is not None:
+            self.pending_preload = song
+            return
+        if song is None or song is self.standby_song: return
+        self.standby_song = song
+        self.standby.setSource(song.url)
+        self.standby_output.setVolume(self.volume_for(song))
+
+    def set_song(self, song: Song, play: bool = True) -> bool:
+        '''
+        ## set_song
+        ##### changes the song of the active player, swapping in the standby player if it already holds the song.
+        ##### A swap while a song plays crossfades into the new one, when a crossfade is set.
+        ---
+        ## Parameters
+        - song [Song]: the song to play
+        - play [bool]: whether a swapped in song starts playing right away
+
+        ## Returns
+        - True if the song was swapped in, False if it is loading and loaded will follow
+        '''
+        self.finish_fade(preload=False)
+        self.switch_time = perf_counter() if play else None
+        if song is self.standby_song and self.standby.mediaStatus() in (QMediaPlayer.MediaStatus.LoadedMedia, QMediaPlayer.MediaStatus.BufferedMedia):
+            self.player, self.standby = self.standby, self.player
+            self.audio_output, self.standby_output = self.standby_output, self.audio_output
+            # the outgoing player keeps its song loaded, which makes going back to it a swap as well
+            self.song, self.standby_song = song, self.song
+            if self.tapping:
+                self.standby.setAudioBufferOutput(None)
+                self.player.setAudioBufferOutput(self.tap_output)
+            fade = play and self.crossfade_ms > 0 and self.standby.isPlaying()
+            self.player.setPosition(0)
+            if fade:
+                self.fading = self.standby
+                self.fade_start = perf_counter()
+                self.audio_output.setVolume(0)
+                self.fade_timer.start()
+            if play: self.player.play()
+            if not fade: self.standby.stop()
+            return True
+
+        self.song = song
+        self.player.setSource(song.url)
+        self.audio_output.setVolume(self.volume_for(song))
+        return False
+
+    def play(self): self.player.play()
+    def is_playing(self) -> bool: return self.player.isPlaying()
+    def position(self) -> int: return self.player.position()
+    def duration(self) -> int: return self.player.duration()
+
+    def pause(self):
+        self.finish_fade()
+        self.player.pause()
+
+    def set_position(self, position: int):
+        self.finish_fade()
+        self.player.setPosition(position)
+        self.schedule_end(position)
+
+    def volume_for(self, song: Song | None) -> float:
+        '''
+        ## volume_for
+        ##### returns the volume an output plays a song at: the user's volume with the song's loudness gain applied
+        ---
+        ## Parameters
+        - song [Song | None]: the song of the output
+        '''
+        if song is None: return self.level
+        return min(1.0, self.level * 10 ** (song.gain / 20))
+
+    def set_volume(self, level: float):
+        '''
+        ## set_volume
+        ##### sets the volume of both audio outputs, so a swapped in song plays as loud as the one before
+        ---
+        ## Parameters
+        - level [float]: the volume between 0 and 1
+        '''
+        self.level = level
+        if self.fading is not None: return self.step_fade()
+        self.audio_output.setVolume(self.volume_for(self.song))
+        self.standby_output.setVolume(self.volume_for(self.standby_song))
+
+    def tap(self) -> QAudioBufferOutput:
+        '''
+        tap
+        ---
+        returns the output which receives the buffers of the active player while tapping is on
+        '''
+        if self.tap_output is None: self.tap_output = QAudioBufferOutput(self)
+        return self.tap_output
+
+    def set_tapping(self, tapping: bool):
+        '''
+        ## set_tapping
+        ##### attaches the tap to the active player, it moves along when the players swap. Without it no buffers are copied.
+        ---
+        ## Parameters
+        - tapping [bool]: whether the tap receives buffers
+        '''
+        self.tapping = tapping
+        self.standby.setAudioBufferOutput(None)
+        self.player.setAudioBufferOutput(self.tap() if tapping else None)
+
+    def set_device(self, device: QAudioDevice):
+        '''
+        ## set_device
+        ##### changes the speaker device of both players
+        ---
+        ## Parameters
+        - device [QAudioDevice]: the device which should play the music
+        '''
+        self.audio_output.setDevice(device)
+        self.standby_output.setDevice(device)
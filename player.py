@@ -1,38 +1,37 @@
 from __future__ import annotations
-import random, os, sys
-from pycaw.pycaw import AudioUtilities, ISimpleAudioVolume
-from PySide6.QtMultimedia import QAudioOutput, QMediaDevices, QMediaPlayer
-from PySide6.QtCore import QUrl, Qt, QTimer
-from PySide6.QtGui import QIcon, QGradient, QMouseEvent, QPainter, QFontDatabase, QAction, QPixmap, QPaintEvent
+from time import perf_counter
+STARTED = perf_counter()
+import os, sys
+if __name__ == '__main__':
+    # a second launch hands its arguments to the running player and exits before anything else is imported
+    from ipc import forward, parse_args
+    request = parse_args(sys.argv[1:])
+    if forward(request): sys.exit(0)
+from typing import Callable
+from PySide6.QtMultimedia import QAudioDevice, QMediaDevices
+from PySide6.QtCore import Qt, QTimer, QModelIndex, QStringListModel, Signal
+from PySide6.QtGui import QIcon, QGradient, QPainter, QFontDatabase, QAction, QPixmap, QPaintEvent
 from PySide6.QtWidgets import (QMainWindow, QFrame, QApplication, QLabel, QToolButton, QSlider,
-                            QComboBox, QMenu, QMenuBar, QScrollArea,
-                            QGraphicsDropShadowEffect, QCheckBox, QSystemTrayIcon, QWidget)
+                            QComboBox, QMenu, QMenuBar, QCheckBox, QSystemTrayIcon, QFileDialog, QMessageBox, QLineEdit, QCompleter, QSpinBox)
+from library import CACHE_DIR, Library_Index, Song
+from art_cache import Art_Cache
+from playback import MAX_CROSSFADE_MS, Preload_Engine
+from presets import Gradient_Background
+from waveform import Waveform_Slider
+from core import Play_Queue, Playback_Core, Rate_Counter, Startup_Profiler, Volume_Control, format_length, format_time, make_volume_backend, metrics
+from settings import SESSION_PLAYLIST, Settings
 
 
-PREF_FILE = 'assets\\preset_preference.txt'
-
-class Song:
-    '''
-    # Song 
-    #### Holds all the information: files' paths, and QUrl for the song
-    ---
-    ## Parameters 
-    - name [str]: The name of the song; is used to access all the various files, paths, & QUrl
-    '''
-    def __init__(self, name: str) -> None:
-        self.name: str = name
-        self.band: str = name # Will have a differnce between song name and band in VERSION 2
-        self.img: str = f'thumbnails\\{name}.jpg'
-        self.path: str = f'songs\\{name}.mp3'
-        self.url: QUrl = QUrl.fromLocalFile(self.path)
-
-        if not os.path.exists(self.img):
-            self.img = None
+# the import phase is timed from the top of this file, the flag decides whether the breakdown is printed
+profiler = Startup_Profiler(STARTED, '--profile-startup' in sys.argv)
+profiler.mark('imports')
+# --metrics records the hot paths, F12 shows them over the window, and they are written to METRICS_FILE or --metrics=<path> on quit
+METRICS_FILE = os.path.join(CACHE_DIR, 'metrics.json')
+metrics.enabled = any(arg == '--metrics' or arg.startswith('--metrics=') for arg in sys.argv)
 
 
-    def __repr__(self): return str(self)
-    def __str__(self): return f'{self.band}'
-
+# how many missing songs of a playlist are listed by name, the rest are counted
+MISSING_SHOWN = 20
 
 class Window(QMainWindow):
     '''
@@ -45,10 +44,18 @@ class Window(QMainWindow):
         self.setGeometry(width//2 - 600, height//2 - 300, 1200, 600)
         self.setWindowTitle('PulsePlay Music Player')
         self.setWindowIcon(QIcon('assets\\logo.ico'))
+        self.settings = Settings(self)
+        QApplication.instance().aboutToQuit.connect(lambda: self.settings.save(wait=True))
+        profiler.mark('window and fonts')
 
         self.audio_init()
+        profiler.mark('audio engine')
 
         self.preset: str | QGradient.Preset = ''
+        self.tray: QSystemTrayIcon = None
+        self.loudness = None
+        self.profiled = False
+        self.metrics_overlay: Metrics_Overlay = None
 
         self.load_attr()
 
@@ -76,7 +83,18 @@ class Window(QMainWindow):
         menu_bar.addMenu(preset_menu)
 
         self.setMenuBar(menu_bar)
+        profiler.mark('menus')
+
+        self.c_widget_handler()
+        profiler.mark('central widget')
 
+    def load_tray(self):
+        '''
+        load_tray
+        ---
+        Creates the tray icon and its menu. It isn't needed for the first frame, so it is created once the window is shown.
+        '''
+        if self.tray is not None: return
         self.tray = QSystemTrayIcon(QIcon('assets\\logo.ico'), self)
         menu = QMenu(self)
         for index, (name, func) in enumerate([['Quit', sys.exit], ['Show Window', self.show], ['Quit on Close', lambda: app.setQuitOnLastWindowClosed(not app.quitOnLastWindowClosed())]]):
@@ -89,7 +107,94 @@ class Window(QMainWindow):
         self.tray.setContextMenu(menu)
         self.tray.setVisible(True)
 
-        self.c_widget_handler()
+    def on_first_frame(self):
+        '''
+        on_first_frame
+        ---
+        Called when a new central widget painted its first frame, the deferred work runs right after it
+        '''
+        profiler.mark_first_frame()
+        QTimer.singleShot(0, self.load_deferred)
+
+    def load_deferred(self):
+        '''
+        load_deferred
+        ---
+        Runs the work which can wait until the first frame is shown: the tray icon, the waveforms and the loudness analysis of the songs
+        '''
+        self.load_tray()
+        self.load_metrics()
+        home = self.centralWidget()
+        if isinstance(home, Home_Page): home.controls.load_deferred()
+        if not self.profiled:
+            self.profiled = True
+            profiler.mark('deferred work')
+            if profiler.enabled: print(profiler.report(), flush=True)
+
+    def load_metrics(self):
+        '''
+        load_metrics
+        ---
+        With --metrics, creates the overlay behind F12 and writes the metrics to a JSON file on quit
+        '''
+        if not metrics.enabled or self.metrics_overlay is not None: return
+        self.metrics_overlay = Metrics_Overlay(self)
+        toggle = QAction('Metrics', self)
+        toggle.setShortcut('F12')
+        toggle.triggered.connect(self.metrics_overlay.toggle)
+        self.addAction(toggle)
+        path = next((arg.partition('=')[2] for arg in sys.argv if arg.startswith('--metrics=')), '') or METRICS_FILE
+        QApplication.instance().aboutToQuit.connect(lambda: metrics.dump(path))
+
+    def handle_request(self, request: dict[str, list[str]]):
+        '''
+        ## handle_request
+        ##### Runs the arguments of a launch, the player's own or ones forwarded by a later launch. A launch without any brings the window up.
+        ---
+        ## Parameters
+        - request [dict[str, list[str]]]: the commands, like next, and the files to play
+        '''
+        commands, files = request['commands'], request['files']
+        if 'show' in commands or not (commands or files):
+            self.showNormal()
+            self.raise_()
+            self.activateWindow()
+        controls = self.controls()
+        if controls is None: return
+        from playlists import PLAYLIST_EXTENSIONS
+        playlists = [path for path in files if path.lower().endswith(PLAYLIST_EXTENSIONS)]
+        if playlists: controls.load_playlist(playlists[-1])
+        songs = [path for path in files if path.lower().endswith('.mp3') and os.path.isfile(path)]
+        if songs: controls.play_files(songs, replace=False)
+        actions = {'play': controls.core.play, 'pause': controls.core.pause, 'play-pause': controls.core.play_pause,
+                   'stop': controls.core.stop, 'next': controls.core.next, 'previous': controls.core.previous}
+        for command in commands:
+            if command in actions: actions[command]()
+
+    def loudness_analyzer(self):
+        '''
+        loudness_analyzer
+        ---
+        Returns the Loudness_Analyzer, creating it the first time. Its NumPy and process pool imports are left out of startup.
+        '''
+        if self.loudness is None:
+            from loudness import Loudness_Analyzer
+            self.loudness = Loudness_Analyzer(self)
+            self.loudness.analyzed.connect(self.song_analyzed)
+            # the songs whose result was known got their gain on the analyzer's worker, set_volume applies it to the loaded ones
+            self.loudness.checked.connect(lambda: self.engine.set_volume(self.engine.level))
+            QApplication.instance().aboutToQuit.connect(self.loudness.stop)
+        return self.loudness
+
+    def song_analyzed(self, song: Song):
+        '''
+        ## song_analyzed
+        ##### applies the gain of a song which got analyzed while one of the players holds it, the others get it with their next load
+        ---
+        ## Parameters
+        - song [Song]: the song whose gain is now known
+        '''
+        if song is self.engine.song or song is self.engine.standby_song: self.engine.set_volume(self.engine.level)
 
     def c_widget_handler(self):
         '''
@@ -97,24 +202,84 @@ class Window(QMainWindow):
         ---
         Checks if a default preset is configured by the user and displays the main widget. Else, displays a widget which allows the user to pick a preset
         '''
-        with open(PREF_FILE, 'r') as f:
-            read = f.read()
-            if len(read) == 0:
-                self.scroll_area = QScrollArea()
-                self.scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
-                self.scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-                self.scroll_area.setWidget(Show_Presets(self))
-                self.setCentralWidget(self.scroll_area)
-            else:
-                self.setCentralWidget(Home_Page(self, getattr(QGradient.Preset, read)))
+        preset = getattr(QGradient.Preset, self.settings.preset, None) if self.settings.preset else None
+        if preset is None:
+            # the gallery is only shown until a preset is saved as default
+            from presets import Show_Presets
+            gallery = Show_Presets(self)
+            gallery.first_frame.connect(lambda ms: self.on_first_frame())
+            gallery.chosen.connect(self.set_preset)
+            self.setCentralWidget(gallery)
+        else:
+            self.setCentralWidget(Home_Page(self, preset))
+
+    def set_preset(self, preset: QGradient.Preset):
+        '''
+        ## set_preset
+        ##### Sets the preset picked in the gallery onto the window
+        ---
+        ## Parameters
+        - preset [QGradient.Preset]: the picked preset
+        '''
+        home_pg = Home_Page(self, preset)
+        self.setCentralWidget(home_pg)
+        home_pg.controls.update_song_info()
+
+    def controls(self) -> Controls | None:
+        '''
+        controls
+        ---
+        Returns the controls of the home page, None while the preset gallery is shown
+        '''
+        home = self.centralWidget()
+        return home.controls if isinstance(home, Home_Page) else None
+
+    def open(self):
+        '''
+        open
+        ---
+        Plays a song picked by the user right away, a playlist picked here is opened like with Open Playlist
+        '''
+        if self.controls() is None: return
+        path, _ = QFileDialog.getOpenFileName(self, 'Open', '', 'Songs and Playlists (*.mp3 *.m3u *.m3u8 *.pls)')
+        if not path: return
+        from playlists import PLAYLIST_EXTENSIONS
+        if path.lower().endswith(PLAYLIST_EXTENSIONS): self.controls().load_playlist(path)
+        else: self.controls().play_files([path], replace=False)
+
+    def save(self):
+        '''
+        save
+        ---
+        Saves the songs of the play order to an M3U8 or PLS playlist
+        '''
+        if self.controls() is None: return
+        path, _ = QFileDialog.getSaveFileName(self, 'Save Playlist', '', 'M3U8 Playlist (*.m3u8);;PLS Playlist (*.pls)')
+        if path: self.controls().save_playlist(path)
 
     # The Following functions are not implemented yet, and will be added later. 
 
-    def open(self): raise NotImplementedError("WILL WORK IN VERSION 2")
-    def save(self): raise NotImplementedError("WILL WORK IN VERSION 2")
     def close(self): raise NotImplementedError("WILL WORK IN VERSION 2")
-    def open_multiple_files(self): raise NotImplementedError("WILL WORK IN VERSION 2")
-    def open_playlist(self): raise NotImplementedError("WILL WORK IN VERSION 2")
+
+    def open_multiple_files(self):
+        '''
+        open_multiple_files
+        ---
+        Replaces the play order with the songs picked by the user and plays the first one
+        '''
+        if self.controls() is None: return
+        paths, _ = QFileDialog.getOpenFileNames(self, 'Open Multiple Files', '', 'Songs (*.mp3)')
+        if paths: self.controls().play_files(paths, replace=True)
+
+    def open_playlist(self):
+        '''
+        open_playlist
+        ---
+        Replaces the play order with the songs of an M3U, M3U8 or PLS playlist, the first one plays as soon as it is read
+        '''
+        if self.controls() is None: return
+        path, _ = QFileDialog.getOpenFileName(self, 'Open Playlist', '', 'Playlists (*.m3u *.m3u8 *.pls)')
+        if path: self.controls().load_playlist(path)
 
     def save_as_default(self):
         '''
@@ -122,9 +287,9 @@ class Window(QMainWindow):
         ---
         This function sets the current preset as the default, so that the program will automatically load this on startup.
         '''
-        with open(PREF_FILE, 'a+') as pref:
-            pref.truncate()
-            pref.write(self.preset.name)
+        if not self.preset: return
+        self.settings.set('preset', self.preset.name)
+        self.settings.save()
 
     def change_preset(self):
         '''
@@ -132,12 +297,14 @@ class Window(QMainWindow):
         ---
         This function removes the current default preset and allows the user to pick another preset
         '''
-        with open(PREF_FILE, 'w+') as pref: pref.truncate()
-        
+        self.settings.set('preset', '')
+        self.settings.save()
+
         self.preset = ''
         self.c_widget_handler()
 
-        self.player.pause()
+        self.engine.pause()
+        self.engine.set_tapping(False)
 
     def audio_init(self):
         '''
@@ -145,91 +312,7 @@ class Window(QMainWindow):
         ---
         This function creates the instances which allow for the music to be played. 
         '''
-        self.audio_output = QAudioOutput(self)
-        self.player = QMediaPlayer(self)
-        self.player.setAudioOutput(self.audio_output)
-        self.audio_output.setVolume(100)
-
-
-class Show_Presets(QWidget):
-    '''
-    # Show_Presets
-    #### Shows all the presets and their preview, so that the user can pick the prefered preset.
-    ---
-    ## Parameters
-    - win [Window]: The Window instance which holds all the static elements of the window.
-    '''
-    def __init__(self, win: Window):
-        super().__init__(win)
-        self.setGeometry(0, 0, 1180, len(list(QGradient.Preset.__members__.values()))//((win.width()-100)//240)*260+50)
-        x, y = 100, 50
-        for preset in list(QGradient.Preset.__members__.values())[:-1]:
-            Preset_Preview(self, getattr(QGradient.Preset, preset.name), x, y, win)
-            x += 260
-            if x + 240 > self.width():
-                x = 100
-                y += 260
-
-
-class Preset_Preview(QFrame):
-    '''
-    # Preset_Preview
-    #### Creates one preset preview
-    --- 
-    ## Parameters
-    - sh_p [Show_Presets]: The Show_Presets instance which the Preset Preview will be displayed on.
-    - preset [QGradient.Preset]: The QGradient Preset that this Preset Preview will show.
-    - x_pos [int]: The X-Pos of this preview on the screen.
-    - y_pos [int]: The Y-Pos of this preview on the screen.
-    - win [Window]: The Window instance which is used to set the selected preset onto the window.
-    '''
-    def __init__(self, sh_p: Show_Presets, preset: QGradient.Preset, x_pos: int, y_pos: int, win: Window):
-        super().__init__(sh_p)
-        self.win = win
-        shadow = QGraphicsDropShadowEffect(self)
-        shadow.setBlurRadius(20)
-        shadow.setOffset(0)
-
-        self.setGeometry(x_pos, y_pos, 200, 200)
-        self.setStyleSheet('background-color: white; border-radius: 5px; border: 1px solid black;')
-        self.setGraphicsEffect(shadow)
-
-        self.preset = preset
-
-        self.load_attr()
-
-    def load_attr(self):
-        '''
-        load_attr
-        ---
-        Creates the label of the name of the preset
-        '''
-        lbl = QLabel(f'{self.preset.name} {self.preset.value}', self)
-        lbl.setGeometry(1, 1, self.width()-2, 22)
-        lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        lbl.setStyleSheet('border: none; font-size: 20px; font-family: Space Grotesk;')
-
-    def paintEvent(self, event: QPaintEvent):
-        '''
-        paintEvent
-        ---
-        Creates a small preview of the preset
-        '''
-        p = QPainter(self)
-        p.setBrush(QGradient(self.preset))
-        p.drawEllipse(self.width()/4, self.height()/4 + 10, self.width()/2, self.height()/2)
-        return super().paintEvent(event)
-    
-    def mousePressEvent(self, event: QMouseEvent) -> None:
-        '''
-        mousePressEvent
-        ---
-        Sets the selected preview to the window
-        '''
-        home_pg = Home_Page(self.win, self.preset)
-        window.setCentralWidget(home_pg)
-        home_pg.controls.update_song_info()
-        return super().mousePressEvent(event)
+        self.engine = Preload_Engine(self)
 
 
 class Home_Page(QFrame):
@@ -247,18 +330,35 @@ class Home_Page(QFrame):
         self.preset = QGradient(preset)
         win.preset = preset
         self.setGeometry(0,0, win.width(), win.height())
+
+        # the cached background covers the whole page, so Qt doesn't need to paint anything under it
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
+        self.background = Gradient_Background(preset)
+        self.paint_rate = Rate_Counter()
+        # the metrics overlay shows this counter rather than counting the paints again
+        metrics.watch('home page paint', self.paint_rate)
+        self.painted = False
+
         self.song_info = Song_Info(self)
-        self.controls = Controls(self, win.audio_output, win.player, (self.preset.stops()[0][1].toTuple(), self.preset.stops()[-1][1].toTuple()))
+        self.controls = Controls(self, win.engine, (self.preset.stops()[0][1].toTuple(), self.preset.stops()[-1][1].toTuple()))
 
-    def paintEvent(self, event) -> None:
+    def paintEvent(self, event: QPaintEvent) -> None:
         '''
         paintEvent
         ---
-        paints the supplied preview to the Home_Page
+        paints the supplied preview to the Home_Page. The gradient is only rendered again when the size changes, 
+        every other paint, like the ones under a moving slider, copies the damaged rect from the cache.
         '''
+        self.paint_rate.tick()
+        start = metrics.start()
+        self.background.render(self.size(), self.parent_win.size(), self.devicePixelRatioF())
         painter = QPainter(self)
-        painter.setBrush(self.preset)
-        painter.drawRect(0, 0, self.parent_win.width(), self.parent_win.height())
+        self.background.paint(painter, event.rect())
+        painter.end()
+        metrics.stop('home page paint', start)
+        if not self.painted:
+            self.painted = True
+            self.parent_win.on_first_frame()
         return super().paintEvent(event)
 
 class Song_Info(QFrame):
@@ -295,46 +395,308 @@ class Song_Info(QFrame):
         self.band_name.setStyleSheet('font-size: 15px; font-family: Space Grotesk;')
         self.band_name.setWordWrap(True)
 
+class Device_List(QComboBox):
+    '''
+    # Device_List
+    #### The list of speaker devices. Enumerating them is slow, so it is only done the first time the list is opened.
+    ---
+    ## Parameters
+    - parent [QWidget]: the widget which holds the list
+    '''
+    def __init__(self, parent: QFrame) -> None:
+        super().__init__(parent)
+        self.devices = []
+        self.setPlaceholderText('Default Device')
+
+    def fill(self):
+        '''
+        fill
+        ---
+        enumerates the speaker devices the first time they are needed
+        '''
+        if self.devices: return
+        self.devices = QMediaDevices.audioOutputs()
+        for device in self.devices: self.addItem(device.description())
+
+    @staticmethod
+    def id_of(device: QAudioDevice) -> str:
+        '''
+        id_of
+        ---
+        returns the id of a speaker device as hex, the way it is kept in the settings
+        '''
+        return device.id().toHex().data().decode()
+
+    def showPopup(self):
+        '''
+        showPopup
+        ---
+        fills the list with the speaker devices before it opens for the first time, with the default device selected unless one was picked
+        '''
+        if not self.devices:
+            self.fill()
+            if self.currentIndex() == -1: self.select(self.id_of(QMediaDevices.defaultAudioOutput()))
+        super().showPopup()
+
+    def select(self, device_id: str) -> QAudioDevice | None:
+        '''
+        ## select
+        ##### fills the list and selects a device, like the one of the last session
+        ---
+        ## Parameters
+        - device_id [str]: the hex id of the device
+
+        ## Returns
+        - the device, None if it isn't plugged in
+        '''
+        self.fill()
+        ids = [self.id_of(device) for device in self.devices]
+        if device_id not in ids: return None
+        self.setCurrentIndex(ids.index(device_id))
+        return self.devices[ids.index(device_id)]
+
+
+class Metrics_Overlay(QLabel):
+    '''
+    # Metrics_Overlay
+    #### Shows the latency histograms and event rates over the window, refreshed once a second while it is shown
+    ---
+    ## Parameters
+    - parent [QWidget]: the window it is shown over
+    '''
+    def __init__(self, parent: QMainWindow) -> None:
+        super().__init__(parent)
+        self.setStyleSheet('font-size: 11px; font-family: Consolas, monospace; color: white; background-color: rgba(0, 0, 0, 170); padding: 6px;')
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.hide()
+        self.timer = QTimer(self)
+        self.timer.setInterval(1000)
+        self.timer.timeout.connect(self.refresh)
+
+    def refresh(self):
+        '''
+        refresh
+        ---
+        shows the current report of the metrics and keeps the overlay in the top right corner of the window, above the other widgets
+        '''
+        self.setText(metrics.report())
+        self.adjustSize()
+        self.move(self.parentWidget().width() - self.width() - 10, 30)
+        self.raise_()
+
+    def toggle(self):
+        '''
+        toggle
+        ---
+        shows or hides the overlay, it only refreshes while shown
+        '''
+        if self.isVisible():
+            self.timer.stop()
+            self.hide()
+        else:
+            self.refresh()
+            self.show()
+            self.timer.start()
+
+
+class Search_Box(QLineEdit):
+    '''
+    # Search_Box
+    #### Searches the library as the user types and lists the matching songs under the box, picking one plays it
+    The index is built on a worker thread once the window is shown, changes of the library which come in meanwhile are applied once it is built.
+    ---
+    ## Parameters
+    - parent [QWidget]: the widget which holds the box
+    '''
+    picked = Signal(object)
+    built = Signal(object)
+
+    def __init__(self, parent: QFrame) -> None:
+        super().__init__(parent)
+        self.setPlaceholderText('Search')
+        self.index = None
+        self.pending: list[tuple[list[Song], list[Song], list[Song]]] = []
+        self.results: list[Song] = []
+
+        self.model = QStringListModel(self)
+        self.completer = QCompleter(self.model, self)
+        self.completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.completer.setWidget(self)
+        self.completer.activated[QModelIndex].connect(self.pick)
+        self.textEdited.connect(self.search)
+        self.built.connect(self.on_built)
+
+    def build(self, songs: Callable[[], list[Song]]):
+        '''
+        ## build
+        ##### builds the index of the songs on a worker thread
+        ---
+        ## Parameters
+        - songs [Callable[[], list[Song]]]: returns the songs of the library, it is called on the worker so the songs aren't built on the GUI thread
+        '''
+        from concurrent.futures import ThreadPoolExecutor
+        from search import Search_Index
+        self.pool = ThreadPoolExecutor(1)
+        future = self.pool.submit(lambda: Search_Index(songs()))
+        future.add_done_callback(lambda future: self.built.emit(None if future.exception() else future.result()))
+        self.pool.shutdown(wait=False)
+
+    def on_built(self, index):
+        '''
+        ## on_built
+        ##### starts using the index built by the worker and catches it up with the library
+        ---
+        ## Parameters
+        - index [Search_Index | None]: the index, None if building it failed
+        '''
+        if index is None: return
+        self.index = index
+        for changes in self.pending: self.library_changed(*changes)
+        self.pending.clear()
+        if self.text(): self.search(self.text())
+
+    def library_changed(self, added: list[Song], updated: list[Song], removed: list[Song]):
+        '''
+        ## library_changed
+        ##### indexes the songs which were added or changed and drops the removed ones
+        ---
+        ## Parameters
+        - added [list[Song]]: the new songs
+        - updated [list[Song]]: the songs whose tags changed
+        - removed [list[Song]]: the songs whose file is gone
+        '''
+        if self.index is None:
+            self.pending.append((added, updated, removed))
+            return
+        for song in removed: self.index.remove(song)
+        for song in updated: self.index.update(song)
+        for song in added: self.index.add(song)
+
+    def search(self, text: str):
+        '''
+        ## search
+        ##### lists the songs matching what was typed so far
+        ---
+        ## Parameters
+        - text [str]: the text of the box
+        '''
+        if self.index is None: return
+        self.results = self.index.search(text)
+        self.model.setStringList([f'{song.title} - {song.band}' + (f'  {format_length(song.duration)}' if song.duration else '') for song in self.results])
+        if self.results: self.completer.complete()
+        else: self.completer.popup().hide()
+
+    def pick(self, index: QModelIndex):
+        '''
+        ## pick
+        ##### plays the picked song and empties the box
+        ---
+        ## Parameters
+        - index [QModelIndex]: the row of the song in the list
+        '''
+        if 0 <= index.row() < len(self.results): self.picked.emit(self.results[index.row()])
+        QTimer.singleShot(0, self.clear)
+
 class Controls(QFrame):
     '''
     # Controls
-    #### Houses all the buttons and sliders of the control "panel"
+    #### Houses all the buttons and sliders of the control "panel". The playback itself happens in the Playback_Core, the controls forward clicks to it and show what it reports.
     ---
     ## Parameters
     - home [Home_Page]: The home page instance 
-    - audio_output [QAudioOutput]: the QAudioOutput instance which configures the speakers
-    - player [QMediaPlayer]: the QMediaPlayer instance which is used to set the song
+    - engine [Preload_Engine]: the Preload_Engine instance which holds the active and standby players
     - preset [tuple[tuple[int]]]: the color preset used as a tuple of rgba values
     '''
-    def __init__(self, home: Home_Page, audio_output: QAudioOutput, player: QMediaPlayer, preset: tuple[tuple[int]]):
+    def __init__(self, home: Home_Page, engine: Preload_Engine, preset: tuple[tuple[int]]):
         super().__init__(home)
         self.setGeometry(0, 450, 1200, 100)
 
-        self.audio_output = audio_output
-        self.player = player
+        self.engine = engine
         self.colors = preset
         self.home = home
+        self.win = home.parent_win
         self.song_info = home.song_info
 
-        self.song_num = 1
+        # the cached index only, the songs folder is compared with it on a worker once the window is shown
+        self.library = Library_Index()
+        self.queue = Play_Queue(self.library.sorted_songs())
+        profiler.mark('library')
+        self.curr_song: Song = self.queue.current
+
+        self.art_cache = Art_Cache(self)
+        self.art_cache.ready.connect(self.set_art)
+        # created by load_deferred, once the first frame is shown
+        self.peak_cache = None
+        self.playlist_loader = None
+        self.first_chunk = False
+        self.settings: Settings = self.win.settings
+        # the song of the last session and the position it was at, until it is loaded or something else plays
+        self.restoring: tuple[str, int] | None = (self.settings.song, self.settings.position) if self.settings.song else None
+
+        self.core = Playback_Core(engine, self.queue, self, self.win)
+        self.core.autoplay = self.settings.autoplay
+        self.engine.set_crossfade(self.settings.crossfade * 1000)
+        self.queue.skip_duplicates = self.settings.skip_duplicates
+        # created by load_deferred, finds the songs of the library which are copies of another
+        self.duplicates = None
+        # created by load_deferred, measures the durations of the songs of the library
+        self.durations = None
+        # how long the songs after the current one play
+        self.queue_left = 0
+        # whether the search box's worker built every Song of the library, the length of the play order waits for it
+        self.songs_built = False
 
-        self.shuffled = False
-        self.first = True
-        self.humanInterventionOnSong = False
+        self.load_attr()
 
-        self.songs: dict[int, Song] = {index+1: Song(song[:-4]) for index, song in enumerate(os.listdir('songs'))}
-        self.curr_song = self.songs.get(self.song_num)
+        self.core.song_changed.connect(self.song_changed)
+        self.core.song_ready.connect(self.song_loaded)
+        self.core.position_changed.connect(self.song_pos.setSliderPosition)
+        self.core.position_changed.connect(lambda position: self.settings.set('position', position // 1000 * 1000))
+        self.core.time_text_changed.connect(self.curr_time.setText)
+        self.core.time_text_changed.connect(self.show_queue_time)
+        self.core.playing_changed.connect(self.set_play_icon)
+        self.core.shuffle_changed.connect(self.set_shuffle_style)
+        self.engine.latency_measured.connect(self.show_latency)
 
-        self.player.setSource(self.curr_song.url)        
-        self.player.mediaStatusChanged.connect(self.song_end_start)
+        self.volume = Volume_Control(make_volume_backend(self.engine), self)
+        self.core.playing_changed.connect(self.volume.set_playing)
 
-        self.rep_timer = QTimer(self)
-        self.rep_timer.timeout.connect(self.time_setter)
-        self.rep_timer.setInterval(0)
+        self.restore_session()
 
-        self.load_attr()
-        self.stop()
-        
+    def restore_session(self):
+        '''
+        restore_session
+        ---
+        Brings back the play order, shuffle and current song of the last session, without playing. A playlist is read again, the library song is found by its file name.
+        '''
+        if self.settings.shuffle:
+            self.queue.set_shuffle(True)
+            self.set_shuffle_style(True)
+        if self.settings.playlist and os.path.isfile(self.settings.playlist):
+            self.load_playlist(self.settings.playlist, play=False)
+            return
+        self.settings.set('playlist', '')
+        if self.restoring is not None:
+            song = self.library.songs.get(os.path.basename(self.restoring[0]))
+            if song is not None and song.path == self.restoring[0]:
+                self.queue.jump_to(song)
+                self.queue.history.clear()
+        self.core.start()
+
+    def restore_song(self, songs: list[Song]):
+        '''
+        ## restore_song
+        ##### makes the song of the last session current once the playlist chunk holding it is read
+        ---
+        ## Parameters
+        - songs [list[Song]]: the songs which were read
+        '''
+        path = self.restoring[0]
+        song = next((song for song in songs if song.path == path), None)
+        if song is None or song is self.queue.current: return
+        self.queue.jump_to(song)
+        self.queue.history.clear()
+        self.core.change_song(False)
 
     def load_attr(self):
         '''
@@ -342,10 +704,9 @@ class Controls(QFrame):
         ---
         loads all the controls and configures them
         '''
-        self.song_pos = QSlider(self)
+        self.song_pos = Waveform_Slider(self.colors, self)
         self.song_pos.setGeometry(100, 0, 1000, 20)
         self.song_pos.setSliderPosition(0)
-        self.song_pos.setOrientation(Qt.Orientation.Horizontal)
         self.song_pos.sliderMoved.connect(self.change_song_pos)
 
         for i, button in enumerate(['previous_song', 'rewind', 'play', 'stop', 'seek', 'next_song', 'shuffle']):
@@ -361,21 +722,42 @@ class Controls(QFrame):
         QCheckBox {{font-size: 13px; font-family: Space Grotesk; border: 1px solid black; background-color: rgba{self.colors[0]};}}
         QCheckBox::checked {{background-color: rgba{self.colors[1]};}}''')
         self.autoplay.setGeometry(b.x() + 30, 50, 80, 25)
-        self.autoplay.setChecked(True)
+        self.autoplay.setChecked(self.settings.autoplay)
+        self.autoplay.toggled.connect(self.toggle_autoplay)
 
         self.vol = QSlider(self)
         self.vol.setGeometry(950, 25, 200, 20)
         self.vol.setRange(0, 100)
-        self.vol.setSliderPosition(20)
+        self.vol.setSliderPosition(self.settings.volume)
         self.vol.setOrientation(Qt.Orientation.Horizontal)
         self.vol.sliderMoved.connect(self.change_vol)
 
-        self.devices_list = QComboBox(self)
+        self.devices_list = Device_List(self)
         self.devices_list.setGeometry(950, 50, 200, 25)
         self.devices_list.setStyleSheet(f'font-size: 10px; font-family: Space Grotesk; background-color: rgba{self.colors[0]};')
         self.devices_list.activated.connect(self.change_audio_output)
-        for device in QMediaDevices.audioOutputs():
-            self.devices_list.addItem(device.description())
+
+        self.search_box = Search_Box(self)
+        self.search_box.setGeometry(400, 50, 300, 25)
+        self.search_box.setStyleSheet(f'font-size: 13px; font-family: Space Grotesk; background-color: rgba{self.colors[0]};')
+        self.search_box.picked.connect(self.core.jump_to)
+
+        self.crossfade = QSpinBox(self)
+        self.crossfade.setGeometry(710, 50, 90, 25)
+        self.crossfade.setStyleSheet(f'font-size: 13px; font-family: Space Grotesk; background-color: rgba{self.colors[0]};')
+        self.crossfade.setRange(0, MAX_CROSSFADE_MS // 1000)
+        self.crossfade.setPrefix('Fade ')
+        self.crossfade.setSuffix(' s')
+        self.crossfade.setValue(self.settings.crossfade)
+        self.crossfade.valueChanged.connect(self.change_crossfade)
+
+        self.skip_dupes = QCheckBox('Skip Dupes', self)
+        self.skip_dupes.setStyleSheet(f'''
+        QCheckBox {{font-size: 13px; font-family: Space Grotesk; border: 1px solid black; background-color: rgba{self.colors[0]};}}
+        QCheckBox::checked {{background-color: rgba{self.colors[1]};}}''')
+        self.skip_dupes.setGeometry(805, 50, 95, 25)
+        self.skip_dupes.setChecked(self.settings.skip_duplicates)
+        self.skip_dupes.toggled.connect(self.toggle_skip_duplicates)
         
         self.curr_time = QLabel('00:00', self)
         self.curr_time.setGeometry(50, 0, 45, 20)
@@ -384,6 +766,10 @@ class Controls(QFrame):
         self.end_time = QLabel(self)
         self.end_time.setGeometry(1105, 0, 45, 20)
         self.end_time.setStyleSheet(f'font-size: 15px; font-family: Space Grotesk;')
+
+        self.queue_time = QLabel(self)
+        self.queue_time.setGeometry(50, 78, 250, 20)
+        self.queue_time.setStyleSheet(f'font-size: 13px; font-family: Space Grotesk;')
         
     def change_audio_output(self, device: str):
         '''
@@ -393,7 +779,8 @@ class Controls(QFrame):
         ## Parameters
         - device [str]: the name of the device which should play the music
         '''
-        self.audio_output.setDevice(QMediaDevices.audioOutputs()[device])
+        self.engine.set_device(self.devices_list.devices[device])
+        self.settings.set('device', self.devices_list.id_of(self.devices_list.devices[device]))
         
     def change_vol(self, position: int):
         '''
@@ -403,29 +790,117 @@ class Controls(QFrame):
         ## Parameters
         - position [int]: the valume that the speaker should change to
         '''
-        [session for session in AudioUtilities.GetAllSessions() if session.Process and session.Process.name() == 'python.exe'][0]._ctl.QueryInterface(ISimpleAudioVolume).SetMasterVolume(position/100, None)        
+        self.volume.set_level(position)
+        self.settings.set('volume', position)
+
+    def toggle_autoplay(self, checked: bool):
+        '''
+        ## toggle_autoplay
+        ##### turns moving on to the next song when one ends on or off
+        ---
+        ## Parameters
+        - checked [bool]: whether autoplay is on
+        '''
+        self.core.autoplay = checked
+        self.settings.set('autoplay', checked)
+
+    def change_crossfade(self, seconds: int):
+        '''
+        ## change_crossfade
+        ##### changes how long a song fades into the next one
+        ---
+        ## Parameters
+        - seconds [int]: the length of the crossfade, 0 cuts between songs
+        '''
+        self.engine.set_crossfade(seconds * 1000)
+        self.settings.set('crossfade', seconds)
+
+    def toggle_skip_duplicates(self, checked: bool):
+        '''
+        ## toggle_skip_duplicates
+        ##### turns passing over songs which are copies of another song of the play order on or off
+        ---
+        ## Parameters
+        - checked [bool]: whether duplicates are skipped
+        '''
+        self.queue.set_duplicates(self.queue.duplicates, checked)
+        self.settings.set('skip_duplicates', checked)
+        self.engine.preload(self.queue.peek_next())
+        self.update_queue_time()
+
+    def set_duplicates(self, duplicates: dict[Song, Song]):
+        '''
+        ## set_duplicates
+        ##### hands the duplicates the finder found to the play order
+        ---
+        ## Parameters
+        - duplicates [dict[Song, Song]]: every duplicate and the song kept in its place
+        '''
+        self.queue.set_duplicates(duplicates)
+        self.engine.preload(self.queue.peek_next())
+        self.update_queue_time()
+
+    def set_durations(self, songs: list[Song]):
+        '''
+        ## set_durations
+        ##### shows the lengths the scanner measured, in the queue time and for the current song if it isn't loaded yet
+        ---
+        ## Parameters
+        - songs [list[Song]]: the songs whose duration changed
+        '''
+        if self.curr_song in songs and not self.song_pos.maximum():
+            self.end_time.setText(format_time(self.curr_song.duration))
+            self.song_pos.setRange(0, self.curr_song.duration)
+        self.queue.lengths_changed()
+        self.update_queue_time()
+
+    def update_queue_time(self):
+        '''
+        update_queue_time
+        ---
+        asks the play order how long the songs after the current one play, after it changed.
+        Not before the search box's worker built the songs, the length of the play order takes every Song of the library which would all be built on the GUI thread.
+        '''
+        if not self.songs_built: return
+        self.queue_left = self.queue.remaining_ms()
+        self.show_queue_time()
+
+    def show_queue_time(self, *_):
+        '''
+        show_queue_time
+        ---
+        shows how long the play order goes on, the rest of the current song included, once per shown second
+        '''
+        length = self.song_pos.maximum()
+        left = self.queue_left + max(length - self.core.shown_second * 1000, 0)
+        self.queue_time.setText(f'{format_length(left)} left in the queue' if left else '')
     
     def shuffle(self):
         '''
         shuffle
         ---
-        if the songs are already shuffled then they will be sorted alphabetically
+        if the songs are already shuffled then they will go back to alphabetical order
 
         if the songs are not shuffled, then they are shuffled
+
+        either way the current song keeps playing and only the songs after it change
+        '''
+        self.core.toggle_shuffle()
+
+    def set_shuffle_style(self, shuffled: bool):
         '''
-        if not self.shuffled:
-            ls = list(self.songs.values())
-            random.shuffle(ls)
-            self.song_num = ls.index(self.curr_song) + 1
-            self.shuffled = True
+        ## set_shuffle_style
+        ##### highlights the shuffle button while the songs are shuffled
+        ---
+        ## Parameters
+        - shuffled [bool]: whether the songs are shuffled
+        '''
+        self.settings.set('shuffle', shuffled)
+        self.update_queue_time()
+        if shuffled:
             self.shuffle_button.setStyleSheet(f'QToolButton {{background-color: rgba{self.colors[1]};}} QToolButton::hover {{background-color: rgba{self.colors[0]};}}')
-        elif self.shuffled:
-            self.shuffled = False
-            ls = sorted(list(self.songs.values()), key=lambda x: x.name)
-            self.song_num = ls.index(self.curr_song) + 1
+        else:
             self.shuffle_button.setStyleSheet(f'QToolButton {{background-color: rgba{self.colors[0]};}} QToolButton::hover {{background-color: rgba{self.colors[1]};}}')
-        
-        self.songs = {index+1: val for index, val in enumerate(ls)}
     
     def rewind(self):
         '''
@@ -433,7 +908,7 @@ class Controls(QFrame):
         ---
         this function rewinds the song 10 seconds
         '''
-        self.player.setPosition(self.player.position()-10000)
+        self.core.rewind()
 
     def seek(self):
         '''
@@ -441,7 +916,7 @@ class Controls(QFrame):
         ---
         this function seeks the song forward 10 seconds
         '''
-        self.player.setPosition(self.player.position()+10000)
+        self.core.seek()
     
     def stop(self):
         '''
@@ -449,10 +924,7 @@ class Controls(QFrame):
         ---
         pauses the music and restarts the song. 
         '''
-        self.player.pause()
-        self.player.setPosition(0)
-        self.song_pos.setSliderPosition(0)
-        self.play_button.setIcon(QIcon('assets\\play.png'))
+        self.core.stop()
 
     def play(self):
         '''
@@ -460,10 +932,19 @@ class Controls(QFrame):
         ---
         this function plays the music if it is paused and pauses the music if it is playing
         '''
-        self.player.pause() if self.player.isPlaying() else self.player.play()
-        self.play_button.setIcon(QIcon(f"assets\\{'pause.png' if self.player.isPlaying() else 'play.png'}"))
-        self.song_pos.setRange(0, self.player.duration())
-        self.rep_timer.start()
+        self.core.play_pause()
+
+    def set_play_icon(self, playing: bool):
+        '''
+        ## set_play_icon
+        ##### shows the pause icon while the music plays and the play icon while it doesn't
+        ---
+        ## Parameters
+        - playing [bool]: whether the music is playing
+        '''
+        self.play_button.setIcon(QIcon(f"assets\\{'pause.png' if playing else 'play.png'}"))
+        # once something plays, the song of the last session isn't brought back anymore
+        if playing: self.restoring = None
 
     def change_song_pos(self, position: int):
         '''
@@ -473,7 +954,7 @@ class Controls(QFrame):
         ## Parameters:
         - position [int]: The new position in milliseconds to which the song should be set.
         '''
-        self.player.setPosition(position)
+        self.core.set_position(position)
 
 
     def next_song(self):
@@ -482,10 +963,7 @@ class Controls(QFrame):
         ---
         changes the current song to the next song
         '''
-        self.humanInterventionOnSong = True
-        self.song_num = self.song_num + 1 if self.song_num != len(self.songs) else 1
-        self.player.setPosition(self.player.duration())
-        if not self.player.isPlaying(): self.play()
+        self.core.next()
 
     def previous_song(self):
         '''
@@ -493,25 +971,36 @@ class Controls(QFrame):
         ---
         changes the current song to the previous song
         '''
-        self.humanInterventionOnSong = True
-        self.song_num = self.song_num - 1 if self.song_num != 1 else len(self.songs)
-        self.player.setPosition(self.player.duration())
-        if not self.player.isPlaying(): self.play()
+        self.core.previous()
 
-    def time_setter(self):
+    def show_latency(self, latency: float):
         '''
-        time_setter
+        ## show_latency
+        ##### shows how long the last song change took, from the click until the new song's position started moving
         ---
-        updates the time stamp according to the playback position of the song
+        ## Parameters
+        - latency [float]: the click-to-audio latency in milliseconds
         '''
-        self.song_pos.setSliderPosition(self.player.position())
-        if self.first and 0 < self.player.position() < 100:
-            self.first = False
-            self.seek()
-            self.rewind()
-        m = self.player.position()//60000
-        s = round(self.player.position()/1000)%60
-        self.curr_time.setText(f'{m if m >= 10 else f"0{m}"}:{s if s >= 10 else f"0{s}"}')
+        for button in (self.next_song_button, self.previous_song_button):
+            button.setToolTip(f'Last song change: {latency:.0f} ms')
+
+    def song_changed(self, song: Song):
+        '''
+        ## song_changed
+        ##### shows the new song as soon as the core switches to it, before it has loaded
+        ---
+        ## Parameters
+        - song [Song]: the new current song
+        '''
+        self.curr_song = song
+        self.settings.set('song', song.path)
+        # a measured length is shown before the song loads, the player's own replaces it then
+        self.end_time.setText(format_time(song.duration) if song.duration else '')
+        self.song_pos.setRange(0, song.duration)
+        self.update_queue_time()
+        self.update_song_info()
+        if self.peak_cache is not None: self.song_pos.set_peaks(self.peak_cache.get(song.path))
+        self.win.setWindowTitle(f"{self.win.windowTitle().split(' -')[0]} - {song.title.capitalize()}")
 
     def update_song_info(self):
         '''
@@ -519,56 +1008,260 @@ class Controls(QFrame):
         ---
         changes the song info displayed when the song changes
         '''
-        try: self.song_info.art.setPixmap(QPixmap(self.curr_song.img).scaled(200, 200, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
-        except TypeError as e: pass
-        self.song_info.title.setText(self.curr_song.name)
+        start = metrics.start()
+        pixmap = self.art_cache.get(self.curr_song.img) if self.curr_song.img else None
+        if pixmap is not None: self.song_info.art.setPixmap(pixmap)
+        else: self.song_info.art.clear()
+        self.song_info.title.setText(self.curr_song.title)
         self.song_info.band_name.setText(self.curr_song.band)
 
-    def song_end_start(self, status: QMediaPlayer.MediaStatus):
+        self.art_cache.prefetch(*(song.img for song in (self.queue.peek_next(), self.queue.peek_previous()) if song is not None))
+        metrics.stop('update_song_info', start)
+
+    def set_art(self, img: str, pixmap: QPixmap):
         '''
-        ## song_end_start
-        ##### this function updates all the attributes related to the end of a song
+        ## set_art
+        ##### shows a thumbnail once it has been loaded by the art cache, if it belongs to the current song
         ---
         ## Parameters
-        - status [QMediaPlayer.MediaStatus]: the status of the mediaplayer based on the playback of the song
-        '''
-        if status == self.player.MediaStatus.EndOfMedia:
-            self.rep_timer.stop()
-            
-            if not self.humanInterventionOnSong: 
-                self.song_num = self.song_num + 1 if self.song_num != len(self.songs) else 1
-            if self.humanInterventionOnSong:
-                self.humanInterventionOnSong = False
-
-            self.curr_song = self.songs.get(self.song_num)
-            self.player.setSource(self.curr_song.url)
-            
-            self.song_pos.setSliderPosition(0)    
-            
-        elif status == self.player.MediaStatus.LoadedMedia:
-            
-            m = self.player.duration()//60000
-            s = round(self.player.duration()/1000)%60
-
-            self.end_time.setText(f'{m if m >= 10 else f"0{m}"}:{s if s >= 10 else f"0{s}"}')
-            self.curr_time.setText('00:00')
-            
-            if self.autoplay.isChecked(): self.player.pause()
-            
-            self.play()
-
-            if self.first:
-                self.play_button.setIcon(QIcon('assets\\play.png'))
-
-            self.update_song_info()
-            
-            window.setWindowTitle(f"{window.windowTitle().split(' -')[0]} - {self.curr_song.name.capitalize()}")
+        - img [str]: the path of the thumbnail
+        - pixmap [QPixmap]: the scaled thumbnail
+        '''
+        if img == self.curr_song.img: self.song_info.art.setPixmap(pixmap)
+
+    def set_peaks(self, path: str, peaks):
+        '''
+        ## set_peaks
+        ##### shows a waveform once it has been decoded by the peak cache, if it belongs to the current song
+        ---
+        ## Parameters
+        - path [str]: the path of the mp3 file
+        - peaks [np.ndarray]: the (min, max) peaks of the song
+        '''
+        if path == self.curr_song.path: self.song_pos.set_peaks(peaks)
+
+    def load_playlist(self, path: str, play: bool = True):
+        '''
+        ## load_playlist
+        ##### Replaces the play order with a playlist. It is read in chunks, the first song plays once the first chunk is read and the rest joins the play order as it is read.
+        ---
+        ## Parameters
+        - path [str]: the path of the playlist
+        - play [bool]: whether the first song plays, False when the last session is restored
+        '''
+        from playlists import Playlist_Loader
+        if self.playlist_loader is not None: self.playlist_loader.stop()
+        if play: self.restoring = None
+        self.settings.set('playlist', os.path.abspath(path))
+        self.playlist_loader = loader = Playlist_Loader(path, self.library, self)
+        loader.songs_read.connect(self.add_songs)
+        loader.finished.connect(self.playlist_read)
+        self.first_chunk = True
+        loader.start()
+
+    def add_songs(self, songs: list[Song]):
+        '''
+        ## add_songs
+        ##### Adds the songs read from a playlist to the play order, the first ones replace it and start playing
+        ---
+        ## Parameters
+        - songs [list[Song]]: the songs which were read
+        '''
+        if self.first_chunk:
+            self.first_chunk = False
+            self.queue.set_songs(songs)
+            if self.restoring is not None: self.queue.history.clear()
+            self.core.change_song(self.restoring is None)
+        else:
+            self.queue.extend(songs)
+        if self.restoring is not None: self.restore_song(songs)
+        if self.win.loudness is not None: self.win.loudness.start(songs)
+        self.update_queue_time()
+
+    def playlist_read(self, missing: list[str]):
+        '''
+        ## playlist_read
+        ##### Reports the entries of the playlist whose files don't exist, all at once after it is read
+        ---
+        ## Parameters
+        - missing [list[str]]: the locations of the missing entries
+        '''
+        loader, self.playlist_loader = self.playlist_loader, None
+        if loader is not None: loader.deleteLater()
+        # a playlist read again on startup doesn't report what went missing since it was opened
+        if not missing or self.restoring is not None: return
+        shown = '\n'.join(missing[:MISSING_SHOWN]) + (f'\n... and {len(missing) - MISSING_SHOWN} more' if len(missing) > MISSING_SHOWN else '')
+        QMessageBox.warning(self.win, 'Missing Songs', f'{len(missing)} songs of the playlist could not be found and were skipped:\n\n{shown}')
+
+    def play_files(self, paths: list[str], replace: bool):
+        '''
+        ## play_files
+        ##### Plays songs picked by the user
+        ---
+        ## Parameters
+        - paths [list[str]]: the paths of the mp3 files
+        - replace [bool]: whether they replace the play order, else the first one plays now and the others are queued after it
+        '''
+        from playlists import song_for_path
+        songs = [song_for_path(path, self.library) for path in paths]
+        if replace:
+            self.queue.set_songs(songs)
+            self.core.change_song(True)
+            self.save_session_playlist(songs)
+        else:
+            for song in reversed(songs): self.queue.play_next(song)
+            self.core.next()
+        if self.win.loudness is not None: self.win.loudness.start(songs)
+
+    def save_playlist(self, path: str):
+        '''
+        ## save_playlist
+        ##### Saves the songs of the play order to a playlist, in the order they were loaded, without the removed ones
+        ---
+        ## Parameters
+        - path [str]: the path of the playlist
+        '''
+        from playlists import write_playlist
+        write_playlist(path, [song for index, song in enumerate(self.queue.songs) if index not in self.queue.removed])
+
+    def save_session_playlist(self, songs: list[Song]):
+        '''
+        ## save_session_playlist
+        ##### keeps songs picked by the user as a playlist on the settings worker, so they are the play order again after a restart
+        ---
+        ## Parameters
+        - songs [list[Song]]: the songs of the play order
+        '''
+        from playlists import write_playlist
+        os.makedirs(os.path.dirname(SESSION_PLAYLIST), exist_ok=True)
+        self.settings.set('playlist', os.path.abspath(SESSION_PLAYLIST))
+        self.settings.run(write_playlist, SESSION_PLAYLIST, list(songs))
+
+    def library_changed(self, added: list[Song], updated: list[Song], removed: list[Song]):
+        '''
+        ## library_changed
+        ##### Applies changes of the songs folder to the play order without touching the current song, even if it was removed
+        ---
+        ## Parameters
+        - added [list[Song]]: the new songs, they join the end of the play order
+        - updated [list[Song]]: the songs whose tags or thumbnail changed, they kept their Song instance
+        - removed [list[Song]]: the songs whose file is gone
+        '''
+        if added:
+            self.queue.extend(added)
+            self.win.loudness_analyzer().start(added)
+            # the song of the last session can be new to an index which was lost
+            if self.restoring is not None and not self.settings.playlist: self.restore_song(added)
+        # a library which was empty until the first scan loads its first song
+        if self.core.current is None and self.queue.current is not None: self.core.change_song(False)
+        if removed:
+            gone = set(removed)
+            for song in removed: self.queue.remove_song(song)
+            for entry in [entry for entry in self.queue.up_next() if entry.song in gone]: self.queue.remove(entry)
+        self.search_box.library_changed(added, updated, removed)
+        if self.duplicates is not None and (added or updated or removed): self.duplicates.start()
+        if self.durations is not None and (added or updated): self.durations.start()
+        self.queue.lengths_changed()
+        self.update_queue_time()
+        for song in updated:
+            if song.img: self.art_cache.forget(song.img)
+        if self.curr_song in updated: self.update_song_info()
+        self.engine.preload(self.queue.peek_next())
+
+    def load_deferred(self):
+        '''
+        load_deferred
+        ---
+        Starts what the first frame doesn't need: the scan of the songs folder, the waveform of the current song, the loudness analysis, the search index,
+        the duplicates and the durations of the library, the speaker device and volume of the last session, and the spectrum
+        '''
+        if self.peak_cache is not None: return
+        from peaks import Peak_Cache
+        self.peak_cache = Peak_Cache(self)
+        self.peak_cache.ready.connect(self.set_peaks)
+        if self.curr_song is not None: self.song_pos.set_peaks(self.peak_cache.get(self.curr_song.path))
+
+        # the files are stated, the songs built and the index rows walked on workers, so none of it holds up the GUI thread
+        self.win.loudness_analyzer().start(self.queue.songs)
+        files = list(self.library.rows)
+        self.search_box.built.connect(self.on_songs_built)
+        self.search_box.build(lambda: self.library.build_songs(files))
+
+        from watcher import Library_Watcher
+        self.watcher = Library_Watcher(self.library, self)
+        self.watcher.changed.connect(self.library_changed)
+        QApplication.instance().aboutToQuit.connect(self.watcher.stop)
+        # what changed in the songs folder since the last session is collected on the watcher's worker and arrives through library_changed
+        self.watcher.scan()
+        from duplicates import Duplicate_Finder
+        self.duplicates = Duplicate_Finder(self.library, self)
+        self.duplicates.found.connect(self.set_duplicates)
+        QApplication.instance().aboutToQuit.connect(self.duplicates.stop)
+        self.duplicates.start()
+        from durations import Duration_Scanner
+        self.durations = Duration_Scanner(self.library, self)
+        self.durations.measured.connect(self.set_durations)
+        QApplication.instance().aboutToQuit.connect(self.durations.stop)
+        self.durations.start()
+        if self.settings.device:
+            device = self.devices_list.select(self.settings.device)
+            if device is not None: self.engine.set_device(device)
+        self.volume.set_level(self.settings.volume)
+        self.load_spectrum()
+
+    def on_songs_built(self, _):
+        '''
+        on_songs_built
+        ---
+        Shows how long the play order goes on once the search box's worker built every Song of the library, even if its index failed
+        '''
+        self.songs_built = True
+        self.update_queue_time()
+
+    def load_spectrum(self):
+        '''
+        load_spectrum
+        ---
+        Shows the spectrum of what plays next to the song info, drawn at most spectrum_fps times a second. The audio is only tapped while the window is shown.
+        '''
+        if self.settings.spectrum_fps <= 0: return
+        from spectrum import Spectrum_Analyzer, Spectrum_View
+        self.spectrum_view = Spectrum_View(self.colors, self.home)
+        self.spectrum_view.setGeometry(800, 300, 350, 130)
+        self.spectrum_view.show()
+        self.spectrum = Spectrum_Analyzer(self, self.win, self.settings.spectrum_fps)
+        self.spectrum.levels_ready.connect(self.spectrum_view.set_levels)
+        self.engine.tap().audioBufferReceived.connect(self.spectrum.on_buffer)
+        self.spectrum.running_changed.connect(self.engine.set_tapping)
+        self.engine.set_tapping(self.spectrum.running)
+        QApplication.instance().aboutToQuit.connect(self.spectrum.stop)
+
+    def song_loaded(self, duration: int):
+        '''
+        ## song_loaded
+        ##### updates the length of the song once it is ready
+        ---
+        ## Parameters
+        - duration [int]: the length of the song in milliseconds
+        '''
+        self.end_time.setText(format_time(duration))
+        self.song_pos.setRange(0, duration)
+        if self.restoring is not None and self.restoring[0] == self.curr_song.path:
+            position, self.restoring = self.restoring[1], None
+            if 0 < position < duration: self.core.set_position(position)
 
 
 if __name__ == "__main__":
     os.chdir(os.path.dirname(os.path.realpath(__file__)))
     app = QApplication(sys.argv)
     width, height = app.screens()[0].size().toTuple()
+    profiler.mark('QApplication')
     window = Window()
     window.show()
+    profiler.mark('show')
+    from ipc import Instance_Server
+    server = Instance_Server(app)
+    server.received.connect(window.handle_request)
+    server.listen()
+    if request['commands'] or request['files']: window.handle_request(request)
     sys.exit(app.exec())
\ No newline at end of file
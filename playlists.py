@@ -0,0 +1,264 @@
+from __future__ import annotations
+import codecs, locale, os
+from itertools import islice
+from time import perf_counter
+from typing import Iterator
+from PySide6.QtCore import QObject, QTimer, QUrl, Signal
+from core import atomic_write
+from library import Library_Index, Song
+
+
+PLAYLIST_EXTENSIONS = ('.m3u', '.m3u8', '.pls')
+# how long a playlist is read for per turn of the event loop, so a huge playlist never freezes the window
+CHUNK_MS = 8
+
+
+def parse_m3u(lines: Iterator[str]) -> Iterator[tuple[str, str | None, int]]:
+    '''
+    ## parse_m3u
+    ##### parses an M3U/M3U8 playlist line by line, using the #EXTINF line before an entry for its title and length
+    ---
+    ## Parameters
+    - lines [Iterator[str]]: the lines of the playlist
+
+    ## Returns
+    - the location, title and length in milliseconds of every entry, title None and length 0 if unknown
+    '''
+    title, length = None, 0
+    for line in lines:
+        # playlists pasted together keep the BOM of each, in front of its #EXTM3U
+        line = line.strip().lstrip('\ufeff')
+        if not line: continue
+        if line.startswith('#'):
+            if line.startswith('#EXTINF:'):
+                info, _, title = line[8:].partition(',')
+                try: length = max(int(float(info.split()[0]) * 1000), 0) if info else 0
+                except ValueError: length = 0
+                title = title.strip() or None
+            continue
+        yield line, title, length
+        title, length = None, 0
+
+
+def parse_pls(lines: Iterator[str]) -> Iterator[tuple[str, str | None, int]]:
+    '''
+    ## parse_pls
+    ##### parses a PLS playlist line by line. Its FileN, TitleN and LengthN keys may come in any order, an entry is complete once the next one starts.
+    ---
+    ## Parameters
+    - lines [Iterator[str]]: the lines of the playlist
+
+    ## Returns
+    - the location, title and length in milliseconds of every entry, title None and length 0 if unknown
+    '''
+    entries: dict[int, list] = {}
+    current = None
+    for line in lines:
+        key, sep, value = line.strip().lstrip('\ufeff').partition('=')
+        if not sep: continue
+        for field in ('File', 'Title', 'Length'):
+            if key.startswith(field) and key[len(field):].isdigit():
+                number = int(key[len(field):])
+                if current is not None and number != current and current in entries and entries[current][0]:
+                    yield tuple(entries.pop(current))
+                current = number
+                entry = entries.setdefault(number, [None, None, 0])
+                if field == 'File': entry[0] = value.strip()
+                elif field == 'Title': entry[1] = value.strip() or None
+                else:
+                    try: entry[2] = max(int(value) * 1000, 0)
+                    except ValueError: pass
+                break
+    for number in sorted(entries):
+        if entries[number][0]: yield tuple(entries[number])
+
+
+def fallback_encoding() -> str:
+    '''
+    fallback_encoding
+    ---
+    the encoding of a playlist which isn't UTF-8: the ANSI code page of the locale, which is what Windows players write, or cp1252 where the locale is UTF-8
+    '''
+    encoding = locale.getpreferredencoding(False)
+    return 'cp1252' if codecs.lookup(encoding).name == 'utf-8' else encoding
+
+
+def playlist_lines(path: str) -> Iterator[str]:
+    '''
+    ## playlist_lines
+    ##### streams the lines of a playlist as UTF-8 with or without a BOM. A file which turns out not to be UTF-8 goes on with fallback_encoding from the line it failed at,
+    ##### and with latin-1 if even that fails, so a stray byte never turns into a replacement character.
+    ---
+    ## Parameters
+    - path [str]: the path of the playlist
+    '''
+    read = 0
+    for encoding in ('utf-8-sig', fallback_encoding(), 'latin-1'):
+        try:
+            with open(path, 'r', encoding=encoding) as f:
+                for line in islice(f, read, None):
+                    yield line
+                    read += 1
+            return
+        except UnicodeDecodeError: continue
+
+
+def read_playlist(path: str) -> Iterator[tuple[str, str | None, int]]:
+    '''
+    ## read_playlist
+    ##### streams the entries of a playlist file, picking the parser from its extension
+    ---
+    ## Parameters
+    - path [str]: the path of the playlist
+    '''
+    yield from (parse_pls if path.lower().endswith('.pls') else parse_m3u)(playlist_lines(path))
+
+
+class Playlist_Loader(QObject):
+    '''
+    # Playlist_Loader
+    #### Reads a playlist a chunk at a time on the event loop and hands its songs over as they are read, so the first one can play long before the last one is read
+    Entries are only joined onto the folder of the playlist, the absolute path is built once the song is played. Songs of the library keep their Song instance.
+    ---
+    ## Parameters
+    - path [str]: The path of the playlist
+    - library [Library_Index]: The library, whose songs are reused when the playlist points at them
+    - parent [QObject]: The QObject which owns the loader
+    '''
+    songs_read = Signal(list)
+    finished = Signal(list)
+
+    def __init__(self, path: str, library: Library_Index = None, parent: QObject = None) -> None:
+        super().__init__(parent)
+        self.path = path
+        self.folder = os.path.dirname(path)
+        self.library = library
+        self.folders: dict[str, bool] = {}
+        self.entries = read_playlist(path)
+        self.missing: list[str] = []
+        self.count = 0
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.read_chunk)
+
+    def start(self):
+        '''
+        start
+        ---
+        reads the first chunk right away and the rest on the following turns of the event loop
+        '''
+        self.read_chunk()
+        if self.entries is not None: self.timer.start()
+
+    def stop(self):
+        '''
+        stop
+        ---
+        stops reading, e.g. when another playlist is opened
+        '''
+        self.timer.stop()
+        if self.entries is not None: self.entries.close()
+        self.entries = None
+
+    def read_chunk(self):
+        '''
+        read_chunk
+        ---
+        reads entries for CHUNK_MS, emits their songs, and the missing files once the whole playlist is read
+        '''
+        songs = []
+        end = perf_counter() + CHUNK_MS / 1000
+        try:
+            while perf_counter() < end:
+                song = self.make_song(*next(self.entries))
+                if song is not None: songs.append(song)
+        except (StopIteration, OSError):
+            self.stop()
+        self.count += len(songs)
+        if songs: self.songs_read.emit(songs)
+        if self.entries is None: self.finished.emit(self.missing)
+
+    def make_song(self, location: str, title: str | None, length: int) -> Song | None:
+        '''
+        ## make_song
+        ##### builds the Song of an entry, None if its file is missing or it isn't a local file
+        ---
+        ## Parameters
+        - location [str]: the path of the entry, relative to the playlist or absolute
+        - title [str | None]: the title given by the playlist
+        - length [int]: the length given by the playlist in milliseconds
+        '''
+        if location.startswith('file:'): location = QUrl(location).toLocalFile()
+        elif '://' in location:
+            self.missing.append(location)
+            return None
+        if location.startswith('~'): location = os.path.expanduser(location)
+        path = location if os.path.isabs(location) else os.path.join(self.folder, location)
+        if not os.path.isfile(path):
+            self.missing.append(location)
+            return None
+        return song_for_path(path, self.library, title, length, self.folders)
+
+
+def song_for_path(path: str, library: Library_Index = None, title: str = None, length: int = 0, folders: dict[str, bool] = None) -> Song:
+    '''
+    ## song_for_path
+    ##### returns the Song of a file: the one of the library if the file is in the songs folder, else a new one
+    ---
+    ## Parameters
+    - path [str]: the path of the mp3 file
+    - library [Library_Index]: the library
+    - title [str]: the title given by a playlist, "band - title" is split into both
+    - length [int]: the length given by a playlist in milliseconds
+    - folders [dict[str, bool]]: remembers which folders are the songs folder, so a playlist resolves each folder once
+    '''
+    folder, file = os.path.split(path)
+    if library is not None and file in library.songs:
+        is_library = folders.get(folder) if folders is not None else None
+        if is_library is None:
+            is_library = os.path.normcase(os.path.abspath(folder)) == os.path.normcase(os.path.abspath(library.songs_dir))
+            if folders is not None: folders[folder] = is_library
+        if is_library: return library.songs[file]
+    name = os.path.splitext(file)[0]
+    band, _, song_title = (title or '').partition(' - ')
+    return Song(name, path, song_title or title or name, band if song_title else None, img=False, duration=length)
+
+
+def write_playlist(path: str, songs: list[Song]):
+    '''
+    ## write_playlist
+    ##### writes songs to an M3U8 or PLS playlist, in one write with atomic_write
+    Paths are written relative to the playlist where possible, so the playlist can be moved together with the songs.
+    ---
+    ## Parameters
+    - path [str]: the path of the playlist, its extension picks the format
+    - songs [list[Song]]: the songs, in the order they should play
+    '''
+    folder = os.path.dirname(os.path.abspath(path))
+    # songs share a handful of folders, so each folder is made relative once instead of once per song
+    relative: dict[str, str] = {}
+
+    def location(song: Song) -> str:
+        song_folder, file = os.path.split(song.path)
+        prefix = relative.get(song_folder)
+        if prefix is None:
+            try: prefix = os.path.relpath(os.path.abspath(song_folder), folder)
+            except ValueError: prefix = os.path.abspath(song_folder)
+            prefix = relative[song_folder] = '' if prefix == '.' else os.path.join(prefix, '')
+        return prefix + file
+
+    def title(song: Song) -> str:
+        return song.title if song.band == song.name else f'{song.band} - {song.title}'
+
+    if path.lower().endswith('.pls'):
+        lines = ['[playlist]']
+        for number, song in enumerate(songs, 1):
+            lines += [f'File{number}={location(song)}', f'Title{number}={title(song)}', f'Length{number}={song.duration // 1000 if song.duration else -1}']
+        lines += [f'NumberOfEntries={len(songs)}', 'Version=2']
+    else:
+        lines = ['#EXTM3U']
+        for song in songs:
+            lines += [f'#EXTINF:{song.duration // 1000 if song.duration else -1},{title(song)}', location(song)]
+
+    atomic_write(path, '\n'.join(lines) + '\n')
@@ -0,0 +1,226 @@
+from __future__ import annotations
+from time import perf_counter
+from PySide6.QtCore import QModelIndex, QPersistentModelIndex, QRect, QRectF, QSize, QStringListModel, Qt, Signal
+from PySide6.QtGui import QColor, QFont, QGradient, QPainter, QPaintEvent, QPen, QPixmap
+from PySide6.QtWidgets import QListView, QStyleOptionViewItem, QStyledItemDelegate, QWidget
+
+
+CARD = 200
+CELL = 260
+SHADOW = 20
+# the atlas is split into pages of ATLAS_COLUMNS x ATLAS_ROWS swatches, which are only allocated once one of their swatches is shown
+ATLAS_COLUMNS = 8
+ATLAS_ROWS = 4
+
+PRESETS: list[QGradient.Preset] = list(QGradient.Preset.__members__.values())[:-1]
+
+
+def render_shadow() -> QPixmap:
+    '''
+    ## render_shadow
+    ##### paints the soft shadow which every card sits on, once, in place of a QGraphicsDropShadowEffect per card
+    '''
+    pixmap = QPixmap(CARD + 2*SHADOW, CARD + 2*SHADOW)
+    pixmap.fill(Qt.GlobalColor.transparent)
+    p = QPainter(pixmap)
+    p.setRenderHint(QPainter.RenderHint.Antialiasing)
+    p.setPen(Qt.PenStyle.NoPen)
+    for step in range(SHADOW, 0, -2):
+        p.setBrush(QColor(0, 0, 0, 6))
+        p.drawRoundedRect(SHADOW - step, SHADOW - step, CARD + 2*step, CARD + 2*step, 5 + step, 5 + step)
+    p.end()
+    return pixmap
+
+
+class Preset_Atlas:
+    '''
+    # Preset_Atlas
+    #### Renders every preset swatch once into pages of a shared pixmap atlas, the first time it is shown, at the device pixel ratio of the screen
+    ---
+    ## Parameters
+    - presets [list[QGradient.Preset]]: The presets, in the order of the gallery
+    '''
+    def __init__(self, presets: list[QGradient.Preset]) -> None:
+        self.presets = presets
+        self.pages: dict[int, QPixmap] = {}
+        self.rendered: set[int] = set()
+        self.dpr = 1.0
+        self.shadow = render_shadow()
+        self.font = QFont('Space Grotesk')
+        self.font.setPixelSize(20)
+
+    def tile(self, row: int, dpr: float = 1.0) -> tuple[QPixmap, QRectF]:
+        '''
+        ## tile
+        ##### returns the atlas page and the rect of a preset's swatch in its pixels, rendering it if it is the first time
+        ---
+        ## Parameters
+        - row [int]: the index of the preset
+        - dpr [float]: the device pixel ratio of the gallery, the swatches are rendered again if it changed, e.g. on another screen
+        '''
+        if dpr != self.dpr:
+            self.dpr = dpr
+            self.pages.clear()
+            self.rendered.clear()
+        page, slot = divmod(row, ATLAS_COLUMNS * ATLAS_ROWS)
+        rect = QRect(slot % ATLAS_COLUMNS * CARD, slot // ATLAS_COLUMNS * CARD, CARD, CARD)
+        pixmap = self.pages.get(page)
+        if pixmap is None:
+            pixmap = self.pages[page] = QPixmap(QSize(ATLAS_COLUMNS * CARD, ATLAS_ROWS * CARD) * dpr)
+            pixmap.setDevicePixelRatio(dpr)
+            pixmap.fill(Qt.GlobalColor.transparent)
+        if row not in self.rendered:
+            self.rendered.add(row)
+            self.render(pixmap, rect, self.presets[row])
+        return pixmap, QRectF(rect.x() * dpr, rect.y() * dpr, CARD * dpr, CARD * dpr)
+
+    def render(self, pixmap: QPixmap, rect: QRect, preset: QGradient.Preset):
+        '''
+        ## render
+        ##### paints one swatch: the white card, the name of the preset and a circle of the gradient
+        ---
+        ## Parameters
+        - pixmap [QPixmap]: the atlas page
+        - rect [QRect]: the rect of the swatch on the page, in device independent pixels
+        - preset [QGradient.Preset]: the preset to paint
+        '''
+        p = QPainter(pixmap)
+        p.setRenderHint(QPainter.RenderHint.Antialiasing)
+        p.setPen(QPen(Qt.GlobalColor.black, 1))
+        p.setBrush(Qt.GlobalColor.white)
+        p.drawRoundedRect(rect.adjusted(0, 0, -1, -1), 5, 5)
+
+        p.setFont(self.font)
+        p.drawText(QRect(rect.x() + 1, rect.y() + 1, CARD - 2, 22), Qt.AlignmentFlag.AlignCenter, f'{preset.name} {preset.value}')
+
+        p.setPen(Qt.PenStyle.NoPen)
+        p.setBrush(QGradient(preset))
+        p.drawEllipse(rect.x() + CARD//4, rect.y() + CARD//4 + 10, CARD//2, CARD//2)
+        p.end()
+
+
+class Preset_Delegate(QStyledItemDelegate):
+    '''
+    # Preset_Delegate
+    #### Paints a preset of the gallery by copying its swatch from the atlas onto the shared shadow
+    ---
+    ## Parameters
+    - atlas [Preset_Atlas]: The atlas which holds the swatches
+    - parent [QWidget]: The view which uses the delegate
+    '''
+    def __init__(self, atlas: Preset_Atlas, parent: QWidget = None) -> None:
+        super().__init__(parent)
+        self.atlas = atlas
+
+    def paint(self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex | QPersistentModelIndex):
+        '''
+        paint
+        ---
+        Draws the shadow and the swatch centered in the item's cell
+        '''
+        card = QRect(option.rect.x() + (option.rect.width() - CARD)//2, option.rect.y() + (option.rect.height() - CARD)//2, CARD, CARD)
+        painter.drawPixmap(card.x() - SHADOW, card.y() - SHADOW, self.atlas.shadow)
+        pixmap, source = self.atlas.tile(index.row(), painter.device().devicePixelRatioF())
+        painter.drawPixmap(QRectF(card), pixmap, source)
+
+    def sizeHint(self, option: QStyleOptionViewItem, index: QModelIndex | QPersistentModelIndex) -> QSize:
+        '''
+        sizeHint
+        ---
+        Every cell of the gallery has the same size
+        '''
+        return QSize(CELL, CELL)
+
+
+class Show_Presets(QListView):
+    '''
+    # Show_Presets
+    #### Shows all the presets and their preview, so that the user can pick the prefered preset.
+    #### It is a virtualized list: only the visible swatches are painted, each of them rendered once into the atlas.
+    ---
+    ## Parameters
+    - win [QWidget]: The Window instance which holds all the static elements of the window.
+    '''
+    chosen = Signal(QGradient.Preset)
+    first_frame = Signal(float)
+
+    def __init__(self, win: QWidget) -> None:
+        self.created = perf_counter()
+        self.first_frame_ms: float = None
+        super().__init__(win)
+        self.presets = PRESETS
+
+        self.setViewMode(QListView.ViewMode.IconMode)
+        self.setMovement(QListView.Movement.Static)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setUniformItemSizes(True)
+        self.setGridSize(QSize(CELL, CELL))
+        self.setSelectionMode(QListView.SelectionMode.NoSelection)
+        self.setVerticalScrollMode(QListView.ScrollMode.ScrollPerPixel)
+        self.verticalScrollBar().setSingleStep(40)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOn)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setViewportMargins(70, 20, 0, 0)
+        self.setStyleSheet('QListView { border: none; background: palette(window); }')
+
+        self.setModel(QStringListModel([preset.name for preset in self.presets], self))
+        self.setItemDelegate(Preset_Delegate(Preset_Atlas(self.presets), self))
+        self.clicked.connect(lambda index: self.chosen.emit(self.presets[index.row()]))
+
+    def paintEvent(self, event: QPaintEvent):
+        '''
+        paintEvent
+        ---
+        Paints the visible swatches, and records the time it took from creating the gallery to its first frame
+        '''
+        super().paintEvent(event)
+        if self.first_frame_ms is None:
+            self.first_frame_ms = (perf_counter() - self.created) * 1000
+            self.first_frame.emit(self.first_frame_ms)
+
+
+class Gradient_Background:
+    '''
+    # Gradient_Background
+    #### Renders a preset's gradient into a pixmap once per size, so that repaints only copy the damaged part of it
+    ---
+    ## Parameters
+    - preset [QGradient.Preset]: The preset to render
+    '''
+    def __init__(self, preset: QGradient.Preset) -> None:
+        self.preset = preset
+        self.pixmap: QPixmap = None
+        self.key: tuple = None
+
+    def render(self, size: QSize, gradient_size: QSize, dpr: float = 1.0) -> QPixmap:
+        '''
+        ## render
+        ##### returns the background, drawing it only if the size changed since the last call
+        ---
+        ## Parameters
+        - size [QSize]: the size of the widget
+        - gradient_size [QSize]: the size the gradient is stretched over, which may be bigger than the widget
+        - dpr [float]: the device pixel ratio of the widget
+        '''
+        key = (size.toTuple(), gradient_size.toTuple(), dpr)
+        if key != self.key:
+            self.key = key
+            self.pixmap = QPixmap(size * dpr)
+            self.pixmap.setDevicePixelRatio(dpr)
+            p = QPainter(self.pixmap)
+            p.setBrush(QGradient(self.preset))
+            p.drawRect(0, 0, gradient_size.width(), gradient_size.height())
+            p.end()
+        return self.pixmap
+
+    def paint(self, painter: QPainter, rect: QRect):
+        '''
+        ## paint
+        ##### copies the part of the rendered background under a rect
+        ---
+        ## Parameters
+        - painter [QPainter]: the painter of the widget
+        - rect [QRect]: the damaged rect
+        '''
+        dpr = self.pixmap.devicePixelRatio()
+        painter.drawPixmap(QRectF(rect), self.pixmap, QRectF(rect.x()*dpr, rect.y()*dpr, rect.width()*dpr, rect.height()*dpr))
@@ -0,0 +1,136 @@
+from __future__ import annotations
+import re
+from bisect import insort
+from collections import defaultdict
+from library import Song
+
+
+# word prefixes up to PREFIX_LEN characters are indexed, longer query words are checked against the words of the candidates
+PREFIX_LEN = 4
+RESULTS = 50
+WORD = re.compile(r'\w+')
+
+
+def words_of(text: str) -> list[str]:
+    return WORD.findall(text.casefold())
+
+
+class Search_Index:
+    '''
+    # Search_Index
+    #### A type-ahead index over the title, band, album and file name of the songs, which finds the words starting with what was typed
+    Every word prefix up to PREFIX_LEN characters points to the songs which have it, in two posting lists: one for the title and one for the other fields.
+    Each list is kept sorted by title, so the first results of a search are already ranked: title matches first, then alphabetically, and a search stops once it has enough.
+    Songs are indexed in title order, so building the index appends to the lists and never sorts them.
+    ---
+    ## Parameters
+    - songs [list[Song]]: The songs to index
+    '''
+    def __init__(self, songs: list[Song] = ()) -> None:
+        # song -> (words of the title, words of all fields, entries in the postings), the words joined with a space in front of each,
+        # so checking whether a song has a word starting with a token is one substring search
+        self.words: dict[Song, tuple[str, str, int]] = {}
+        self.postings: tuple[dict[str, list[Song]], dict[str, list[Song]]] = (defaultdict(list), defaultdict(list))
+        # entries of songs which were removed or changed, left in the postings until there are enough to rebuild
+        self.stale = 0
+        self.entries = 0
+        for song in sorted(songs, key=self.sort_key): self.index(song, list.append)
+
+    def __len__(self): return len(self.words)
+
+    @staticmethod
+    def sort_key(song: Song) -> tuple[str, str]:
+        return song.title.casefold(), song.name
+
+    def add(self, song: Song):
+        '''
+        ## add
+        ##### indexes a song
+        ---
+        ## Parameters
+        - song [Song]: the song
+        '''
+        if song in self.words: self.remove(song)
+        self.index(song, lambda posting, song: insort(posting, song, key=self.sort_key))
+
+    def index(self, song: Song, put):
+        '''
+        ## index
+        ##### splits a song into words and puts it into the posting list of each of their prefixes
+        ---
+        ## Parameters
+        - song [Song]: the song
+        - put [Callable]: puts the song into a posting list, appending while building and inserting in order afterwards
+        '''
+        title = tuple(dict.fromkeys(words_of(song.title)))
+        other = tuple(word for word in dict.fromkeys(words_of(f'{song.band} {song.album} {song.name}')) if word not in title)
+        entries = 0
+        for field, words in enumerate((title, other)):
+            postings = self.postings[field]
+            prefixes = {word[:length] for word in words for length in range(1, min(len(word), PREFIX_LEN) + 1)}
+            for prefix in prefixes: put(postings[prefix], song)
+            entries += len(prefixes)
+        title_text = ''.join(f' {word}' for word in title)
+        self.words[song] = (title_text, title_text + ''.join(f' {word}' for word in other), entries)
+        self.entries += entries
+
+    def remove(self, song: Song):
+        '''
+        ## remove
+        ##### takes a song out of the results. Its entries are only dropped from the postings once a quarter of them are stale.
+        ---
+        ## Parameters
+        - song [Song]: the song
+        '''
+        words = self.words.pop(song, None)
+        if words is None: return
+        self.stale += words[2]
+        if self.stale * 4 > self.entries: self.rebuild()
+
+    def update(self, song: Song):
+        '''
+        ## update
+        ##### indexes a song again after its tags changed
+        ---
+        ## Parameters
+        - song [Song]: the song
+        '''
+        self.remove(song)
+        self.add(song)
+
+    def rebuild(self):
+        '''
+        rebuild
+        ---
+        drops the stale entries by indexing the songs again
+        '''
+        self.__init__(list(self.words))
+
+    def search(self, query: str, limit: int = RESULTS) -> list[Song]:
+        '''
+        ## search
+        ##### returns the songs which have a word starting with each word of the query, songs matching in the title first
+        ---
+        ## Parameters
+        - query [str]: what was typed
+        - limit [int]: how many results are returned at most
+        '''
+        tokens = list(dict.fromkeys(words_of(query)))
+        if not tokens: return []
+        # the token with the fewest candidates leads, the others are checked on its candidates
+        lead = min(tokens, key=lambda token: len(self.postings[0].get(token[:PREFIX_LEN], ())) + len(self.postings[1].get(token[:PREFIX_LEN], ())))
+        needle = f' {lead}'
+        rest = [f' {token}' for token in tokens if token is not lead]
+        results, seen = [], set()
+        for field in (0, 1):
+            for song in self.postings[field].get(lead[:PREFIX_LEN], ()):
+                if song in seen: continue
+                words = self.words.get(song)
+                if words is None: continue
+                # longer tokens and stale entries of changed songs are weeded out by checking the actual words
+                if needle not in words[field]: continue
+                if rest and not all(token in words[1] for token in rest): continue
+                seen.add(song)
+                results.append(song)
+                if len(results) == limit: return results
+        return results
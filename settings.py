@@ -0,0 +1,128 @@
+from __future__ import annotations
+import json, os
+from concurrent.futures import ThreadPoolExecutor
+from PySide6.QtCore import QObject, QTimer
+from core import atomic_write
+from library import CACHE_DIR
+
+
+SETTINGS_FILE = 'settings.json'
+# where the preset used to be kept, it is moved into the settings the first time they are loaded
+LEGACY_PREF_FILE = 'assets\\preset_preference.txt'
+# songs picked with Open Multiple Files are kept as a playlist, so the play order comes back after a restart
+SESSION_PLAYLIST = os.path.join(CACHE_DIR, 'session.m3u8')
+# changes are written at most once per SAVE_MS, however often they come. This is a throttle, not a debounce:
+# the position changes every second while playing, so waiting for the changes to stop would never write it.
+SAVE_MS = 2000
+
+
+class Settings(QObject):
+    '''
+    # Settings
+    #### The settings and the state of the last session, which are restored on startup
+    Every value has a type, values of the file which don't match it are dropped for the default.
+    The first change starts a SAVE_MS throttle, which later changes don't restart, and everything changed until it runs out is written together on a worker thread to a temporary file, which is then renamed over the old one, so a crash never leaves a half written file.
+    ---
+    ## Parameters
+    - parent [QObject]: The QObject which owns the settings
+    - path [str]: The path of the settings file
+    '''
+    def __init__(self, parent: QObject = None, path: str = SETTINGS_FILE) -> None:
+        super().__init__(parent)
+        self.path = path
+
+        # the name of the QGradient preset, empty until one is saved as default
+        self.preset: str = ''
+        # the volume slider position between 0 and 100
+        self.volume: int = 20
+        # the hex id of the speaker device, empty for the default device
+        self.device: str = ''
+        self.autoplay: bool = True
+        self.shuffle: bool = False
+        # the playlist the play order was loaded from, empty for the library
+        self.playlist: str = ''
+        # the path of the current song and the position in it in milliseconds
+        self.song: str = ''
+        self.position: int = 0
+        # how often the spectrum is drawn per second, 0 turns it off
+        self.spectrum_fps: int = 30
+        # how many seconds the end of a song overlaps the start of the next one, 0 cuts between them
+        self.crossfade: int = 0
+        # whether the play order passes over songs which are copies of another song of it
+        self.skip_duplicates: bool = False
+        self.fields = ('preset', 'volume', 'device', 'autoplay', 'shuffle', 'playlist', 'song', 'position', 'spectrum_fps', 'crossfade', 'skip_duplicates')
+
+        self.pool = ThreadPoolExecutor(1)
+        # started by the first change since the last save and never restarted, see SAVE_MS
+        self.throttle = QTimer(self)
+        self.throttle.setSingleShot(True)
+        self.throttle.setInterval(SAVE_MS)
+        self.throttle.timeout.connect(self.save)
+
+        self.load()
+
+    def load(self):
+        '''
+        load
+        ---
+        reads the settings file, falling back to the old preset file the first time
+        '''
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f: values = json.load(f)
+        except (OSError, ValueError):
+            values = {}
+            try:
+                with open(LEGACY_PREF_FILE, 'r') as f: values['preset'] = f.read().strip()
+            except OSError: pass
+        if not isinstance(values, dict): return
+        for name in self.fields:
+            value = values.get(name)
+            if type(value) is type(getattr(self, name)): setattr(self, name, value)
+
+    def set(self, name: str, value):
+        '''
+        ## set
+        ##### changes a value, it is written when the running throttle runs out, or SAVE_MS from now if none runs
+        ---
+        ## Parameters
+        - name [str]: the name of the value
+        - value: the new value, of the type of the old one
+        '''
+        if getattr(self, name) == value: return
+        setattr(self, name, value)
+        if not self.throttle.isActive(): self.throttle.start()
+
+    def save(self, wait: bool = False):
+        '''
+        ## save
+        ##### writes the settings on the worker thread
+        ---
+        ## Parameters
+        - wait [bool]: whether to wait until they are written, like when the player quits
+        '''
+        self.throttle.stop()
+        data = json.dumps({name: getattr(self, name) for name in self.fields}, indent=1)
+        future = self.pool.submit(self.write, data)
+        if wait: future.result()
+
+    def write(self, data: str):
+        '''
+        ## write
+        ##### writes the settings with atomic_write, runs on the worker thread. A failed write keeps the settings file of the last one.
+        ---
+        ## Parameters
+        - data [str]: the settings as JSON
+        '''
+        try: atomic_write(self.path, data)
+        except OSError: pass
+
+    def run(self, task, *args):
+        '''
+        ## run
+        ##### runs a write on the worker thread, after the writes which are already queued
+        ---
+        ## Parameters
+        - task [Callable]: the function which writes
+        - args: its arguments
+        '''
+        self.pool.submit(task, *args)
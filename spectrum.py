@@ -0,0 +1,260 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+import numpy as np
+from PySide6.QtCore import QEvent, QObject, QRectF, QTimer, Signal
+from PySide6.QtGui import QColor, QPainter, QPaintEvent
+from PySide6.QtWidgets import QWidget
+from core import metrics
+if TYPE_CHECKING: from PySide6.QtMultimedia import QAudioBuffer
+
+
+SPECTRUM_FPS = 30
+SPECTRUM_BANDS = 32
+FFT_SIZE = 2048
+# at most this many windows of the frames since the last frame are transformed, together in one FFT
+MAX_WINDOWS = 4
+LOW_HZ, HIGH_HZ = 40, 16000
+# levels are shown from FLOOR_DB up to full scale
+FLOOR_DB = -70.0
+# how much of the height a bar falls per frame, bars rise at once
+FALL = 0.06
+
+
+class Band_Reducer:
+    '''
+    # Band_Reducer
+    #### Turns frames into the levels of log spaced frequency bands, with one windowed real FFT over a batch of windows
+    ---
+    ## Parameters
+    - bands [int]: How many bands the spectrum is reduced to
+    '''
+    def __init__(self, bands: int = SPECTRUM_BANDS) -> None:
+        self.bands = bands
+        self.window = np.hanning(FFT_SIZE).astype(np.float32)
+        # the power of a full scale sine in its bin, which is 0 dB
+        self.reference = (self.window.sum() / 2) ** 2
+        self.rate = 0
+        self.edges: np.ndarray = None
+        self.widths: np.ndarray = None
+
+    def set_rate(self, rate: int):
+        '''
+        ## set_rate
+        ##### places the band edges on the FFT bins of a sample rate, bands narrower than a bin are merged
+        ---
+        ## Parameters
+        - rate [int]: the sample rate
+        '''
+        self.rate = rate
+        bins = FFT_SIZE // 2 + 1
+        edges = np.geomspace(LOW_HZ, min(HIGH_HZ, rate / 2), self.bands + 1) * FFT_SIZE / rate
+        self.edges = np.unique(np.clip(np.round(edges), 1, bins - 1).astype(np.intp))
+        self.widths = np.diff(self.edges)
+
+    def levels(self, frames: np.ndarray, rate: int) -> np.ndarray:
+        '''
+        ## levels
+        ##### returns the level of every band between 0 and 1, averaged over the last windows of the frames
+        ---
+        ## Parameters
+        - frames [np.ndarray]: the audio, one column per channel, scaled to -1..1
+        - rate [int]: the sample rate
+        '''
+        if rate != self.rate: self.set_rate(rate)
+        mono = frames.mean(axis=1, dtype=np.float32) if frames.ndim == 2 else frames.astype(np.float32)
+        count = min(max(len(mono) // FFT_SIZE, 1), MAX_WINDOWS)
+        if len(mono) < FFT_SIZE: mono = np.concatenate((np.zeros(FFT_SIZE - len(mono), np.float32), mono))
+        windows = mono[-count * FFT_SIZE:].reshape(count, FFT_SIZE) * self.window
+        power = (np.abs(np.fft.rfft(windows, axis=1)) ** 2).mean(axis=0)
+        bands = np.add.reduceat(power[:self.edges[-1]], self.edges[:-1]) / self.widths
+        with np.errstate(divide='ignore'): db = 10 * np.log10(bands / self.reference)
+        return np.clip((db - FLOOR_DB) / -FLOOR_DB, 0, 1)
+
+
+class Spectrum_Analyzer(QObject):
+    '''
+    # Spectrum_Analyzer
+    #### Collects the audio the player outputs and reduces it to band levels on a worker thread, at most fps times a second
+    Only the levels reach the GUI thread. While the watched window is hidden or minimized nothing is collected or computed, running_changed lets the owner stop the audio tap as well.
+    ---
+    ## Parameters
+    - parent [QObject]: The QObject which owns the analyzer
+    - window [QObject]: The window whose visibility pauses the analyzer, None to never pause
+    - fps [int]: The most levels per second
+    - bands [int]: How many bands the spectrum is reduced to
+    '''
+    levels_ready = Signal(object)
+    running_changed = Signal(bool)
+    reduced = Signal(object)
+
+    def __init__(self, parent: QObject = None, window: QObject = None, fps: int = SPECTRUM_FPS, bands: int = SPECTRUM_BANDS) -> None:
+        super().__init__(parent)
+        self.window = window
+        self.reducer = Band_Reducer(bands)
+        self.frames: list[np.ndarray] = []
+        self.count = 0
+        self.rate = 0
+        self.busy = False
+        self.idle = 0
+        self.running = window is None or (window.isVisible() and not window.isMinimized())
+
+        self.pool = ThreadPoolExecutor(1)
+        self.timer = QTimer(self)
+        self.timer.setInterval(max(1000 // max(fps, 1), 1))
+        self.timer.timeout.connect(self.tick)
+        self.reduced.connect(self.on_reduced)
+        if window is not None: window.installEventFilter(self)
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        '''
+        eventFilter
+        ---
+        pauses the analyzer while the window is hidden to the tray or minimized, and resumes it once it is shown again
+        '''
+        if event.type() in (QEvent.Type.Show, QEvent.Type.Hide, QEvent.Type.WindowStateChange):
+            running = self.window.isVisible() and not self.window.isMinimized()
+            if running != self.running:
+                self.running = running
+                if not running:
+                    self.timer.stop()
+                    self.frames.clear()
+                    self.count = 0
+                self.running_changed.emit(running)
+        return False
+
+    def on_buffer(self, buffer: QAudioBuffer):
+        '''
+        ## on_buffer
+        ##### collects a buffer which the player output
+        ---
+        ## Parameters
+        - buffer [QAudioBuffer]: the audio
+        '''
+        if not self.running: return
+        from decoder import buffer_frames
+        self.add(buffer_frames(buffer), buffer.format().sampleRate())
+
+    def add(self, frames: np.ndarray, rate: int):
+        '''
+        ## add
+        ##### collects frames until the next tick, only the last MAX_WINDOWS windows of them are kept
+        ---
+        ## Parameters
+        - frames [np.ndarray]: the audio, one column per channel, scaled to -1..1
+        - rate [int]: the sample rate
+        '''
+        if not self.running or not len(frames): return
+        if rate != self.rate:
+            self.frames.clear()
+            self.count = 0
+            self.rate = rate
+        self.frames.append(frames)
+        self.count += len(frames)
+        while self.count - len(self.frames[0]) >= MAX_WINDOWS * FFT_SIZE: self.count -= len(self.frames.pop(0))
+        self.idle = 0
+        if not self.timer.isActive(): self.timer.start()
+
+    def tick(self):
+        '''
+        tick
+        ---
+        hands the frames since the last tick to the worker, unless it is still busy with the last ones.
+        Without audio the bars are let fall for a second, then the timer stops until audio comes again. Letting them fall happens right here on the GUI thread,
+        only the levels of the worker tell it that it is free again.
+        '''
+        if not self.frames:
+            self.idle += 1
+            self.levels_ready.emit(None)
+            if self.idle * self.timer.interval() >= 1000: self.timer.stop()
+            return
+        if self.busy: return
+        self.busy = True
+        frames = self.frames[0] if len(self.frames) == 1 else np.concatenate(self.frames)
+        self.frames, self.count = [], 0
+        future = self.pool.submit(self.reduce, frames, self.rate)
+        future.add_done_callback(lambda future: self.reduced.emit(None if future.cancelled() or future.exception() else future.result()))
+
+    def on_reduced(self, levels: np.ndarray | None):
+        '''
+        ## on_reduced
+        ##### passes on the levels of the worker on the GUI thread, the next frames can be handed to it now
+        ---
+        ## Parameters
+        - levels [np.ndarray | None]: the level of every band, None if computing them failed
+        '''
+        self.busy = False
+        self.levels_ready.emit(levels)
+
+    def reduce(self, frames: np.ndarray, rate: int) -> np.ndarray:
+        '''
+        ## reduce
+        ##### computes the band levels, runs on the worker thread
+        ---
+        ## Parameters
+        - frames [np.ndarray]: the audio since the last tick
+        - rate [int]: the sample rate
+        '''
+        start = metrics.start()
+        levels = self.reducer.levels(frames, rate)
+        metrics.stop('spectrum fft', start)
+        return levels
+
+    def stop(self):
+        '''
+        stop
+        ---
+        stops collecting and computing
+        '''
+        self.timer.stop()
+        self.frames.clear()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+class Spectrum_View(QWidget):
+    '''
+    # Spectrum_View
+    #### Draws the band levels as bars. Bars rise at once and fall slowly, a repaint only happens when new levels come in, so the analyzer caps its rate.
+    ---
+    ## Parameters
+    - colors [tuple[tuple[int]]]: the color preset used as a tuple of rgba values
+    - parent [QWidget]: the widget which holds the view
+    '''
+    def __init__(self, colors: tuple[tuple[int]], parent: QWidget = None) -> None:
+        super().__init__(parent)
+        self.color = QColor(*colors[1]).darker(140)
+        self.levels: np.ndarray = None
+        self.bars: list[float] = []
+
+    def set_levels(self, levels: np.ndarray | None):
+        '''
+        ## set_levels
+        ##### shows new levels, None lets the bars fall to the bottom
+        ---
+        ## Parameters
+        - levels [np.ndarray | None]: the level of every band between 0 and 1
+        '''
+        if levels is None:
+            if self.levels is None: return
+            levels = np.zeros_like(self.levels)
+        if self.levels is None or len(self.levels) != len(levels): self.levels = levels
+        else: self.levels = np.maximum(levels, self.levels - FALL)
+        if not self.levels.any(): self.levels = None
+        self.bars = [] if self.levels is None else self.levels.tolist()
+        self.update()
+
+    def paintEvent(self, event: QPaintEvent):
+        '''
+        paintEvent
+        ---
+        paints one bar per band, from the bottom up
+        '''
+        if not self.bars: return
+        start = metrics.start()
+        width = self.width() / len(self.bars)
+        height = self.height()
+        painter = QPainter(self)
+        for band, level in enumerate(self.bars):
+            if level > 0: painter.fillRect(QRectF(band * width + 1, height * (1 - level), width - 2, height * level), self.color)
+        painter.end()
+        metrics.stop('spectrum paint', start)
@@ -0,0 +1,31 @@
+from __future__ import annotations
+import os
+from time import perf_counter, sleep
+# set before Qt is imported, so the tests run without a display
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+import pytest
+from PySide6.QtWidgets import QApplication
+
+
+@pytest.fixture(scope='session')
+def app() -> QApplication:
+    '''
+    ## app
+    ##### the QApplication of the whole run, the benchmarks and the playback core need an event loop and some of them widgets
+    '''
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def wait_until(app: QApplication):
+    '''
+    ## wait_until
+    ##### runs the event loop until a condition holds, failing the test if it doesn't within timeout seconds
+    '''
+    def wait(condition, timeout: float = 5) -> None:
+        deadline = perf_counter() + timeout
+        while not condition():
+            if perf_counter() > deadline: pytest.fail('timed out waiting for the event loop')
+            app.processEvents()
+            sleep(0.001)
+    return wait
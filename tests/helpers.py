@@ -0,0 +1,85 @@
+from __future__ import annotations
+from time import perf_counter
+from PySide6.QtCore import QTimer, Qt
+from core import Media_Backend
+from library import Song
+
+# how often the fake player reports its position, roughly what the Qt FFmpeg backend does while playing
+POSITION_NOTIFY_MS = 10
+# how long the fake backend takes to load a song which wasn't preloaded
+LOAD_MS = 40
+
+
+class Fake_Backend(Media_Backend):
+    '''
+    # Fake_Backend
+    #### A media backend without audio: loading a song takes LOAD_MS on a timer, a preloaded song is swapped in at once and the position follows the wall clock while playing
+    ---
+    ## Parameters
+    - duration [int]: the length of every song in milliseconds
+    '''
+    def __init__(self, duration: int = 3 * 60 * 1000) -> None:
+        super().__init__()
+        self.length = duration
+        self.song: Song = None
+        self.preloaded: Song = None
+        self.playing = False
+        self.start = perf_counter()
+        self.offset = 0
+        self.timer = QTimer(self)
+        self.timer.setInterval(POSITION_NOTIFY_MS)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(lambda: self.positionChanged.emit(self.position()))
+
+    def set_song(self, song: Song, play: bool = True) -> bool:
+        self.song = song
+        self.pause()
+        self.offset = 0
+        if song is self.preloaded:
+            if play: self.play()
+            return True
+        QTimer.singleShot(LOAD_MS, self.loaded.emit)
+        return False
+
+    def preload(self, song: Song): self.preloaded = song
+
+    def play(self):
+        self.start = perf_counter()
+        self.playing = True
+        self.timer.start()
+
+    def pause(self):
+        self.offset = self.position()
+        self.playing = False
+        self.timer.stop()
+
+    def is_playing(self) -> bool: return self.playing
+    def position(self) -> int: return self.offset + (int((perf_counter() - self.start) * 1000) if self.playing else 0)
+    def duration(self) -> int: return self.length
+
+    def set_position(self, position: int):
+        self.offset = position
+        self.start = perf_counter()
+
+    def set_volume(self, level: float): pass
+
+
+def make_songs(count: int) -> list[Song]:
+    return [Song(f'Song {i:06}', path=f'{i:06}.mp3') for i in range(count)]
+
+
+def mp3_frames(frames: int, vbr: bool = False, header: bytes = b'') -> bytes:
+    '''
+    ## mp3_frames
+    ##### builds silent MPEG 1 layer III frames at 44.1 kHz, of 128 kbit/s or alternating with 160 kbit/s, the first one holding a Xing or VBRI header if given.
+    ##### Frames are padded by a byte now and then like an encoder does, so the bitrate averages out exactly.
+    '''
+    out, rest = [], 0
+    for i in range(frames):
+        index, bitrate = (10, 160000) if vbr and i % 2 else (9, 128000)
+        rest += 144 * bitrate % 44100
+        padding = rest >= 44100
+        if padding: rest -= 44100
+        frame = bytes((0xFF, 0xFB, index << 4 | padding << 1, 0)) + (header if i == 0 else b'')
+        out.append(frame + bytes(144 * bitrate // 44100 + padding - len(frame)))
+    return b''.join(out)
@@ -0,0 +1,132 @@
+from __future__ import annotations
+import math, os
+import pytest
+import bench
+
+# the benchmarks run as tests with small sizes, so they stay runnable and their results make sense; python bench.py runs them full size
+SECONDS = 0.5
+
+
+def check_timings(results: dict[str, float | str]) -> None:
+    '''
+    ## check_timings
+    ##### checks that a benchmark reported something and every timing it reported is a real duration
+    '''
+    assert results
+    for name, value in results.items():
+        if isinstance(value, float): assert math.isfinite(value) and value >= 0, name
+
+
+def test_library(app):
+    results = bench.bench_library((200,))
+    check_timings(results)
+    assert set(results) == {f'   200 files: {name}' for name in ('cold scan', 'warm load', 'warm load + play order', 'rescan', 'build every song')}
+
+
+def test_shuffle(app):
+    results = bench.bench_shuffle((10000,), repeats=3)
+    check_timings(results)
+    # the lazy permutation doesn't depend on the size of the library
+    assert results[' 10000 songs: Play_Queue'] < results[' 10000 songs: copy + shuffle']
+
+
+def test_track_change(app):
+    results = bench.bench_track_change(changes=3)
+    check_timings(results)
+    assert results['preloaded: worst'] < bench.LOAD_MS <= results['load on skip: mean']
+
+
+def test_core_cpu(app):
+    check_timings(bench.bench_core_cpu(SECONDS))
+
+
+def test_position_timer(app):
+    check_timings(bench.bench_position_timer(SECONDS))
+
+
+def test_volume(app):
+    results = bench.bench_volume()
+    calls = {name: int(value.split()[0]) for name, value in results.items()}
+    assert calls['every move'] == bench.DRAG_MOVES
+    assert 0 < calls['coalesced'] < calls['every move']
+
+
+def test_preset_gallery(app):
+    check_timings(bench.bench_preset_gallery())
+
+
+def test_background(app):
+    check_timings(bench.bench_background(frames=10))
+
+
+def test_waveform(app):
+    pytest.importorskip('peaks', exc_type=ImportError)
+    check_timings(bench.bench_waveform(frames=20))
+
+
+def test_loudness(app):
+    pytest.importorskip('decoder', exc_type=ImportError)
+    check_timings(bench.bench_loudness(songs=2, seconds=5))
+
+
+def test_crossfade(app):
+    pytest.importorskip('playback', exc_type=ImportError)
+    check_timings(bench.bench_crossfade(fade_ms=500, seconds=2))
+
+
+def test_playlist(app):
+    results = bench.bench_playlist(entries=2000, files=50)
+    check_timings(results)
+    assert results['missing, reported at once'] == '20 entries'
+    assert 'save 1980 songs' in results
+
+
+def test_watcher(app):
+    results = bench.bench_watcher(existing=50, copied=200, burst=50)
+    check_timings(results)
+    # every copied song arrived before the timeout
+    assert 'settled after last copy' in results
+
+
+def test_search(app):
+    check_timings(bench.bench_search(count=2000, words=300))
+
+
+def test_settings(app):
+    results = bench.bench_settings(SECONDS)
+    check_timings(results)
+    written = next(int(value.split()[0]) for name, value in results.items() if name.startswith('files written'))
+    assert 1 <= written <= 2
+
+
+def test_metrics(app):
+    check_timings(bench.bench_metrics(calls=1000))
+
+
+def test_ipc(app, monkeypatch):
+    # the forwarding launch imports ipc from the working directory
+    monkeypatch.chdir(os.path.dirname(os.path.abspath(bench.__file__)))
+    check_timings(bench.bench_ipc(requests=3))
+
+
+def test_spectrum(app):
+    pytest.importorskip('numpy')
+    check_timings(bench.bench_spectrum(SECONDS))
+
+
+def test_duplicates(app):
+    results = bench.bench_duplicates(count=60, copies=10, audio_kb=4)
+    check_timings(results)
+    assert results['duplicates found'] == '10'
+
+
+def test_durations(app):
+    results = bench.bench_durations(count=20, frames=200, songs=1000)
+    check_timings(results)
+    assert all(value == 0 for name, value in results.items() if name.endswith('error (ms)'))
+
+
+def test_deferred(app):
+    results = bench.bench_deferred(count=300)
+    check_timings(results)
+    assert 'later start: everything done' in results
@@ -0,0 +1,162 @@
+from __future__ import annotations
+import os, random
+from time import sleep
+import pytest
+import core as core_module
+from tests.helpers import LOAD_MS, Fake_Backend, make_songs
+from core import Play_Queue, Playback_Core, Volume_Backend, Volume_Control, atomic_write, format_length, format_time
+
+
+@pytest.fixture
+def core(app) -> Playback_Core:
+    '''
+    ## core
+    ##### a playback core over 5 songs with the fake backend, recording what its signals say
+    '''
+    core = Playback_Core(Fake_Backend(), Play_Queue(make_songs(5), random.Random(1)))
+    core.changed, core.ready, core.playing = [], [], []
+    core.song_changed.connect(core.changed.append)
+    core.song_ready.connect(core.ready.append)
+    core.playing_changed.connect(core.playing.append)
+    yield core
+    core.backend.pause()
+
+
+def test_format_time():
+    assert format_time(0) == '00:00' and format_time(61499) == '01:01' and format_time(3599600) == '60:00'
+    assert format_length(59000) == '0:59' and format_length(3723000) == '1:02:03'
+
+
+def test_atomic_write_replaces_the_file_or_leaves_it(tmp_path):
+    path = str(tmp_path / 'folder' / 'state.json')
+    atomic_write(path, 'first\n')
+    atomic_write(path, b'second')
+    with open(path, 'rb') as f: assert f.read() == b'second'
+    # a folder in the way makes the rename fail, the temporary file is cleaned up
+    folder = tmp_path / 'taken'
+    (folder / 'inside').mkdir(parents=True)
+    with pytest.raises(OSError): atomic_write(str(folder), 'data')
+    assert sorted(os.listdir(tmp_path)) == ['folder', 'taken']
+
+
+def test_start_loads_without_playing(core, wait_until):
+    songs = core.queue.songs
+    core.start()
+    assert core.changed == [songs[0]] and core.backend.song is songs[0]
+    wait_until(lambda: core.ready)
+    assert core.ready == [core.backend.duration()] and core.playing == [False]
+    assert not core.backend.is_playing()
+    # the next song is preloaded once the current one is ready
+    assert core.backend.preloaded is songs[1]
+
+
+def test_next_switches_to_the_preloaded_song_at_once(core, wait_until):
+    songs = core.queue.songs
+    core.start()
+    wait_until(lambda: core.ready)
+    core.next()
+    assert core.current is songs[1] and core.backend.song is songs[1]
+    assert len(core.ready) == 2 and core.playing[-1] is True and core.backend.is_playing()
+    assert core.backend.preloaded is songs[2]
+
+
+def test_song_which_wasnt_preloaded_plays_once_loaded(core, wait_until):
+    songs = core.queue.songs
+    core.start()
+    wait_until(lambda: core.ready)
+    core.jump_to(songs[3])
+    assert core.current is songs[3] and len(core.ready) == 1 and not core.backend.is_playing()
+    wait_until(lambda: len(core.ready) == 2, LOAD_MS / 1000 + 5)
+    assert core.backend.is_playing() and core.playing[-1] is True
+
+
+def test_previous_goes_back(core, wait_until):
+    songs = core.queue.songs
+    core.start()
+    wait_until(lambda: core.ready)
+    core.next()
+    core.next()
+    core.previous()
+    assert core.changed == [songs[0], songs[1], songs[2], songs[1]]
+
+
+def test_end_of_song_follows_autoplay(core, wait_until):
+    songs = core.queue.songs
+    core.start()
+    wait_until(lambda: core.ready)
+    core.backend.ended.emit()
+    assert core.current is songs[1] and core.backend.is_playing()
+    core.autoplay = False
+    core.backend.ended.emit()
+    assert core.current is songs[2] and not core.backend.is_playing()
+    # without autoplay a crossfade doesn't start the next song early
+    core.backend.ending.emit()
+    assert core.current is songs[2]
+
+
+def test_toggle_shuffle_keeps_the_song_and_preloads_the_new_next(core, wait_until):
+    core.start()
+    wait_until(lambda: core.ready)
+    shuffled = []
+    core.shuffle_changed.connect(shuffled.append)
+    current = core.current
+    core.toggle_shuffle()
+    assert shuffled == [True] and core.current is current and core.queue.current is current
+    assert core.backend.preloaded is core.queue.peek_next()
+
+
+def test_position_is_shown_once_per_second(core, wait_until):
+    texts = []
+    core.time_text_changed.connect(texts.append)
+    for position in (0, 200, 400, 1600, 1700, 2400):
+        core.on_position(position)
+    assert texts == ['00:00', '00:02']
+
+
+class Late_Volume(Volume_Backend):
+    '''
+    # Late_Volume
+    #### A volume backend which, like pycaw, can't set the volume until its session exists, and counts its calls
+    '''
+    def __init__(self) -> None:
+        self.session = False
+        self.calls = 0
+        self.levels = []
+
+    def set_volume(self, level: float) -> bool:
+        self.calls += 1
+        if self.session: self.levels.append(level)
+        return self.session
+
+
+def test_volume_without_a_session_is_retried_a_few_times(app, monkeypatch):
+    monkeypatch.setattr(core_module, 'VOLUME_RETRY_MS', 5)
+    backend = Late_Volume()
+    control = Volume_Control(backend)
+    control.set_level(40)
+    assert backend.calls == 1 and control.pending
+    # nothing is retried before playback starts
+    for _ in range(20):
+        app.processEvents()
+        sleep(0.01)
+    assert backend.calls == 1
+    control.set_playing(True)
+    for _ in range(40):
+        app.processEvents()
+        sleep(0.01)
+    assert backend.calls == 2 + core_module.VOLUME_RETRIES
+    assert control.pending and not control.retry_timer.isActive()
+
+
+def test_volume_is_applied_once_the_session_appears(app, monkeypatch, wait_until):
+    monkeypatch.setattr(core_module, 'VOLUME_RETRY_MS', 5)
+    backend = Late_Volume()
+    control = Volume_Control(backend)
+    control.set_level(40)
+    control.set_playing(True)
+    backend.session = True
+    wait_until(lambda: backend.levels)
+    assert backend.levels == [0.4] and not control.pending
+    control.set_playing(False)
+    control.set_playing(True)
+    assert backend.levels == [0.4]
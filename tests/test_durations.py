@@ -0,0 +1,40 @@
+from __future__ import annotations
+import pytest
+from tests.helpers import mp3_frames
+from durations import mp3_duration
+
+FRAMES = 1000
+EXPECTED = FRAMES * 1152 * 1000 // 44100
+ID3V2 = b'ID3\x03\x00\x00\x00\x00\x00\x00'
+
+
+@pytest.mark.parametrize('data', [
+    mp3_frames(FRAMES),
+    mp3_frames(FRAMES, True, bytes(32) + b'Xing' + (1).to_bytes(4, 'big') + FRAMES.to_bytes(4, 'big')),
+    mp3_frames(FRAMES, True, bytes(32) + b'VBRI' + bytes(10) + FRAMES.to_bytes(4, 'big')),
+    mp3_frames(FRAMES, True),
+], ids=['constant bitrate', 'Xing header', 'VBRI header', 'variable bitrate, no header'])
+def test_mp3_duration(tmp_path, data: bytes):
+    path = tmp_path / 'song.mp3'
+    path.write_bytes(ID3V2 + data)
+    assert mp3_duration(str(path), len(ID3V2)) == EXPECTED
+
+
+def test_mp3_duration_leaves_out_id3v1(tmp_path):
+    path = tmp_path / 'song.mp3'
+    path.write_bytes(mp3_frames(FRAMES) + b'TAG' + bytes(125))
+    assert mp3_duration(str(path), 0) == EXPECTED
+
+
+def test_mp3_duration_skips_junk_before_the_first_frame(tmp_path):
+    path = tmp_path / 'song.mp3'
+    # a lone sync byte which isn't followed by a second frame doesn't count
+    path.write_bytes(ID3V2 + b'\x00\xff\xfb\x90' + bytes(50) + mp3_frames(FRAMES))
+    assert mp3_duration(str(path), len(ID3V2)) == EXPECTED
+
+
+def test_mp3_duration_without_audio(tmp_path):
+    path = tmp_path / 'song.mp3'
+    path.write_bytes(ID3V2 + bytes(1000))
+    assert mp3_duration(str(path), len(ID3V2)) == 0
+    assert mp3_duration(str(tmp_path / 'missing.mp3'), 0) == 0
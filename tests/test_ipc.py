@@ -0,0 +1,99 @@
+from __future__ import annotations
+import json, os, socket as sockets, sys
+from time import perf_counter
+import pytest
+from PySide6.QtCore import QEvent
+from PySide6.QtNetwork import QLocalSocket
+from ipc import MAX_REQUEST, Instance_Server, forward, parse_args
+
+
+@pytest.fixture
+def server(app) -> Instance_Server:
+    '''
+    ## server
+    ##### a listening server of its own name, recording the requests it emits
+    '''
+    server = Instance_Server(name=f'PulsePlay-test-{os.getpid()}')
+    assert server.listen()
+    server.requests = []
+    server.received.connect(server.requests.append)
+    yield server
+    server.server.close()
+    # the connections of the test are deleted later, before the server is
+    app.sendPostedEvents(None, QEvent.Type.DeferredDelete)
+
+
+def send(server: Instance_Server, data: bytes) -> QLocalSocket:
+    '''
+    ## send
+    ##### connects to the server and writes raw bytes, like a launch which doesn't speak the protocol. They go out while the test runs the event loop.
+    '''
+    socket = QLocalSocket()
+    socket.connectToServer(server.name)
+    assert socket.waitForConnected(1000)
+    socket.write(data)
+    return socket
+
+
+def test_parse_args():
+    request = parse_args(['--next', '--metrics', '--bogus', 'song.mp3', '--show'])
+    assert request == {'commands': ['next', 'show'], 'files': [os.path.abspath('song.mp3')]}
+
+
+def test_forwarded_request_is_received(server, wait_until):
+    assert forward({'commands': ['pause'], 'files': ['/music/a.mp3']}, server.name)
+    wait_until(lambda: server.requests)
+    assert server.requests == [{'commands': ['pause'], 'files': ['/music/a.mp3']}]
+
+
+def test_forward_without_a_server():
+    assert not forward({'commands': [], 'files': []}, f'PulsePlay-nobody-{os.getpid()}', 50)
+
+
+def test_a_running_server_keeps_its_name(server, wait_until):
+    second = Instance_Server(name=server.name)
+    assert not second.listen()
+    assert forward({'commands': ['next'], 'files': []}, server.name)
+    wait_until(lambda: server.requests)
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='named pipes leave nothing behind')
+def test_the_socket_of_a_crashed_player_is_replaced(app, tmp_path):
+    path = str(tmp_path / 'player.sock')
+    stale = sockets.socket(sockets.AF_UNIX)
+    stale.bind(path)
+    stale.close()
+    server = Instance_Server(name=path)
+    assert server.listen()
+    server.server.close()
+
+
+def test_fields_of_the_wrong_type_are_dropped(server, wait_until):
+    socket = send(server, json.dumps({'commands': 'next', 'files': ['a.mp3', 3, None], 'other': 1}).encode() + b'\n')
+    wait_until(lambda: server.requests)
+    assert server.requests == [{'commands': [], 'files': ['a.mp3']}]
+    socket.abort()
+
+
+@pytest.mark.parametrize('data', [b'not json\n', b'["next"]\n', b'{"commands": ["next"]}{\n'], ids=['not json', 'not an object', 'trailing data'])
+def test_malformed_requests_are_ignored(server, wait_until, data):
+    socket = send(server, data)
+    # the server closes the connection once it read the line
+    wait_until(lambda: socket.state() == QLocalSocket.LocalSocketState.UnconnectedState)
+    assert server.requests == []
+
+
+def test_request_waits_for_its_line(app, server, wait_until):
+    socket = send(server, b'{"commands": ["next"], ')
+    end = perf_counter() + 0.1
+    while perf_counter() < end: app.processEvents()
+    assert server.requests == [] and socket.state() == QLocalSocket.LocalSocketState.ConnectedState
+    socket.write(b'"files": []}\n')
+    wait_until(lambda: server.requests)
+    assert server.requests == [{'commands': ['next'], 'files': []}]
+
+
+def test_oversized_request_is_aborted(server, wait_until):
+    socket = send(server, b'x' * (MAX_REQUEST + 1))
+    wait_until(lambda: socket.state() == QLocalSocket.LocalSocketState.UnconnectedState)
+    assert server.requests == []
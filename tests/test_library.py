@@ -0,0 +1,137 @@
+from __future__ import annotations
+import marshal, os
+from core import Play_Queue
+from library import INDEX_FIELDS, Library_Index, read_tags
+
+
+def frame(name: bytes, text: str, encoding: int = 0) -> bytes:
+    data = bytes((encoding,)) + text.encode(('latin-1', 'utf-16', 'utf-16-be', 'utf-8')[encoding])
+    return name + len(data).to_bytes(4, 'big') + b'\x00\x00' + data
+
+
+def id3v2(*frames: bytes) -> bytes:
+    body = b''.join(frames)
+    size = len(body)
+    return b'ID3\x03\x00\x00' + bytes((size >> 21 & 0x7f, size >> 14 & 0x7f, size >> 7 & 0x7f, size & 0x7f)) + body
+
+
+def id3v1(title: str, artist: str = '', album: str = '') -> bytes:
+    fields = b''.join(text.encode('latin-1').ljust(30, b'\x00') for text in (title, artist, album))
+    return (b'TAG' + fields).ljust(128, b'\x00')
+
+
+AUDIO = b'\xff\xfb\x90\x00' + bytes(400)
+
+
+def make_index(folder, files: dict[str, bytes]) -> Library_Index:
+    songs = folder / 'songs'
+    songs.mkdir(exist_ok=True)
+    for name, data in files.items(): (songs / name).write_bytes(data)
+    return Library_Index(str(songs), str(folder / 'thumbnails'), str(folder / 'library.idx'))
+
+
+def test_read_tags_id3v2(tmp_path):
+    tag = id3v2(frame(b'TIT2', 'Título', 3), frame(b'TPE1', 'Band', 1), frame(b'TALB', 'Album'), frame(b'TLEN', '183000'),
+                frame(b'APIC', 'not a cover'))
+    path = tmp_path / 'song.mp3'
+    path.write_bytes(tag + AUDIO)
+    assert read_tags(str(path)) == {'audio_offset': len(tag), 'title': 'Título', 'artist': 'Band', 'album': 'Album', 'length': 183000}
+
+
+def test_read_tags_falls_back_to_id3v1(tmp_path):
+    path = tmp_path / 'song.mp3'
+    path.write_bytes(AUDIO + id3v1('Old Title', 'Old Band', 'Old Album'))
+    assert read_tags(str(path)) == {'audio_offset': 0, 'id3v1': 1, 'title': 'Old Title', 'artist': 'Old Band', 'album': 'Old Album'}
+
+
+def test_read_tags_prefers_id3v2_but_notes_id3v1(tmp_path):
+    tag = id3v2(frame(b'TIT2', 'New'))
+    path = tmp_path / 'song.mp3'
+    path.write_bytes(tag + AUDIO + id3v1('Old', 'Old Band'))
+    assert read_tags(str(path)) == {'audio_offset': len(tag), 'title': 'New', 'id3v1': 1}
+
+
+def test_read_tags_without_tags(tmp_path):
+    path = tmp_path / 'song.mp3'
+    path.write_bytes(AUDIO)
+    assert read_tags(str(path)) == {'audio_offset': 0}
+
+
+def test_scan_and_load(tmp_path):
+    index = make_index(tmp_path, {'b.mp3': id3v2(frame(b'TIT2', 'Bee'), frame(b'TPE1', 'Band')) + AUDIO,
+                                  'a.mp3': AUDIO + id3v1('Ay'), 'notes.txt': b'not a song'})
+    added, updated, removed = index.scan()
+    assert sorted(song.name for song in added) == ['a', 'b'] and not updated and not removed
+
+    index = Library_Index(index.songs_dir, index.thumbs_dir, index.path)
+    songs = index.sorted_songs()
+    assert [(song.name, song.title, song.band) for song in songs] == [('a', 'Ay', 'a'), ('b', 'Bee', 'Band')]
+    assert songs[0].path == os.path.join(index.songs_dir, 'a.mp3')
+    assert index.file_of(songs[1]) == 'b.mp3'
+    assert index.rows['a.mp3'][INDEX_FIELDS.index('has_id3v1')] == 1
+    assert index.rows['b.mp3'][INDEX_FIELDS.index('has_id3v1')] == 0
+
+
+def test_rescan_keeps_song_instances(tmp_path):
+    index = make_index(tmp_path, {'a.mp3': id3v2(frame(b'TIT2', 'One')) + AUDIO, 'b.mp3': AUDIO})
+    index.scan()
+    song = index.songs['a.mp3']
+    path = tmp_path / 'songs' / 'a.mp3'
+    path.write_bytes(id3v2(frame(b'TIT2', 'Two, longer')) + AUDIO)
+    os.remove(tmp_path / 'songs' / 'b.mp3')
+    (tmp_path / 'songs' / 'c.mp3').write_bytes(AUDIO)
+    added, updated, removed = index.scan()
+    assert [song.name for song in added] == ['c']
+    assert updated == [song] and song.title == 'Two, longer'
+    assert [song.name for song in removed] == ['b']
+    assert 'b.mp3' not in index.rows
+
+
+def test_older_index_is_upgraded(tmp_path):
+    index = make_index(tmp_path, {'a.mp3': AUDIO + id3v1('Ay'), 'b.mp3': AUDIO})
+    index.scan()
+    digest = INDEX_FIELDS.index('digest')
+    index.rows['a.mp3'] = index.rows['a.mp3'][:digest] + (b'digest',) + index.rows['a.mp3'][digest + 1:]
+    index.save()
+    # write the same rows the way version 3 did, without has_id3v1
+    with open(index.path, 'rb') as f: _, columns = marshal.loads(f.read())
+    with open(index.path, 'wb') as f: f.write(marshal.dumps((3, columns[:-1])))
+
+    index = Library_Index(index.songs_dir, index.thumbs_dir, index.path)
+    assert index.rows['a.mp3'][-1] is None
+    added, updated, removed = index.scan()
+    assert not added and not updated and not removed
+    assert index.rows['a.mp3'][digest] == b'digest'
+    assert index.rows['a.mp3'][-1] == 1 and index.rows['b.mp3'][-1] == 0
+
+
+def test_positions_of_a_file_removed_and_added_again(tmp_path):
+    index = make_index(tmp_path, {f'{name}.mp3': AUDIO for name in 'abc'})
+    index.scan()
+    songs = index.sorted_songs()
+    queue = Play_Queue(songs)
+    old = songs[1]
+    assert queue.index_of.get(old) == 1
+    os.remove(tmp_path / 'songs' / 'b.mp3')
+    _, _, removed = index.scan()
+    assert removed == [old]
+    queue.remove_song(old)
+    (tmp_path / 'songs' / 'b.mp3').write_bytes(AUDIO)
+    added, _, _ = index.scan()
+    new = added[0]
+    assert new is not old
+    queue.extend(added)
+    # the file maps to its new position, the song kept from before it was removed keeps the old one
+    assert (queue.index_of.get(new), queue.index_of.get(old), queue.index_of.get(songs[2])) == (3, 1, 2)
+    assert songs.positions.displaced == {old: 1}
+
+
+def test_positions_are_mapped_with_a_file_in_the_list_twice(tmp_path):
+    index = make_index(tmp_path, {f'{name}.mp3': AUDIO for name in 'ab'})
+    index.scan()
+    songs = index.sorted_songs()
+    old = songs[0]
+    index.songs.pop('a.mp3')
+    songs.extend([index.songs['a.mp3']])
+    # nothing was looked up before the file was added again, the positions are mapped from the files
+    assert (songs.positions.get(songs[2]), songs.positions.get(old), songs.positions.get(songs[1])) == (2, 0, 1)
@@ -0,0 +1,70 @@
+from __future__ import annotations
+import locale
+import playlists
+from playlists import fallback_encoding, parse_m3u, parse_pls, read_playlist
+
+
+def test_parse_m3u():
+    lines = ['#EXTM3U\n', '\n', '#EXTINF:183,Band - Song\n', 'song.mp3\n', '# a comment\n', 'other.mp3\n',
+             '#EXTINF:-1,Stream\n', 'http://example.com/stream\n', '#EXTINF:bad,\n', 'bad.mp3\n']
+    assert list(parse_m3u(lines)) == [('song.mp3', 'Band - Song', 183000), ('other.mp3', None, 0),
+                                      ('http://example.com/stream', 'Stream', 0), ('bad.mp3', None, 0)]
+
+
+def test_parse_m3u_with_byte_order_marks():
+    # two playlists pasted together keep the BOM of the second one in front of its #EXTM3U
+    lines = ['\ufeff#EXTM3U\n', 'one.mp3\n', '\ufeff#EXTM3U\n', '#EXTINF:1,Two\n', 'two.mp3\n', '\ufeffthree.mp3\n']
+    assert list(parse_m3u(lines)) == [('one.mp3', None, 0), ('two.mp3', 'Two', 1000), ('three.mp3', None, 0)]
+
+
+def test_parse_pls():
+    lines = ['\ufeff[playlist]\n', 'Title2=Second\n', 'File2=two.mp3\n', 'File1=one.mp3\n', 'Length1=61\n',
+             'Title1=First\n', 'File3=three.mp3\n', 'Length3=x\n', 'Title4=No file\n', 'NumberOfEntries=3\n']
+    assert list(parse_pls(lines)) == [('two.mp3', 'Second', 0), ('one.mp3', 'First', 61000), ('three.mp3', None, 0)]
+
+
+def test_parse_pls_with_byte_order_mark_before_an_entry():
+    assert list(parse_pls(['\ufeffFile1=one.mp3\n', 'Title1=One\n'])) == [('one.mp3', 'One', 0)]
+
+
+def test_read_playlist_utf8_with_bom(tmp_path):
+    path = tmp_path / 'list.m3u'
+    path.write_bytes('#EXTM3U\n#EXTINF:10,Café\ncafé.mp3\n'.encode('utf-8-sig'))
+    assert list(read_playlist(str(path))) == [('café.mp3', 'Café', 10000)]
+
+
+def test_read_playlist_pls_with_bom(tmp_path):
+    path = tmp_path / 'list.pls'
+    path.write_bytes('File1=ü.mp3\nTitle1=Ü\n'.encode('utf-8-sig'))
+    assert list(read_playlist(str(path))) == [('ü.mp3', 'Ü', 0)]
+
+
+def test_read_playlist_in_the_ansi_code_page(tmp_path, monkeypatch):
+    monkeypatch.setattr(playlists, 'fallback_encoding', lambda: 'cp1252')
+    path = tmp_path / 'list.m3u'
+    path.write_bytes('#EXTINF:5,“Quoted” – Song\n“Quoted”.mp3\n'.encode('cp1252'))
+    assert list(read_playlist(str(path))) == [('“Quoted”.mp3', '“Quoted” – Song', 5000)]
+
+
+def test_read_playlist_falls_back_late_without_repeating_lines(tmp_path, monkeypatch):
+    monkeypatch.setattr(playlists, 'fallback_encoding', lambda: 'cp1252')
+    path = tmp_path / 'list.m3u'
+    # far enough in that the lines before it were already handed out as UTF-8
+    entries = [f'{i:05}.mp3' for i in range(20000)] + ['€uro.mp3', 'last.mp3']
+    path.write_bytes('\n'.join(entries).encode('cp1252'))
+    assert [location for location, _, _ in read_playlist(str(path))] == entries
+
+
+def test_read_playlist_falls_back_to_latin1(tmp_path, monkeypatch):
+    monkeypatch.setattr(playlists, 'fallback_encoding', lambda: 'cp1252')
+    path = tmp_path / 'list.m3u'
+    # 0x81 is neither UTF-8 nor cp1252
+    path.write_bytes(b'one.mp3\n\x81two.mp3\n')
+    assert [location for location, _, _ in read_playlist(str(path))] == ['one.mp3', '\x81two.mp3']
+
+
+def test_fallback_encoding(monkeypatch):
+    monkeypatch.setattr(locale, 'getpreferredencoding', lambda do_setlocale=True: 'UTF-8')
+    assert fallback_encoding() == 'cp1252'
+    monkeypatch.setattr(locale, 'getpreferredencoding', lambda do_setlocale=True: 'cp1251')
+    assert fallback_encoding() == 'cp1251'
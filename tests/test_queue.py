@@ -0,0 +1,161 @@
+from __future__ import annotations
+import random
+from tests.helpers import make_songs
+from core import Play_Queue
+from library import Song
+
+
+def shuffled_queue(count: int, seed: int = 1) -> tuple[Play_Queue, list[Song]]:
+    songs = make_songs(count)
+    queue = Play_Queue(songs, random.Random(seed))
+    queue.set_shuffle(True)
+    return queue, songs
+
+
+def test_order_wraps_around():
+    songs = make_songs(3)
+    queue = Play_Queue(songs)
+    assert queue.current is songs[0]
+    assert [queue.next() for _ in range(4)] == [songs[1], songs[2], songs[0], songs[1]]
+
+
+def test_shuffle_round_is_permutation():
+    queue, songs = shuffled_queue(50)
+    played = [queue.current] + [queue.next() for _ in range(49)]
+    assert played[0] is songs[0]
+    assert sorted(played, key=lambda song: song.name) == songs
+    assert len(set(map(id, played))) == 50
+
+
+def test_shuffle_redraws_a_new_round():
+    queue, songs = shuffled_queue(20)
+    for _ in range(19): queue.next()
+    assert queue.peek_next() is None
+    second = [queue.next() for _ in range(20)]
+    assert sorted(second, key=lambda song: song.name) == songs
+
+
+def test_shuffle_toggle_keeps_current():
+    songs = make_songs(30)
+    queue = Play_Queue(songs, random.Random(2))
+    for _ in range(7): queue.next()
+    queue.set_shuffle(True)
+    assert queue.current is songs[7]
+    current = queue.next()
+    queue.set_shuffle(False)
+    assert queue.current is current
+    assert queue.next() is songs[(songs.index(current) + 1) % 30]
+
+
+def test_previous_goes_back_through_history():
+    queue, songs = shuffled_queue(10)
+    played = [queue.current] + [queue.next() for _ in range(4)]
+    assert [queue.previous() for _ in range(4)] == played[-2::-1]
+    # next walks forward through what was gone back from
+    assert [queue.next() for _ in range(4)] == played[1:]
+
+
+def test_jump_to_goes_on_from_the_song():
+    songs = make_songs(20)
+    queue = Play_Queue(songs)
+    assert queue.jump_to(songs[10]) is songs[10]
+    assert queue.next() is songs[11]
+    assert queue.previous() is songs[10]
+    assert queue.previous() is songs[0]
+
+
+def test_jump_to_unplayed_shuffled_song_keeps_the_round():
+    queue, songs = shuffled_queue(20)
+    played = [queue.current] + [queue.next() for _ in range(4)]
+    target = next(song for song in songs if song not in played)
+    played.append(queue.jump_to(target))
+    played += [queue.next() for _ in range(14)]
+    assert sorted(played, key=lambda song: song.name) == songs
+    assert queue.peek_next() is None
+
+
+def test_jump_to_played_shuffled_song_plays_like_a_queued_one():
+    queue, songs = shuffled_queue(20)
+    played = [queue.current] + [queue.next() for _ in range(4)]
+    after = queue.peek_next()
+    queue.jump_to(played[1])
+    assert queue.current is played[1] and not queue.from_order
+    assert queue.next() is after
+
+
+def test_queued_songs_play_before_the_order():
+    songs = make_songs(10)
+    queue = Play_Queue(songs)
+    extra = Song('extra', path='extra.mp3', img=False)
+    queue.enqueue(songs[5])
+    queue.play_next(extra)
+    assert len(queue) == 12
+    assert [queue.next() for _ in range(3)] == [extra, songs[5], songs[1]]
+
+
+def test_remove_song_is_skipped_until_restored():
+    songs = make_songs(5)
+    queue = Play_Queue(songs)
+    queue.remove_song(songs[1])
+    queue.remove_song(songs[2])
+    assert len(queue) == 3
+    assert queue.next() is songs[3]
+    queue.restore_song(songs[1])
+    assert [queue.next() for _ in range(3)] == [songs[4], songs[0], songs[1]]
+
+
+def test_jump_to_removed_song_restores_it():
+    songs = make_songs(5)
+    queue = Play_Queue(songs)
+    queue.remove_song(songs[3])
+    queue.jump_to(songs[3])
+    assert 3 not in queue.removed
+    assert queue.previous() is songs[0]
+
+
+def test_remove_song_skips_whole_shuffled_round():
+    queue, songs = shuffled_queue(10)
+    for song in songs[1:6]: queue.remove_song(song)
+    played = [queue.current] + [queue.next() for _ in range(4)]
+    assert sorted(played, key=lambda song: song.name) == [songs[0]] + songs[6:]
+
+
+def test_remaining_ms():
+    songs = [Song(f'{i}', path=f'{i}.mp3', img=False, duration=(i + 1) * 1000) for i in range(5)]
+    queue = Play_Queue(songs)
+    assert queue.remaining_ms() == 14000
+    queue.next()
+    assert queue.remaining_ms() == 12000
+    queue.remove_song(songs[3])
+    assert queue.remaining_ms() == 8000
+    queue.enqueue(songs[0])
+    assert queue.remaining_ms() == 9000
+    queue.next()
+    queue.next()
+    assert queue.remaining_ms() == 5000
+    # the order only runs to the end of the list
+    queue.next()
+    assert queue.current is songs[4] and queue.remaining_ms() == 0
+
+
+def test_remaining_ms_follows_duration_changes_and_duplicates():
+    songs = [Song(f'{i}', path=f'{i}.mp3', img=False, duration=1000) for i in range(4)]
+    queue = Play_Queue(songs)
+    assert queue.remaining_ms() == 3000
+    songs[2].duration = 5000
+    queue.lengths_changed()
+    assert queue.remaining_ms() == 7000
+    queue.set_duplicates({songs[2]: songs[1]}, skip=True)
+    assert queue.remaining_ms() == 2000
+
+
+def test_remaining_ms_of_a_shuffled_round():
+    songs = [Song(f'{i}', path=f'{i}.mp3', img=False, duration=(i + 1) * 1000) for i in range(6)]
+    queue = Play_Queue(songs, random.Random(3))
+    queue.set_shuffle(True)
+    total = sum(song.duration for song in songs)
+    played = queue.current.duration
+    assert queue.remaining_ms() == total - played
+    for _ in range(3):
+        played += queue.next().duration
+        assert queue.remaining_ms() == total - played
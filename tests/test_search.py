@@ -0,0 +1,56 @@
+from __future__ import annotations
+from library import Song
+from search import Search_Index
+
+
+def song(name: str, title: str, band: str = 'Nobody', album: str = '') -> Song:
+    return Song(name, path=f'{name}.mp3', title=title, band=band, album=album, img=False)
+
+
+SONGS = [song('01', 'Blue Monday', 'New Order'), song('02', 'Monday Morning', 'Fleetwood Mac'),
+         song('03', 'Manic Monday', 'The Bangles', 'Different Light'), song('04', 'Lights', 'Ellie Goulding'),
+         song('05', 'Ordinary World', 'Duran Duran'), song('06', 'Café del Mar', 'Energy 52')]
+
+
+def titles(songs: list[Song]) -> list[str]: return [song.title for song in songs]
+
+
+def test_search_by_word_prefix():
+    index = Search_Index(SONGS)
+    assert len(index) == 6
+    assert titles(index.search('mon')) == ['Blue Monday', 'Manic Monday', 'Monday Morning']
+    assert titles(index.search('MONDAY mor')) == ['Monday Morning']
+    assert index.search('day') == [] and index.search('  ') == []
+
+
+def test_title_matches_come_first():
+    index = Search_Index(SONGS)
+    # Ordinary World has it in the title, Blue Monday only in the band
+    assert titles(index.search('ord')) == ['Ordinary World', 'Blue Monday']
+    assert titles(index.search('light')) == ['Lights', 'Manic Monday']
+
+
+def test_every_word_has_to_match_in_some_field():
+    index = Search_Index(SONGS)
+    assert titles(index.search('monday bangles')) == ['Manic Monday']
+    assert titles(index.search('café')) == ['Café del Mar'] and titles(index.search('06')) == ['Café del Mar']
+
+
+def test_limit():
+    index = Search_Index(SONGS)
+    assert len(index.search('m', limit=2)) == 2
+
+
+def test_add_remove_update():
+    index = Search_Index(SONGS)
+    extra = song('07', 'Mondays Again')
+    index.add(extra)
+    assert titles(index.search('mondays')) == ['Mondays Again']
+    index.remove(SONGS[0])
+    assert 'Blue Monday' not in titles(index.search('monday'))
+    extra.title = 'Tuesday'
+    index.update(extra)
+    assert index.search('mondays') == [] and index.search('tues') == [extra]
+    for removed in SONGS[1:5]: index.remove(removed)
+    # enough stale entries rebuilt the postings
+    assert index.stale == 0 and titles(index.search('m')) == ['Café del Mar']
@@ -0,0 +1,56 @@
+from __future__ import annotations
+import json
+import pytest
+import settings as settings_module
+from settings import Settings
+
+
+@pytest.fixture
+def path(tmp_path, monkeypatch) -> str:
+    '''
+    ## path
+    ##### the path of a settings file in a folder of the test, without the old preset file of the working directory
+    '''
+    monkeypatch.setattr(settings_module, 'LEGACY_PREF_FILE', str(tmp_path / 'preset_preference.txt'))
+    return str(tmp_path / 'settings.json')
+
+
+def test_load_keeps_values_of_the_right_type(app, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'volume': 'loud', 'autoplay': False, 'crossfade': 3, 'shuffle': 1, 'position': 1.5, 'unknown': 7}, f)
+    settings = Settings(path=path)
+    assert (settings.volume, settings.autoplay, settings.crossfade, settings.shuffle, settings.position) == (20, False, 3, False, 0)
+    assert not hasattr(settings, 'unknown')
+
+
+@pytest.mark.parametrize('data', ['{"volume": 5', '[1, 2]', ''], ids=['cut off', 'not an object', 'empty'])
+def test_a_corrupt_file_falls_back_to_the_defaults(app, path, data):
+    with open(path, 'w', encoding='utf-8') as f: f.write(data)
+    settings = Settings(path=path)
+    assert (settings.volume, settings.autoplay, settings.preset) == (20, True, '')
+    settings.set('volume', 55)
+    settings.save(wait=True)
+    assert Settings(path=path).volume == 55
+
+
+def test_the_old_preset_file_is_read_without_settings(app, path):
+    with open(settings_module.LEGACY_PREF_FILE, 'w') as f: f.write('WarmFlame\n')
+    assert Settings(path=path).preset == 'WarmFlame'
+
+
+def test_changes_are_written_together_once_the_throttle_runs_out(app, path, monkeypatch, wait_until):
+    monkeypatch.setattr(settings_module, 'SAVE_MS', 100)
+    settings = Settings(path=path)
+    writes = []
+    write = settings.write
+    monkeypatch.setattr(settings, 'write', lambda data: (writes.append(data), write(data)))
+    for position in range(1, 6): settings.set('position', position * 1000)
+    settings.set('volume', 70)
+    # a value set to what it already is doesn't start the throttle
+    settings.set('autoplay', True)
+    assert settings.throttle.isActive() and not writes
+    wait_until(lambda: writes)
+    settings.pool.shutdown(wait=True)
+    assert len(writes) == 1
+    loaded = Settings(path=path)
+    assert (loaded.position, loaded.volume) == (5000, 70)
@@ -0,0 +1,100 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from PySide6.QtCore import QFileSystemWatcher, QObject, QTimer, Signal
+from library import Library_Index
+
+
+# a burst of changes is applied once it has been quiet for DEBOUNCE_MS, or every MAX_WAIT_MS while a bulk copy keeps going
+DEBOUNCE_MS = 500
+MAX_WAIT_MS = 3000
+
+
+class Library_Watcher(QObject):
+    '''
+    # Library_Watcher
+    #### Watches the songs and thumbnails folders and keeps the library up to date while the player runs
+    Change events are batched: a burst of them leads to one scan. The folders are listed and the tags read on a worker thread, only the deltas are applied on the GUI thread.
+    ---
+    ## Parameters
+    - library [Library_Index]: The library to keep up to date
+    - parent [QObject]: The QObject which owns the watcher
+    - debounce [int]: How long the folders have to be quiet before a scan, in milliseconds
+    - max_wait [int]: The longest a scan is put off while changes keep coming, in milliseconds
+    '''
+    changed = Signal(list, list, list)
+    collected = Signal(object)
+
+    def __init__(self, library: Library_Index, parent: QObject = None, debounce: int = DEBOUNCE_MS, max_wait: int = MAX_WAIT_MS) -> None:
+        super().__init__(parent)
+        self.library = library
+        self.max_wait = max_wait / 1000
+        self.first_event: float = None
+        self.scanning = False
+        self.dirty = False
+        self.events = 0
+        self.scans = 0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(debounce)
+        self.timer.timeout.connect(self.scan)
+
+        self.pool = ThreadPoolExecutor(1)
+        self.collected.connect(self.on_collected)
+
+        self.watcher = QFileSystemWatcher(self)
+        for folder in (library.songs_dir, library.thumbs_dir): self.watcher.addPath(folder)
+        self.watcher.directoryChanged.connect(self.on_event)
+
+    def on_event(self, *_):
+        '''
+        on_event
+        ---
+        puts the scan off until the folders are quiet, but never for longer than max_wait since the first change of the burst
+        '''
+        self.events += 1
+        now = perf_counter()
+        if self.first_event is None: self.first_event = now
+        if not self.timer.isActive() or now - self.first_event < self.max_wait: self.timer.start()
+
+    def scan(self):
+        '''
+        scan
+        ---
+        lists the folders on the worker thread, a scan which is already running is followed by another one once it is done
+        '''
+        self.first_event = None
+        if self.scanning:
+            self.dirty = True
+            return
+        self.scanning = True
+        self.scans += 1
+        future = self.pool.submit(self.library.collect)
+        future.add_done_callback(lambda future: self.collected.emit(None if future.exception() else future.result()))
+
+    def on_collected(self, scan: tuple | None):
+        '''
+        ## on_collected
+        ##### applies what the worker found to the library and reports the songs which were added, updated or removed
+        ---
+        ## Parameters
+        - scan [tuple | None]: what Library_Index.collect returned, None if it failed
+        '''
+        self.scanning = False
+        if scan is not None:
+            added, updated, removed = self.library.apply(scan)
+            if added or updated or removed: self.changed.emit(added, updated, removed)
+        if self.dirty:
+            self.dirty = False
+            self.scan()
+
+    def stop(self):
+        '''
+        stop
+        ---
+        stops watching the folders
+        '''
+        self.timer.stop()
+        self.watcher.removePaths(self.watcher.directories())
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,123 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from PySide6.QtCore import QLineF, QRect, Qt
+from PySide6.QtGui import QColor, QMouseEvent, QPainter, QPaintEvent, QPen, QPixmap
+from PySide6.QtWidgets import QAbstractSlider, QSlider, QWidget
+from core import metrics
+if TYPE_CHECKING: import numpy as np
+
+
+class Waveform_Slider(QSlider):
+    '''
+    # Waveform_Slider
+    #### A seek bar which shows the song's waveform, played part and unplayed part in two colors. Without peaks it is a plain slider.
+    Both colors of the waveform are rendered once per size into pixmaps, a position change only repaints the strip between the old and the new boundary.
+    ---
+    ## Parameters
+    - colors [tuple[tuple[int]]]: the color preset used as a tuple of rgba values
+    - parent [QWidget]: the widget which holds the slider
+    '''
+    def __init__(self, colors: tuple[tuple[int]], parent: QWidget = None) -> None:
+        super().__init__(Qt.Orientation.Horizontal, parent)
+        self.played_color = QColor(*colors[1]).darker(160)
+        self.unplayed_color = QColor(0, 0, 0, 70)
+        self.peaks: np.ndarray = None
+        self.pixmaps: tuple[QPixmap, QPixmap] = None
+        self.key: tuple = None
+        self.boundary = 0
+
+    def set_peaks(self, peaks: np.ndarray | None):
+        '''
+        ## set_peaks
+        ##### shows the waveform of a new song, None goes back to a plain slider until its peaks are ready
+        ---
+        ## Parameters
+        - peaks [np.ndarray | None]: the (min, max) peaks of the song
+        '''
+        self.peaks = peaks
+        self.pixmaps = self.key = None
+        self.update()
+
+    def boundary_x(self) -> int:
+        return round(self.sliderPosition() / self.maximum() * self.width()) if self.maximum() > 0 else 0
+
+    def waveforms(self) -> tuple[QPixmap, QPixmap]:
+        '''
+        ## waveforms
+        ##### returns the played and unplayed waveform, drawing them only if the size changed
+        '''
+        dpr = self.devicePixelRatioF()
+        key = (self.width(), self.height(), dpr)
+        if key == self.key: return self.pixmaps
+        self.key = key
+        width, middle, scale = self.width(), self.height() / 2, self.height() / 2 / 127
+        peaks, count = self.peaks.tolist(), len(self.peaks)
+        lines = []
+        for x in range(width):
+            low, high = peaks[x * count // width]
+            lines.append(QLineF(x + 0.5, middle - high*scale, x + 0.5, max(middle - low*scale, middle - high*scale + 1)))
+
+        pixmaps = []
+        for color in (self.played_color, self.unplayed_color):
+            pixmap = QPixmap(self.size() * dpr)
+            pixmap.setDevicePixelRatio(dpr)
+            pixmap.fill(Qt.GlobalColor.transparent)
+            p = QPainter(pixmap)
+            p.setPen(QPen(color, 1))
+            p.drawLines(lines)
+            p.end()
+            pixmaps.append(pixmap)
+        self.pixmaps = tuple(pixmaps)
+        return self.pixmaps
+
+    def paintEvent(self, event: QPaintEvent):
+        '''
+        paintEvent
+        ---
+        paints the damaged rect from the played pixmap left of the boundary and from the unplayed pixmap right of it
+        '''
+        start = metrics.start()
+        if self.peaks is None:
+            super().paintEvent(event)
+            return metrics.stop('seek bar paint', start)
+        played, unplayed = self.waveforms()
+        self.boundary = self.boundary_x()
+        rect = event.rect()
+        painter = QPainter(self)
+        for pixmap, part in ((played, QRect(0, 0, self.boundary, self.height())), (unplayed, QRect(self.boundary, 0, self.width() - self.boundary, self.height()))):
+            part = part.intersected(rect)
+            if part.isEmpty(): continue
+            painter.drawPixmap(part, pixmap, QRect(part.topLeft() * pixmap.devicePixelRatio(), part.size() * pixmap.devicePixelRatio()))
+        painter.end()
+        metrics.stop('seek bar paint', start)
+
+    def sliderChange(self, change: QAbstractSlider.SliderChange):
+        '''
+        sliderChange
+        ---
+        with a waveform shown a new position only repaints the columns the boundary crossed, instead of the whole slider
+        '''
+        if self.peaks is None or change != QAbstractSlider.SliderChange.SliderValueChange: return super().sliderChange(change)
+        x = self.boundary_x()
+        if x != self.boundary: self.update(QRect(min(x, self.boundary), 0, abs(x - self.boundary), self.height()))
+
+    def seek_to(self, x: float):
+        self.setSliderPosition(round(min(max(x / self.width(), 0), 1) * self.maximum()))
+
+    def mousePressEvent(self, event: QMouseEvent):
+        '''
+        mousePressEvent
+        ---
+        clicking the waveform jumps straight to that point of the song
+        '''
+        if self.peaks is None: return super().mousePressEvent(event)
+        self.setSliderDown(True)
+        self.seek_to(event.position().x())
+
+    def mouseMoveEvent(self, event: QMouseEvent):
+        if self.peaks is None or not self.isSliderDown(): return super().mouseMoveEvent(event)
+        self.seek_to(event.position().x())
+
+    def mouseReleaseEvent(self, event: QMouseEvent):
+        if self.peaks is None or not self.isSliderDown(): return super().mouseReleaseEvent(event)
+        self.setSliderDown(False)